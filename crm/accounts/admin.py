@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 
+from core.admin import AdminPerformanceMixin
+
 from .models import User, Role, UserRole, User2FASecret, User2FABackupCode
 
 
 @admin.register(User)
-class UserAdmin(DjangoUserAdmin):
+class UserAdmin(AdminPerformanceMixin, DjangoUserAdmin):
     fieldsets = (
         (None, {"fields": ("username", "password")}),
         ("Información personal", {"fields": ("first_name", "last_name", "email")}),
@@ -50,25 +52,29 @@ class UserAdmin(DjangoUserAdmin):
 
 
 @admin.register(Role)
-class RoleAdmin(admin.ModelAdmin):
+class RoleAdmin(AdminPerformanceMixin, admin.ModelAdmin):
     list_display = ("name", "dealer")
     list_filter = ("dealer",)
     search_fields = ("name",)
 
 
 @admin.register(UserRole)
-class UserRoleAdmin(admin.ModelAdmin):
+class UserRoleAdmin(AdminPerformanceMixin, admin.ModelAdmin):
     list_display = ("user", "role")
     list_filter = ("role",)
+    # User.__str__ y Role.__str__ muestran el dealer
+    extra_select_related = ("user__dealer", "role__dealer")
 
 
 @admin.register(User2FASecret)
-class User2FASecretAdmin(admin.ModelAdmin):
+class User2FASecretAdmin(AdminPerformanceMixin, admin.ModelAdmin):
     list_display = ("user", "created_at", "last_used_at")
+    extra_select_related = ("user__dealer",)
     readonly_fields = ("created_at",)
 
 
 @admin.register(User2FABackupCode)
-class User2FABackupCodeAdmin(admin.ModelAdmin):
+class User2FABackupCodeAdmin(AdminPerformanceMixin, admin.ModelAdmin):
     list_display = ("user", "is_used", "created_at")
+    extra_select_related = ("user__dealer",)
     list_filter = ("is_used",)
@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+from core.middleware import HybridMiddleware
+
+from .principal import get_optional_principal
+
+
+class PrincipalMiddleware(HybridMiddleware):
+    """
+    Expone request.principal (lazy, None si no hay usuario autenticado).
+    Debe ir después de AuthenticationMiddleware.
+    """
+
+    def __call__(self, request):
+        request.principal = SimpleLazyObject(lambda: get_optional_principal(request))
+        # En ASGI get_response devuelve la corrutina del resto de la cadena
+        return self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_dealer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user2fabackupcode',
+            name='lookup_digest',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='HMAC-SHA256 del código (búsqueda indexada)', max_length=64, null=True),
+        ),
+    ]
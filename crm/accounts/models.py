@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.contrib.sessions.base_session import AbstractBaseSession
 from django.db import models
 from django.utils import timezone
 
@@ -44,16 +45,27 @@ class User(AbstractUser, BaseModel):
         blank=True
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Dealer al cargar: los signals mueven DealerStats.users_count si cambia
+        instance._loaded_dealer_id = instance.__dict__.get("dealer_id")
+        return instance
+
     def has_2fa_enabled(self) -> bool:
         return self.is_2fa_enabled is True
 
-    def confirm_2fa(self) -> None:
+    def confirm_2fa(self, keep_session_key: str | None = None) -> None:
         """
         Marca el 2FA como confirmado.
+        Evento crítico: invalida las demás sesiones del usuario.
         """
+        from .sessions import revoke_user_sessions
+
         self.is_2fa_enabled = True
         self.two_factor_confirmed_at = timezone.now()
         self.save(update_fields=["is_2fa_enabled", "two_factor_confirmed_at"])
+        revoke_user_sessions(self.pk, keep_session_key=keep_session_key)
 
     def __str__(self) -> str:
         dealer_name = self.dealer.name if self.dealer else "NO-DEALER"
@@ -173,15 +185,69 @@ class User2FABackupCode(BaseModel):
         help_text="Hash del código de recuperación"
     )
 
+    # HMAC del código: permite ubicar la fila con un índice
+    # y verificar el hash lento de un solo candidato.
+    lookup_digest = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="HMAC-SHA256 del código (búsqueda indexada)"
+    )
+
     is_used = models.BooleanField(default=False)
 
-    def mark_as_used(self) -> None:
+    def mark_as_used(self) -> bool:
         """
         Marca el código como utilizado.
+        UPDATE condicional: solo un request concurrente puede consumirlo.
         """
+        updated = type(self).objects.filter(
+            pk=self.pk,
+            is_used=False,
+        ).update(is_used=True, updated_at=timezone.now())
         self.is_used = True
-        self.save(update_fields=["is_used"])
+        return updated == 1
 
     def __str__(self) -> str:
         status = "USED" if self.is_used else "ACTIVE"
         return f"BackupCode {status} for {self.user.username}"
+
+
+# ======================================================
+# SESIONES
+# ======================================================
+
+class UserSession(AbstractBaseSession):
+    """
+    Sesión con índice por usuario y dealer (SESSION_ENGINE = "accounts.sessions").
+    Permite revocar todas las sesiones de un usuario o de un dealer
+    con un DELETE indexado, sin decodificar session_data.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="sessions"
+    )
+
+    dealer = models.ForeignKey(
+        Dealer,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="sessions"
+    )
+
+    @classmethod
+    def get_session_store_class(cls):
+        from .sessions import SessionStore
+
+        return SessionStore
+
+    class Meta:
+        verbose_name = "User Session"
+        verbose_name_plural = "User Sessions"
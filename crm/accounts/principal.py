@@ -0,0 +1,163 @@
+"""
+Principal del request: usuario + dealer + roles resueltos en una sola
+consulta y cacheados entre requests.
+
+La entrada cacheada guarda las versiones de usuario y dealer con las que se
+construyó; las señales de accounts/signals.py incrementan esas versiones
+cuando cambian User, Dealer, Role o UserRole, invalidando la entrada.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpRequest
+
+from core.sharding import shard_for_dealer, sharding_enabled
+
+PRINCIPAL_KEY = "principal:{user_id}"
+USER_VERSION_KEY = "principal:version:user:{user_id}"
+DEALER_VERSION_KEY = "principal:version:dealer:{dealer_id}"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Identidad resuelta del usuario autenticado.
+    """
+    user_id: int
+    username: str
+    dealer_id: int | None
+    dealer_name: str | None
+    roles: frozenset[str]
+    is_staff: bool = False
+    is_superuser: bool = False
+    user_version: int = 0
+    dealer_version: int = 0
+
+    def has_role(self, *names: str) -> bool:
+        return bool(self.roles.intersection(names))
+
+
+def _cache():
+    return caches[getattr(settings, "PRINCIPAL_CACHE_ALIAS", "default")]
+
+
+def _timeout() -> int:
+    return getattr(settings, "PRINCIPAL_CACHE_TIMEOUT", 60)
+
+
+def _versions(user_id: int, dealer_id: int | None) -> tuple[int, int]:
+    keys = [USER_VERSION_KEY.format(user_id=user_id)]
+    if dealer_id is not None:
+        keys.append(DEALER_VERSION_KEY.format(dealer_id=dealer_id))
+    values = _cache().get_many(keys)
+    user_version = values.get(keys[0], 0)
+    dealer_version = values.get(keys[1], 0) if dealer_id is not None else 0
+    return user_version, dealer_version
+
+
+def _bump(key: str) -> None:
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_user(user_id: int) -> None:
+    _bump(USER_VERSION_KEY.format(user_id=user_id))
+
+
+def invalidate_dealer(dealer_id: int) -> None:
+    _bump(DEALER_VERSION_KEY.format(dealer_id=dealer_id))
+
+
+def load_principal(user_id: int, dealer_hint: int | None = None) -> Principal | None:
+    """
+    Usuario + dealer + nombres de roles en una única consulta (LEFT JOINs).
+    Las versiones se leen antes de la consulta: si hay un cambio concurrente,
+    la entrada queda con la versión vieja y se descarta en la próxima lectura.
+    """
+    from accounts.models import User, UserRole
+
+    user_version, dealer_version = _versions(user_id, dealer_hint)
+
+    rows = list(
+        User.objects.filter(pk=user_id).values_list(
+            "username",
+            "dealer_id",
+            "dealer__name",
+            "is_staff",
+            "is_superuser",
+            "user_roles__role__name",
+        )
+    )
+    if not rows:
+        return None
+
+    username, dealer_id, dealer_name, is_staff, is_superuser, _ = rows[0]
+    if dealer_id != dealer_hint:
+        dealer_version = _versions(user_id, dealer_id)[1]
+
+    roles = frozenset(row[-1] for row in rows if row[-1])
+    if dealer_id is not None and sharding_enabled():
+        # Los roles viven en el shard del dealer (core.sharding)
+        shard, _ = shard_for_dealer(dealer_id)
+        if shard != DEFAULT_DB_ALIAS:
+            roles = frozenset(
+                UserRole.objects.using(shard)
+                .filter(user_id=user_id)
+                .values_list("role__name", flat=True)
+            )
+
+    return Principal(
+        user_id=user_id,
+        username=username,
+        dealer_id=dealer_id,
+        dealer_name=dealer_name,
+        roles=roles,
+        is_staff=is_staff,
+        is_superuser=is_superuser,
+        user_version=user_version,
+        dealer_version=dealer_version,
+    )
+
+
+def get_cached_principal(user_id: int) -> Principal | None:
+    cache = _cache()
+    key = PRINCIPAL_KEY.format(user_id=user_id)
+
+    cached = cache.get(key)
+    if cached is not None:
+        versions = _versions(user_id, cached.dealer_id)
+        if versions == (cached.user_version, cached.dealer_version):
+            return cached
+
+    principal = load_principal(user_id, dealer_hint=cached.dealer_id if cached else None)
+    if principal is not None:
+        cache.set(key, principal, _timeout())
+    return principal
+
+
+def get_principal(request: HttpRequest) -> Principal:
+    """
+    Principal del request autenticado.
+    Se resuelve una vez por request y se guarda en request._principal.
+    """
+    principal = get_optional_principal(request)
+    if principal is None:
+        raise PermissionDenied
+    return principal
+
+
+def get_optional_principal(request: HttpRequest) -> Principal | None:
+    if not hasattr(request, "_principal"):
+        user = getattr(request, "user", None)
+        request._principal = (
+            get_cached_principal(user.pk)
+            if user is not None and user.is_authenticated
+            else None
+        )
+    return request._principal
@@ -0,0 +1,82 @@
+"""
+Session engine con índice usuario -> sesión.
+
+Extiende el backend de base de datos de Django guardando user_id y dealer_id
+en columnas indexadas. Las sesiones vencidas se purgan de a lotes
+(ocasionalmente al guardar una sesión y en clearsessions), nunca con un
+DELETE sobre toda la tabla.
+"""
+import random
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+
+from .principal import get_cached_principal
+
+PURGE_BATCH_SIZE = 500
+
+
+class SessionStore(DBStore):
+
+    @classmethod
+    def get_model_class(cls):
+        from .models import UserSession
+
+        return UserSession
+
+    def create_model_instance(self, data):
+        obj = super().create_model_instance(data)
+        user_id = data.get(SESSION_KEY)
+        if user_id is not None:
+            obj.user_id = int(user_id)
+            principal = get_cached_principal(obj.user_id)
+            obj.dealer_id = principal.dealer_id if principal else None
+        return obj
+
+    def save(self, must_create=False):
+        super().save(must_create=must_create)
+        probability = getattr(settings, "SESSION_PURGE_PROBABILITY", 0.01)
+        if probability and random.random() < probability:
+            purge_expired_sessions(max_batches=1)
+
+    @classmethod
+    def clear_expired(cls):
+        purge_expired_sessions()
+
+
+def purge_expired_sessions(batch_size: int = PURGE_BATCH_SIZE, max_batches: int | None = None) -> int:
+    """
+    Borra sesiones vencidas en lotes acotados (usa el índice de expire_date).
+    """
+    model = SessionStore.get_model_class()
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        keys = list(
+            model.objects.filter(expire_date__lt=timezone.now())
+            .values_list("session_key", flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        deleted += model.objects.filter(session_key__in=keys).delete()[0]
+        batches += 1
+    return deleted
+
+
+def revoke_user_sessions(user_id: int, keep_session_key: str | None = None) -> int:
+    """
+    Invalida todas las sesiones de un usuario (opcionalmente salvo la actual).
+    """
+    sessions = SessionStore.get_model_class().objects.filter(user_id=user_id)
+    if keep_session_key:
+        sessions = sessions.exclude(session_key=keep_session_key)
+    return sessions.delete()[0]
+
+
+def revoke_dealer_sessions(dealer_id: int) -> int:
+    """
+    Invalida todas las sesiones de los usuarios de un dealer.
+    """
+    return SessionStore.get_model_class().objects.filter(dealer_id=dealer_id).delete()[0]
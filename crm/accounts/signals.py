@@ -0,0 +1,114 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.sharding import mirror_row, shard_for_dealer, sharding_enabled
+from dealers.models import Dealer, add_stats_deltas, apply_stats_deltas
+
+from .models import Role, User, UserRole
+from .principal import invalidate_dealer, invalidate_user
+from .sessions import revoke_user_sessions
+
+# Se invalida al confirmar la transacción: si se invalidara antes, otro request
+# podría recargar los datos viejos (aún sin commit) con la versión nueva.
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, using, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user(user_id), using=using)
+
+
+@receiver(post_save, sender=User)
+def password_changed(sender, instance, created, **kwargs):
+    # AbstractBaseUser guarda la contraseña nueva en _password hasta terminar save()
+    if not created and getattr(instance, "_password", None) is not None:
+        revoke_user_sessions(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+def user_role_changed(sender, instance, using, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user(user_id), using=using)
+    # Cambio de roles: evento crítico
+    revoke_user_sessions(user_id)
+
+
+@receiver([post_save, post_delete], sender=Role)
+def role_changed(sender, instance, using, **kwargs):
+    # Renombrar un rol afecta a todos los usuarios del dealer
+    dealer_id = instance.dealer_id
+    transaction.on_commit(lambda: invalidate_dealer(dealer_id), using=using)
+
+
+@receiver([post_save, post_delete], sender=Dealer)
+def dealer_changed(sender, instance, using, **kwargs):
+    dealer_id = instance.pk
+    transaction.on_commit(lambda: invalidate_dealer(dealer_id), using=using)
+
+
+# Espejos de Dealer / User en el shard del tenant (core.sharding)
+
+def _tenant_shard(sender, instance) -> str | None:
+    if not sharding_enabled():
+        return None
+    if sender is Dealer:
+        shard = instance.shard
+    elif instance.dealer_id is not None:
+        shard, _ = shard_for_dealer(instance.dealer_id)
+    else:
+        return None
+    return shard if shard != DEFAULT_DB_ALIAS else None
+
+
+@receiver(post_save, sender=Dealer)
+@receiver(post_save, sender=User)
+def mirror_to_shard(sender, instance, using, raw=False, **kwargs):
+    if raw or using != DEFAULT_DB_ALIAS:
+        return
+    shard = _tenant_shard(sender, instance)
+    if shard:
+        mirror_row(instance, shard)
+
+
+@receiver(post_delete, sender=Dealer)
+@receiver(post_delete, sender=User)
+def delete_shard_mirror(sender, instance, using, **kwargs):
+    if using != DEFAULT_DB_ALIAS:
+        return
+    shard = _tenant_shard(sender, instance)
+    if shard:
+        # En el shard el CASCADE borra también los datos del tenant
+        sender._base_manager.using(shard).filter(pk=instance.pk).delete()
+
+
+# DealerStats.users_count (la fila vive en el shard del dealer)
+
+def _count_users(dealer_id: int | None, sign: int) -> None:
+    if dealer_id is None:
+        return
+    deltas = {}
+    add_stats_deltas(deltas, dealer_id, {"users_count": 1}, sign=sign)
+    shard, _ = shard_for_dealer(dealer_id)
+    apply_stats_deltas(deltas, using=shard)
+
+
+@receiver(post_save, sender=User)
+def user_counted(sender, instance, created, using, raw=False, update_fields=None, **kwargs):
+    if raw or using != DEFAULT_DB_ALIAS:
+        return
+    if created:
+        _count_users(instance.dealer_id, 1)
+    elif update_fields is None or {"dealer", "dealer_id"} & update_fields:
+        previous = getattr(instance, "_loaded_dealer_id", instance.dealer_id)
+        if previous != instance.dealer_id:
+            _count_users(previous, -1)
+            _count_users(instance.dealer_id, 1)
+    instance._loaded_dealer_id = instance.dealer_id
+
+
+@receiver(post_delete, sender=User)
+def user_uncounted(sender, instance, using, **kwargs):
+    if using != DEFAULT_DB_ALIAS:
+        return
+    _count_users(instance.dealer_id, -1)
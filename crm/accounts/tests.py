@@ -1,3 +1,224 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from dealers.models import Dealer
+
+from django.contrib.auth.hashers import check_password, make_password
+
+from .models import Role, User, User2FABackupCode, UserRole, UserSession
+from .principal import get_cached_principal
+from .sessions import SessionStore, purge_expired_sessions, revoke_dealer_sessions
+from .two_factor import generate_backup_codes, verify_backup_code
+
+
+class PrincipalCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.dealer = Dealer.objects.create(
+            name="Dealer",
+            rut="RUT-1",
+            phone="099000000",
+            whatsapp="099000000",
+            email="dealer@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.user = User.objects.create_user(username="user", password="pw", dealer=self.dealer)
+        self.role = Role.objects.create(name="SALES", dealer=self.dealer)
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def test_loads_in_one_query_and_caches(self):
+        with self.assertNumQueries(1):
+            principal = get_cached_principal(self.user.pk)
+        self.assertEqual(principal.dealer_name, "Dealer")
+        self.assertEqual(principal.roles, frozenset({"SALES"}))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_principal(self.user.pk), principal)
+
+    def test_invalidated_on_role_and_dealer_changes(self):
+        get_cached_principal(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.name = "ADMIN"
+            self.role.save()
+        self.assertEqual(get_cached_principal(self.user.pk).roles, frozenset({"ADMIN"}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.filter(user=self.user).first().delete()
+        self.assertEqual(get_cached_principal(self.user.pk).roles, frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealer.name = "Renamed"
+            self.dealer.save()
+        self.assertEqual(get_cached_principal(self.user.pk).dealer_name, "Renamed")
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class BackupCodeTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="2fa", password="pw")
+
+    def test_generated_code_verifies_once(self):
+        codes = generate_backup_codes(self.user)
+        self.assertEqual(len(codes), 10)
+        self.assertEqual(User2FABackupCode.objects.filter(user=self.user).count(), 10)
+
+        with self.assertNumQueries(2):
+            self.assertTrue(verify_backup_code(self.user, codes[3].lower()))
+        self.assertFalse(verify_backup_code(self.user, codes[3]))
+        self.assertTrue(verify_backup_code(self.user, codes[4].replace("-", " ")))
+
+    def test_wrong_code_is_rejected(self):
+        generate_backup_codes(self.user)
+        self.assertFalse(verify_backup_code(self.user, "AAAAA-AAAAA"))
+        self.assertFalse(verify_backup_code(self.user, ""))
+
+    def test_codes_are_per_user(self):
+        other = User.objects.create_user(username="other", password="pw")
+        code = generate_backup_codes(other)[0]
+        generate_backup_codes(self.user)
+        self.assertFalse(verify_backup_code(self.user, code))
+
+    def test_legacy_codes_without_digest_still_work(self):
+        User2FABackupCode.objects.create(user=self.user, code_hash=make_password("LEGACY1234"))
+        self.assertTrue(verify_backup_code(self.user, "LEGACY1234"))
+        self.assertFalse(verify_backup_code(self.user, "LEGACY1234"))
+
+    def test_legacy_scan_hashes_once_per_row_and_regeneration_drops_it(self):
+        for code in ("LEGACYAAAA", "LEGACYBBBB", "LEGACYCCCC"):
+            User2FABackupCode.objects.create(user=self.user, code_hash=make_password(code))
+        with mock.patch("accounts.two_factor.check_password", wraps=check_password) as checked:
+            self.assertFalse(verify_backup_code(self.user, "LEGACYZZZZ"))
+        self.assertEqual(checked.call_count, 3)
+        self.assertTrue(verify_backup_code(self.user, "legacy-bbbb"))
+
+        generate_backup_codes(self.user)
+        self.assertFalse(
+            User2FABackupCode.objects.filter(user=self.user, lookup_digest__isnull=True).exists()
+        )
+
+    def test_legacy_code_stored_as_typed(self):
+        User2FABackupCode.objects.create(user=self.user, code_hash=make_password("abcde-12345"))
+        with mock.patch("accounts.two_factor.check_password", wraps=check_password) as checked:
+            self.assertTrue(verify_backup_code(self.user, "abcde-12345"))
+        # Normalizado primero, después tal cual se ingresó
+        self.assertEqual(checked.call_count, 2)
+
+    def test_no_legacy_rows_no_extra_query(self):
+        generate_backup_codes(self.user)
+        with mock.patch("accounts.two_factor.check_password", wraps=check_password) as checked:
+            with self.assertNumQueries(1):
+                self.assertFalse(verify_backup_code(self.user, "WRONG-CODE"))
+        checked.assert_not_called()
+
+
+class UserSessionTests(TestCase):
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Dealer",
+            rut="RUT-S",
+            phone="099000000",
+            whatsapp="099000000",
+            email="dealer@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.user = User.objects.create_user(username="s", password="pw", dealer=self.dealer)
+
+    def login(self):
+        self.client.force_login(self.user)
+        return self.client.session.session_key
+
+    def test_session_is_indexed_by_user_and_dealer(self):
+        key = self.login()
+        session = UserSession.objects.get(session_key=key)
+        self.assertEqual((session.user_id, session.dealer_id), (self.user.pk, self.dealer.pk))
+
+    def test_confirm_2fa_revokes_other_sessions(self):
+        first = self.login()
+        self.client.logout()
+        second = self.login()
+
+        self.user.confirm_2fa(keep_session_key=second)
+        self.assertEqual(
+            list(UserSession.objects.values_list("session_key", flat=True)),
+            [second],
+        )
+        self.assertNotEqual(first, second)
+
+    def test_password_change_and_dealer_revocation(self):
+        self.login()
+        self.user.set_password("new-password")
+        self.user.save()
+        self.assertFalse(UserSession.objects.filter(user=self.user).exists())
+
+        self.login()
+        self.assertEqual(revoke_dealer_sessions(self.dealer.pk), 1)
+
+    def test_purge_expired_in_batches(self):
+        store = SessionStore()
+        store.create()
+        UserSession.objects.update(expire_date=timezone.now() - timedelta(days=1))
+        self.assertEqual(purge_expired_sessions(batch_size=1), 1)
+        self.assertFalse(UserSession.objects.exists())
+
+
+class AdminChangelistTests(TestCase):
+    """
+    Los changelists de accounts no hacen una query por fila: los __str__
+    de User / Role / UserRole llegan con sus relaciones en el mismo SELECT.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="root", password="root", email="root@example.com")
+        self.client.force_login(self.admin)
+        # Principal cacheado sin dealer: los pk se reusan entre tests
+        self.addCleanup(cache.clear)
+
+    def add_rows(self, count: int):
+        for _ in range(count):
+            n = Dealer.objects.count()
+            dealer = Dealer.objects.create(
+                name=f"Dealer {n}",
+                rut=f"RUT-ADMIN-{n}",
+                phone="099000000",
+                whatsapp="099000000",
+                email=f"admin{n}@example.com",
+                default_margin_percentage=Decimal("10.00"),
+            )
+            # Sin hashes lentos: solo importa la cantidad de filas
+            user = User.objects.create_user(username=f"user{n}", dealer=dealer)
+            role = Role.objects.create(name="SALES", dealer=dealer)
+            UserRole.objects.create(user=user, role=role)
+            User2FABackupCode.objects.create(user=user, code_hash="!")
+
+    def changelist_queries(self, model) -> int:
+        url = reverse(f"admin:accounts_{model._meta.model_name}_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for model in (User, Role, UserRole, User2FABackupCode):
+            with self.subTest(model=model.__name__):
+                self.add_rows(2)
+                few = self.changelist_queries(model)
+                self.add_rows(8)
+                self.assertEqual(self.changelist_queries(model), few)
+
+    def test_dealer_filter_does_not_list_dealers(self):
+        self.add_rows(3)
+        response = self.client.get(reverse("admin:accounts_role_changelist"))
+        self.assertContains(response, "admin-autocomplete")
+        self.assertNotContains(response, "?dealer__id__exact=")
@@ -0,0 +1,114 @@
+"""
+Códigos de recuperación 2FA.
+
+Cada código se guarda con dos valores:
+- code_hash: hash lento (password hasher de Django), igual que antes.
+- lookup_digest: HMAC-SHA256 (clave derivada de SECRET_KEY) del usuario + código,
+  indexado. Permite encontrar el único candidato con una consulta y correr
+  el hash lento una sola vez por intento.
+
+Los códigos anteriores a lookup_digest (sin digest) se aceptan con un
+recorrido lento sobre esas filas (código normalizado y tal cual se
+ingresó), hasta que el usuario genera un set nuevo: ahí se borran. Los
+usuarios sin esas filas no pagan ni una consulta extra.
+"""
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils.crypto import get_random_string, salted_hmac
+
+from .models import User, User2FABackupCode
+
+BACKUP_CODE_COUNT = 10
+BACKUP_CODE_LENGTH = 10
+# Sin caracteres ambiguos (0/O, 1/I/L)
+BACKUP_CODE_CHARS = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+DIGEST_SALT = "accounts.two_factor.backup_code"
+
+
+def normalize_code(code: str) -> str:
+    return "".join(ch for ch in code.upper() if ch.isalnum())
+
+
+def format_code(code: str) -> str:
+    half = len(code) // 2
+    return f"{code[:half]}-{code[half:]}"
+
+
+def lookup_digest(user_id: int, code: str) -> str:
+    return salted_hmac(
+        DIGEST_SALT,
+        f"{user_id}:{normalize_code(code)}",
+        algorithm="sha256",
+    ).hexdigest()
+
+
+def generate_backup_codes(user: User, count: int = BACKUP_CODE_COUNT) -> list[str]:
+    """
+    Reemplaza los códigos del usuario por un set nuevo (bulk_create).
+    También borra los códigos sin digest, usados o no: el usuario ya migró.
+    Devuelve los códigos en claro: se muestran una única vez.
+    """
+    codes = [
+        get_random_string(BACKUP_CODE_LENGTH, BACKUP_CODE_CHARS)
+        for _ in range(count)
+    ]
+    with transaction.atomic():
+        User2FABackupCode.objects.filter(
+            Q(is_used=False) | Q(lookup_digest__isnull=True),
+            user=user,
+        ).delete()
+        User2FABackupCode.objects.bulk_create([
+            User2FABackupCode(
+                user=user,
+                code_hash=make_password(code),
+                lookup_digest=lookup_digest(user.pk, code),
+            )
+            for code in codes
+        ])
+    return [format_code(code) for code in codes]
+
+
+def verify_backup_code(user: User, code: str) -> bool:
+    """
+    Verifica y consume un código de recuperación.
+    Una consulta + un solo hash lento; el consumo es un UPDATE
+    condicional sobre is_used, así que dos usos concurrentes no pueden ganar ambos.
+    """
+    normalized = normalize_code(code)
+    if not normalized:
+        return False
+
+    # Una sola consulta trae el candidato por digest y, si hay, los códigos sin digest
+    rows = list(
+        User2FABackupCode.objects
+        .filter(
+            Q(lookup_digest=lookup_digest(user.pk, normalized)) | Q(lookup_digest__isnull=True),
+            user=user,
+            is_used=False,
+        )
+        .only("pk", "code_hash", "lookup_digest")
+    )
+    candidate = next((row for row in rows if row.lookup_digest is not None), None)
+    if candidate is None:
+        legacy = [row for row in rows if row.lookup_digest is None]
+        candidate = _find_legacy_code(legacy, code, normalized) if legacy else None
+    elif not check_password(normalized, candidate.code_hash):
+        return False
+
+    if candidate is None:
+        return False
+    return candidate.mark_as_used()
+
+
+def _find_legacy_code(legacy: list, code: str, normalized: str) -> User2FABackupCode | None:
+    """
+    Códigos creados antes de lookup_digest: recorrido lento sobre esas filas.
+    Se hashea el código normalizado y, si difiere, también el ingresado tal
+    cual (algunos se guardaron con el formato con guión).
+    """
+    attempts = [normalized] if code == normalized else [normalized, code]
+    for backup_code in legacy:
+        if any(check_password(attempt, backup_code.code_hash) for attempt in attempts):
+            return backup_code
+    return None
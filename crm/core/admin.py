@@ -1,3 +1,165 @@
+"""
+Admin: mixin de rendimiento para changelists de tablas grandes.
+
+AdminPerformanceMixin
+- list_select_related automático: las FK de list_display (más
+  extra_select_related para lo que usan los __str__ de los relacionados).
+- Filtros por FK con autocompletado (AutocompleteFilter) en lugar de una
+  lista con todas las filas del modelo relacionado.
+- EstimatedCountPaginator: sin filtros, el total sale de las estadísticas
+  de la base en lugar de un COUNT(*) sobre toda la tabla.
+"""
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms import Media
+from django.utils.functional import cached_property
+
+from .models import Job
+
+# Por debajo de esto el COUNT(*) exacto es barato
+ESTIMATE_THRESHOLD = 10_000
+
+
+# =========================
+# Paginador
+# =========================
+
+def estimated_row_count(model, using: str) -> int | None:
+    """
+    Filas de la tabla según las estadísticas del motor, o None si no hay.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # reltuples = -1: tabla nunca analizada
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador del changelist para tablas grandes: sin filtros usa el
+    estimado de la base; con filtros (o tablas chicas) cuenta exacto.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+
+# =========================
+# Filtro con autocompletado
+# =========================
+
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """
+    Filtro por FK que elige el valor con el autocompletado del admin
+    (select2): solo carga la fila seleccionada. El admin del modelo
+    relacionado debe tener search_fields.
+    """
+    template = "admin/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.admin_site = model_admin.admin_site
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def field_choices(self, field, request, model_admin):
+        return []
+
+    def has_output(self):
+        return True
+
+    def widget(self) -> str:
+        formfield = self.field.formfield(
+            widget=AutocompleteSelect(self.field, self.admin_site),
+            required=False,
+        )
+        return formfield.widget.render(self.lookup_kwarg, self.lookup_val or [])
+
+
+# =========================
+# Mixin
+# =========================
+
+class AdminPerformanceMixin:
+    """
+    Mixin para ModelAdmin (ver docstring del módulo).
+    """
+    paginator = EstimatedCountPaginator
+    # "(N en total)" con filtros: otro COUNT(*) sobre la tabla entera
+    show_full_result_count = False
+    # Relaciones que usan los __str__ de las FK de list_display ("user__dealer")
+    extra_select_related: tuple = ()
+
+    def get_list_select_related(self, request):
+        related = [
+            name
+            for name in self.get_list_display(request)
+            if isinstance(name, str) and self._foreign_key(name) is not None
+        ]
+        return (*related, *self.extra_select_related)
+
+    def get_list_filter(self, request):
+        return [
+            (item, AutocompleteFilter) if self._autocomplete_field(item) else item
+            for item in super().get_list_filter(request)
+        ]
+
+    @property
+    def media(self):
+        media = super().media
+        fields = [field for field in map(self._autocomplete_field, self.list_filter) if field]
+        if fields:
+            media += AutocompleteSelect(fields[0], self.admin_site).media
+            media += Media(js=["admin/js/jquery.init.js", "core/admin_autocomplete_filter.js"])
+        return media
+
+    def _foreign_key(self, name: str):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            return field
+        return None
+
+    def _autocomplete_field(self, item):
+        """
+        FK de list_filter que se puede filtrar con autocompletado.
+        """
+        if not isinstance(item, str):
+            return None
+        field = self._foreign_key(item)
+        if field is None or not self.admin_site.is_registered(field.related_model):
+            return None
+        if not self.admin_site.get_model_admin(field.related_model).search_fields:
+            return None
+        return field
+
 
-# Register your models here.
+@admin.register(Job)
+class JobAdmin(AdminPerformanceMixin, admin.ModelAdmin):
+    list_display = ("id", "kind", "dealer", "status", "attempts", "run_at", "locked_by", "created_at")
+    list_filter = ("status", "kind")
+    search_fields = ("kind", "locked_by")
+    readonly_fields = ("locked_by", "locked_at", "started_at", "finished_at", "result", "last_error")
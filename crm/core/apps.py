@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = 'core'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Tareas de la cola (core.jobs) declaradas en <app>/jobs.py
+        autodiscover_modules("jobs")
@@ -0,0 +1,213 @@
+"""
+Caché de fragmentos de template (filas de listados) por tenant.
+
+Cada dealer tiene una versión de datos monótona en la caché; cualquier
+escritura sobre sus vehículos o servicios (o sobre el propio dealer, p. ej.
+el margen) la incrementa al confirmar la transacción. La clave de cada fila
+lleva esa versión, el updated_at de la fila y el idioma activo: un inventario
+sin cambios se vuelve a pintar desde la caché, sin formatear Decimals ni
+resolver {% url %} fila por fila.
+
+Las filas de una página se leen con un solo get_many y las que faltan se
+guardan con un solo set_many. Aciertos / fallos se cuentan por request
+(Server-Timing y log de core.middleware.QueryInstrumentationMiddleware)
+y acumulados en la caché (manage.py fragment_cache_stats).
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+DATA_VERSION_KEY = "fragments:version:dealer:{dealer_id}"
+FRAGMENT_KEY = "fragments:{name}:{dealer_id}:{version}:{language}:{pk}:{stamp}"
+HITS_KEY = "fragments:stats:hits"
+MISSES_KEY = "fragments:stats:misses"
+
+
+def _cache():
+    return caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+
+
+def _timeout() -> int:
+    return getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 300)
+
+
+def _seed() -> int:
+    # Si la caché perdió la versión, se reinicia desde el reloj (ms): queda
+    # por encima de cualquier versión anterior y no revive fragmentos viejos.
+    return time.time_ns() // 1_000_000
+
+
+# =========================
+# Versión de datos por dealer
+# =========================
+
+def data_version(dealer_id: int) -> int:
+    cache = _cache()
+    key = DATA_VERSION_KEY.format(dealer_id=dealer_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), None)
+        version = cache.get(key, 0)
+    return version
+
+
+def _bump(dealer_id: int) -> None:
+    cache = _cache()
+    key = DATA_VERSION_KEY.format(dealer_id=dealer_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _seed(), None)
+
+
+def bump_data_version(dealer_ids, using: str | None = None) -> None:
+    """
+    Incrementa la versión de los dealers al confirmar la transacción: antes
+    del commit otro request podría cachear datos viejos con la versión nueva.
+    """
+    ids = {dealer_id for dealer_id in dealer_ids if dealer_id is not None}
+    if not ids:
+        return
+
+    def bump():
+        for dealer_id in ids:
+            _bump(dealer_id)
+
+    transaction.on_commit(bump, using=using)
+
+
+# =========================
+# Contadores
+# =========================
+
+class FragmentStats:
+    """
+    Aciertos / fallos de la caché de fragmentos en un request.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def server_timing(self) -> str:
+        return f'fragments;desc="{self.hits} hits, {self.misses} misses"'
+
+
+_request_stats: ContextVar[FragmentStats | None] = ContextVar("fragment_stats", default=None)
+
+
+@contextmanager
+def collect_fragment_stats():
+    """
+    Acumula en un FragmentStats lo que se renderice dentro del bloque.
+    """
+    stats = FragmentStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def _incr(cache, key: str, delta: int) -> None:
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def _record(hits: int, misses: int) -> None:
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.hits += hits
+        stats.misses += misses
+    cache = _cache()
+    _incr(cache, HITS_KEY, hits)
+    _incr(cache, MISSES_KEY, misses)
+
+
+def fragment_cache_is_local() -> bool:
+    """
+    La caché es por proceso (LocMem / Dummy): los contadores no se comparten
+    entre workers y otro proceso (manage.py) siempre ve 0 / 0.
+    """
+    return isinstance(_cache(), (LocMemCache, DummyCache))
+
+
+def fragment_cache_stats() -> dict:
+    """
+    Totales acumulados (todos los procesos que comparten la caché).
+    """
+    values = _cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def reset_fragment_cache_stats() -> None:
+    _cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+# =========================
+# Render
+# =========================
+
+def render_fragments(
+    name: str,
+    template_name: str,
+    objects,
+    dealer_id: int,
+    context_name: str = "object",
+) -> list[str]:
+    """
+    HTML de template_name para cada objeto (en orden), desde la caché
+    cuando la fila y la versión del dealer no cambiaron.
+    Los objetos necesitan pk y updated_at. El template se renderiza sin
+    request: no debe depender del usuario ni de context processors.
+    """
+    objects = list(objects)
+    if not objects:
+        return []
+
+    cache = _cache()
+    version = data_version(dealer_id)
+    language = translation.get_language() or ""
+    keys = [
+        FRAGMENT_KEY.format(
+            name=name,
+            dealer_id=dealer_id,
+            version=version,
+            language=language,
+            pk=obj.pk,
+            stamp=obj.updated_at.timestamp() if obj.updated_at else "",
+        )
+        for obj in objects
+    ]
+
+    cached = cache.get_many(keys)
+    rendered = {}
+    for key, obj in zip(keys, objects):
+        if key not in cached:
+            rendered[key] = render_to_string(template_name, {context_name: obj})
+    if rendered:
+        cache.set_many(rendered, _timeout())
+
+    _record(hits=len(keys) - len(rendered), misses=len(rendered))
+    return [mark_safe(cached[key] if key in cached else rendered[key]) for key in keys]
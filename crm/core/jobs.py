@@ -0,0 +1,327 @@
+"""
+Cola de jobs en la base (sin broker externo).
+
+- Registro: cada app declara sus tareas en <app>/jobs.py con @job("nombre");
+  CoreConfig.ready() importa esos módulos.
+- enqueue(): inserta un Job en cola. La tarea recibe el Job (para reportar
+  avance con job.set_progress) y el payload como kwargs.
+- Worker: toma jobs con un UPDATE ... WHERE status = 'queued' (un solo
+  worker gana), respeta JOB_DEALER_CONCURRENCY por dealer (los claims de un
+  mismo dealer se serializan con SELECT ... FOR UPDATE sobre su fila),
+  reintenta con backoff exponencial y manda latidos mientras corre. Los jobs
+  de un worker muerto (sin latido por JOB_LEASE_SECONDS) vuelven a la cola;
+  el cierre solo se aplica si el job sigue tomado por el mismo worker.
+
+manage.py run_workers --processes N
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connection, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from dealers.models import Dealer
+
+from .models import Job
+from .sharding import tenant
+
+logger = logging.getLogger("core.jobs")
+
+CLAIM_CANDIDATES = 20
+
+
+class PermanentJobError(Exception):
+    """
+    Error que no se arregla reintentando (datos inválidos, dependencia
+    faltante): el job pasa directo a FAILED.
+    """
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    func: Callable
+    max_attempts: int
+
+
+_registry: dict[str, JobType] = {}
+
+
+def job(name: str, max_attempts: int = 5):
+    """
+    Registra una tarea: @job("dealers.export").
+    """
+    def decorator(func):
+        if name in _registry and _registry[name].func is not func:
+            raise ValueError(f"Job '{name}' ya registrado.")
+        _registry[name] = JobType(name=name, func=func, max_attempts=max_attempts)
+        return func
+    return decorator
+
+
+def get_job_type(name: str) -> JobType:
+    try:
+        return _registry[name]
+    except KeyError:
+        raise PermanentJobError(f"Job '{name}' no registrado.") from None
+
+
+def enqueue(
+    kind: str,
+    *,
+    dealer_id: int | None = None,
+    created_by_id: int | None = None,
+    run_at=None,
+    **payload,
+) -> Job:
+    """
+    Encola una tarea registrada. El payload debe ser serializable a JSON.
+    """
+    job_type = get_job_type(kind)
+    return Job.objects.create(
+        kind=kind,
+        payload=payload,
+        dealer_id=dealer_id,
+        created_by_id=created_by_id,
+        run_at=run_at or timezone.now(),
+        max_attempts=job_type.max_attempts,
+    )
+
+
+# =========================
+# Configuración
+# =========================
+
+def dealer_concurrency() -> int:
+    return getattr(settings, "JOB_DEALER_CONCURRENCY", 2)
+
+
+def lease_seconds() -> int:
+    return getattr(settings, "JOB_LEASE_SECONDS", 300)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Backoff exponencial: base, 2*base, 4*base... hasta JOB_RETRY_MAX_SECONDS.
+    """
+    base = getattr(settings, "JOB_RETRY_BASE_SECONDS", 30)
+    ceiling = getattr(settings, "JOB_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(ceiling, base * 2 ** max(0, attempts - 1)))
+
+
+# =========================
+# Claim / cierre
+# =========================
+
+def claim_next(worker: str) -> Job | None:
+    """
+    Toma el próximo job vencido. El UPDATE solo gana si el job sigue en
+    cola. Si tiene dealer, el claim bloquea antes la fila del dealer: bajo
+    READ COMMITTED dos workers podrían contar los mismos jobs corriendo y
+    pasarse ambos de JOB_DEALER_CONCURRENCY.
+    """
+    now = timezone.now()
+    limit = dealer_concurrency()
+    using = router.db_for_write(Job)
+    candidates = (
+        Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now)
+        .order_by("run_at", "id")
+        .values_list("pk", "dealer_id")[:CLAIM_CANDIDATES]
+    )
+
+    saturated = set()
+    for pk, dealer_id in candidates:
+        if dealer_id in saturated:
+            continue
+
+        with transaction.atomic(using=using):
+            if dealer_id is not None:
+                # El lock se libera con el commit, ya con el job en RUNNING
+                list(
+                    Dealer._base_manager.using(using)
+                    .select_for_update()
+                    .filter(pk=dealer_id)
+                    .values_list("pk", flat=True)
+                )
+                running = Job.objects.filter(dealer_id=dealer_id, status=Job.Status.RUNNING)
+                if running.count() >= limit:
+                    saturated.add(dealer_id)
+                    continue
+
+            claimed = Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(
+                status=Job.Status.RUNNING,
+                locked_by=worker,
+                locked_at=now,
+                started_at=now,
+                attempts=F("attempts") + 1,
+                updated_at=now,
+            )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _held(job: Job):
+    """
+    El job mientras siga tomado por el worker que lo ejecutó. Si el lease
+    venció y otro worker lo retomó, el cierre del worker viejo no aplica.
+    """
+    return Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by)
+
+
+def mark_succeeded(job: Job, result) -> bool:
+    now = timezone.now()
+    return bool(_held(job).update(
+        status=Job.Status.SUCCEEDED,
+        result=result,
+        finished_at=now,
+        locked_by="",
+        locked_at=None,
+        last_error="",
+        updated_at=now,
+    ))
+
+
+def mark_failed(job: Job, error: str, permanent: bool = False) -> bool:
+    """
+    Reintenta con backoff o, sin intentos restantes, deja el job en FAILED.
+    """
+    now = timezone.now()
+    fields = {"last_error": error, "locked_by": "", "locked_at": None, "updated_at": now}
+    if permanent or job.attempts >= job.max_attempts:
+        fields.update(status=Job.Status.FAILED, finished_at=now)
+    else:
+        fields.update(status=Job.Status.QUEUED, run_at=now + retry_delay(job.attempts))
+    return bool(_held(job).update(**fields))
+
+
+def requeue_stale() -> int:
+    """
+    Devuelve a la cola los jobs sin latido por JOB_LEASE_SECONDS (worker caído).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=lease_seconds()),
+    )
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        finished_at=now,
+        last_error="Worker sin latido (lease vencido).",
+        locked_by="",
+        updated_at=now,
+    )
+    requeued = stale.update(
+        status=Job.Status.QUEUED,
+        run_at=now,
+        locked_by="",
+        locked_at=None,
+        updated_at=now,
+    )
+    return failed + requeued
+
+
+# =========================
+# Worker
+# =========================
+
+class Heartbeat(threading.Thread):
+    """
+    Actualiza locked_at del job en curso cada lease/3 segundos, para que
+    una tarea larga sin set_progress no se tome como abandonada.
+    """
+
+    def __init__(self, job: Job):
+        super().__init__(daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(lease_seconds() / 3):
+                _held(self.job).update(locked_at=timezone.now())
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Worker:
+    """
+    Loop de un proceso worker: toma jobs de a uno y los ejecuta.
+    burst=True vacía la cola y termina (cron, tests).
+    """
+
+    def __init__(self, name: str | None = None, poll: float = 1.0, burst: bool = False):
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll = poll
+        self.burst = burst
+        self.stopping = False
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def run(self) -> int:
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                handlers[signum] = signal.signal(signum, self.stop)
+
+        processed = 0
+        next_sweep = 0.0
+        try:
+            while not self.stopping:
+                # Como entre requests; no dentro de una transacción abierta (tests)
+                if not connection.in_atomic_block:
+                    close_old_connections()
+                if time.monotonic() >= next_sweep:
+                    requeue_stale()
+                    next_sweep = time.monotonic() + lease_seconds() / 3
+
+                job = claim_next(self.name)
+                if job is None:
+                    if self.burst:
+                        break
+                    time.sleep(self.poll)
+                    continue
+
+                self.execute(job)
+                processed += 1
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        return processed
+
+    def execute(self, job: Job) -> None:
+        logger.info("job %s %s: intento %s/%s", job.pk, job.kind, job.attempts, job.max_attempts)
+        heartbeat = Heartbeat(job)
+        heartbeat.start()
+        try:
+            job_type = get_job_type(job.kind)
+            # Ruteo al shard del dealer (core.sharding), como en un request
+            with tenant(job.dealer_id):
+                result = job_type.func(job, **job.payload)
+        except PermanentJobError as exc:
+            logger.warning("job %s %s: error permanente: %s", job.pk, job.kind, exc)
+            closed = mark_failed(job, str(exc), permanent=True)
+        except Exception:
+            logger.exception("job %s %s: falló", job.pk, job.kind)
+            closed = mark_failed(job, traceback.format_exc(limit=10))
+        else:
+            closed = mark_succeeded(job, result)
+        finally:
+            heartbeat.stop()
+        if not closed:
+            logger.warning("job %s %s: lease perdido, otro worker lo retomó", job.pk, job.kind)
@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.perf import run_concurrency_benchmark, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara requests por segundo de un worker WSGI (vistas sync) y uno "
+        "ASGI (vistas async, crm.urls_asgi) en páginas con espera de I/O "
+        "simulada, sobre una base de test descartable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vehicles", type=int, default=200)
+        parser.add_argument("--services", type=int, default=3)
+        parser.add_argument("--requests", type=int, default=150)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=20,
+            help="Espera agregada a cada query, base remota / cargada (default: 20 ms). "
+                 "Sin espera, el costo de CPU por request de ASGI es mayor que el de WSGI",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Archivo JSON de salida")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_concurrency_benchmark(
+                vehicles=options["vehicles"],
+                services=options["services"],
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                latency_ms=options["latency_ms"],
+                seed=options["seed"],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"\n{report['requests']} requests, {report['latency_ms']:g} ms por query, "
+            f"concurrencia ASGI {report['concurrency']}"
+        )
+        for mode in ("wsgi", "asgi"):
+            result = report[mode]
+            self.stdout.write(
+                f"  {mode.upper():<5} {result['requests_per_second']:>8.2f} req/s  "
+                f"mediana {result['median_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+                f"errores {result['errors']}"
+            )
+        self.stdout.write(f"  ASGI / WSGI: x{report['speedup']:.2f}")
+
+        if options["output"]:
+            write_report(report, options["output"])
+            self.stdout.write(self.style.SUCCESS(f"\nReporte guardado en {options['output']}"))
+        else:
+            self.stdout.write(json.dumps(report))
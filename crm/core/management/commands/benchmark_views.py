@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.perf import run_benchmarks, write_report
+
+
+def parse_scale(value: str) -> tuple[int, int, int]:
+    """
+    "DEALERSxVEHICULOSxSERVICIOS", ej: 5x200x5
+    """
+    try:
+        dealers, vehicles, services = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise CommandError(f"Escala inválida '{value}' (formato: 5x200x5)")
+    return dealers, vehicles, services
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (mediana / p95) y cantidad de queries de las vistas "
+        "principales a distintas escalas, sobre una base de test descartable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            nargs="+",
+            default=["2x100x3", "5x1000x5"],
+            help="Escalas DEALERSxVEHICULOSxSERVICIOS",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Archivo JSON de salida")
+
+    def handle(self, *args, **options):
+        scales = [parse_scale(value) for value in options["scales"]]
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_benchmarks(scales, options["repeat"], seed=options["seed"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for scale in report["scales"]:
+            self.stdout.write(
+                f"\n{scale['dealers']} dealers x {scale['vehicles_per_dealer']} vehículos "
+                f"x {scale['services_per_vehicle']} servicios"
+            )
+            for name, result in scale["results"].items():
+                self.stdout.write(
+                    f"  {name:<26} mediana {result['median_ms']:>9.2f} ms  "
+                    f"p95 {result['p95_ms']:>9.2f} ms  queries {result['queries']:>5}"
+                )
+
+        if options["output"]:
+            write_report(report, options["output"])
+            self.stdout.write(self.style.SUCCESS(f"\nReporte guardado en {options['output']}"))
+        else:
+            self.stdout.write(json.dumps(report))
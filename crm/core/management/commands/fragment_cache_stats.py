@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.fragments import fragment_cache_is_local, fragment_cache_stats, reset_fragment_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra los aciertos / fallos acumulados de la caché de fragmentos "
+        "(filas de listados, core.fragments)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Pone los contadores en cero después de mostrarlos",
+        )
+
+    def handle(self, *args, **options):
+        if fragment_cache_is_local():
+            alias = getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")
+            raise CommandError(
+                f"FRAGMENT_CACHE_ALIAS ('{alias}') es una caché por proceso (LocMem): "
+                "los contadores quedan en cada worker y este comando siempre vería 0 / 0. "
+                "Configure una caché compartida (Redis, Memcached, base de datos o archivos)."
+            )
+        stats = fragment_cache_stats()
+        self.stdout.write(
+            f"Aciertos: {stats['hits']}  Fallos: {stats['misses']}  "
+            f"Tasa de aciertos: {stats['hit_rate']:.1%}"
+        )
+        if options["reset"]:
+            reset_fragment_cache_stats()
+            self.stdout.write("Contadores reiniciados.")
@@ -0,0 +1,81 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def run_worker_process(poll: float, burst: bool) -> None:
+    """
+    Entrada de cada proceso (multiprocessing "spawn"): el proceso nuevo
+    configura Django antes de importar modelos.
+    """
+    import django
+
+    django.setup()
+    from core.jobs import Worker
+
+    Worker(poll=poll, burst=burst).run()
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta los jobs en cola (core.jobs) con N procesos worker. "
+        "SIGTERM / Ctrl-C: cada worker termina el job en curso y sale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Cantidad de procesos worker (default: 1)",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=1.0,
+            help="Segundos de espera con la cola vacía (default: 1)",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Procesar lo que haya en cola y salir",
+        )
+
+    def handle(self, *args, **options):
+        processes = options["processes"]
+        if processes < 1:
+            raise CommandError("--processes debe ser >= 1.")
+
+        if processes == 1:
+            from core.jobs import Worker
+
+            processed = Worker(poll=options["poll"], burst=options["burst"]).run()
+            self.stdout.write(f"{processed} jobs procesados.")
+            return
+
+        # Cada proceso abre sus propias conexiones
+        connections.close_all()
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=run_worker_process, args=(options["poll"], options["burst"]))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"{processes} workers iniciados.")
+
+        def forward(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            # Ctrl-C llega a todo el grupo: los workers ya están cerrando
+            for worker in workers:
+                worker.join()
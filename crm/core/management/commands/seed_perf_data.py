@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.perf import flush_perf_data, seed_perf_data
+
+
+class Command(BaseCommand):
+    help = "Genera datos sintéticos multi-tenant (deterministas) para pruebas de performance."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dealers", type=int, default=5)
+        parser.add_argument("--vehicles", type=int, default=200, help="Vehículos por dealer")
+        parser.add_argument("--services", type=int, default=5, help="Servicios por vehículo")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Borrar antes los dealers sintéticos existentes",
+        )
+
+    def handle(self, *args, **options):
+        if options["flush"]:
+            deleted = flush_perf_data()
+            self.stdout.write(f"{deleted} filas sintéticas borradas.")
+
+        totals = seed_perf_data(
+            options["dealers"],
+            options["vehicles"],
+            options["services"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Creados: " + ", ".join(f"{count} {name}" for name, count in totals.items())
+            )
+        )
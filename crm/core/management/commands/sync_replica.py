@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base primaria SQLite sobre la réplica: sustituto local de la "
+        "replicación para probar core.routers con dos archivos SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="Repetir cada N segundos (simula el retraso de la réplica)",
+        )
+
+    def handle(self, *args, **options):
+        alias = getattr(settings, "REPLICA_DATABASE_ALIAS", "replica")
+        if alias not in settings.DATABASES:
+            raise CommandError(f"No hay base '{alias}' en DATABASES.")
+
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        replica = connections[alias].settings_dict
+        if "sqlite3" not in primary["ENGINE"] or "sqlite3" not in replica["ENGINE"]:
+            raise CommandError("sync_replica solo funciona con SQLite.")
+
+        while True:
+            self.sync(str(primary["NAME"]), str(replica["NAME"]))
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
+
+    def sync(self, source_path: str, target_path: str) -> None:
+        connections.close_all()
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(f"Réplica sincronizada desde {source_path}.")
@@ -0,0 +1,251 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.db import connections
+from django.utils.functional import empty
+
+from .fragments import FragmentStats, collect_fragment_stats
+from .routers import routing_state
+from .sharding import ShardMoveInProgress, tenant
+
+logger = logging.getLogger("core.sql")
+
+
+class HybridMiddleware:
+    """
+    Base de los middlewares propios: sirven en WSGI (__call__) y en ASGI
+    (__acall__), para que bajo ASGI Django no tenga que saltar a un hilo
+    en cada middleware ni convertir las vistas async en sync.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class QueryStats:
+    """
+    Collector para connection.execute_wrapper().
+    Solo cuenta y mide: no guarda parámetros ni resultados.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = ""
+        self.seen: dict[str, int] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.slowest:
+                self.slowest = elapsed
+                self.slowest_sql = sql
+            self.seen[sql] = self.seen.get(sql, 0) + 1
+
+    @property
+    def duplicates(self) -> int:
+        """
+        Ejecuciones repetidas de la misma SQL (firma típica de N+1).
+        """
+        return sum(count - 1 for count in self.seen.values() if count > 1)
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.total * 1000:.2f};desc="{self.count} queries", '
+            f'db-slowest;dur={self.slowest * 1000:.2f}, '
+            f'db-dup;desc="{self.duplicates} duplicated"'
+        )
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """
+    Instrumenta las queries de cada request en todas las conexiones:
+    cantidad, tiempo total, query más lenta y SQL duplicadas.
+
+    Publica el resultado en el header Server-Timing y en una línea de log
+    estructurada (logger "core.sql") con la vista y el dealer, junto con
+    los aciertos / fallos de la caché de fragmentos (core.fragments).
+    Las queries de un StreamingHttpResponse ocurren después y no se cuentan.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SQL_INSTRUMENTATION_ENABLED", True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.slow_query_ms = getattr(settings, "SQL_SLOW_QUERY_MS", 100)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        stats = QueryStats()
+        start = time.perf_counter()
+
+        with self.instrument(stats), collect_fragment_stats() as fragments:
+            response = self.get_response(request)
+
+        self.finish(request, response, stats, fragments, start)
+        return response
+
+    async def __acall__(self, request):
+        # En ASGI el ORM corre en el hilo del request (sync_to_async):
+        # los wrappers se instalan en las conexiones de ese hilo
+        stats = QueryStats()
+        start = time.perf_counter()
+
+        stack = await sync_to_async(self.instrument)(stats)
+        try:
+            with collect_fragment_stats() as fragments:
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        self.finish(request, response, stats, fragments, start)
+        return response
+
+    @staticmethod
+    def instrument(stats: QueryStats) -> ExitStack:
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        return stack
+
+    def finish(
+        self, request, response, stats: QueryStats, fragments: FragmentStats, start: float
+    ) -> None:
+        elapsed = time.perf_counter() - start
+        timing = f"{stats.server_timing()}, app;dur={elapsed * 1000:.2f}"
+        if fragments.hits or fragments.misses:
+            timing = f"{timing}, {fragments.server_timing()}"
+        response["Server-Timing"] = timing
+        self.log(request, response, stats, fragments, elapsed)
+
+    def log(
+        self, request, response, stats: QueryStats, fragments: FragmentStats, elapsed: float
+    ) -> None:
+        match = getattr(request, "resolver_match", None)
+        slow = stats.slowest * 1000 >= self.slow_query_ms
+
+        payload = {
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "dealer_id": self.dealer_id(request),
+            "queries": stats.count,
+            "db_ms": round(stats.total * 1000, 2),
+            "slowest_ms": round(stats.slowest * 1000, 2),
+            "duplicates": stats.duplicates,
+            "fragment_hits": fragments.hits,
+            "fragment_misses": fragments.misses,
+            "total_ms": round(elapsed * 1000, 2),
+        }
+        if slow:
+            payload["slowest_sql"] = stats.slowest_sql[:500]
+
+        level = logging.WARNING if slow or stats.duplicates else logging.INFO
+        logger.log(level, json.dumps(payload))
+
+    @staticmethod
+    def dealer_id(request):
+        """
+        Dealer del usuario, solo si ya fue cargado (no dispara queries extra).
+        """
+        user = getattr(request, "user", None)
+        if getattr(user, "_wrapped", None) is empty:
+            return None
+        return getattr(user, "dealer_id", None)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Abre el estado de ruteo primario / réplica de cada request
+    (ver core.routers).
+
+    Fija el request al primario si el método no es seguro o si llega la
+    cookie de un request anterior que escribió; si este request escribe,
+    deja la cookie por REPLICA_PIN_SECONDS. Debe ir antes de
+    SessionMiddleware para ver también el guardado de la sesión.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.cookie_name = getattr(settings, "REPLICA_PIN_COOKIE", "db_pin")
+        self.pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with routing_state(pinned=self.pinned(request)) as state:
+            response = self.get_response(request)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        with routing_state(pinned=self.pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state)
+
+    def pinned(self, request) -> bool:
+        return (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            or self.cookie_name in request.COOKIES
+        )
+
+    def pin(self, response, state):
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class TenantShardMiddleware(HybridMiddleware):
+    """
+    Fija el tenant del request para core.sharding (dealer del principal,
+    resuelto recién si alguna consulta lo necesita).
+    Debe ir después de PrincipalMiddleware.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with tenant(lambda: getattr(request.principal, "dealer_id", None)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # El callable se resuelve dentro del hilo del ORM (sync_to_async)
+        with tenant(lambda: getattr(request.principal, "dealer_id", None)):
+            return await self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, ShardMoveInProgress):
+            response = HttpResponse(
+                "La automotora se está migrando. Intente nuevamente en unos segundos.",
+                status=503,
+            )
+            response["Retry-After"] = "30"
+            return response
+        return None
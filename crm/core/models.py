@@ -1,4 +1,18 @@
 from django.db import models
+from django.utils import timezone
+
+
+class ActiveManager(models.Manager):
+    """
+    Manager "objects" de los modelos con baja lógica: oculta las filas con
+    is_active=False (ver purge_deleted). No es el manager por defecto
+    (Meta.default_manager_name = "all_objects"): validate_unique y las
+    restricciones únicas tienen que ver también las filas dadas de baja.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
 
 class BaseModel(models.Model):
     """
@@ -11,3 +25,91 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+
+
+class Job(BaseModel):
+    """
+    Tarea en segundo plano (core.jobs), encolada en la base.
+    Los workers (manage.py run_workers) la toman con un UPDATE condicional
+    sobre status, así que dos workers nunca ejecutan el mismo job.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "En cola"
+        RUNNING = "running", "En ejecución"
+        SUCCEEDED = "succeeded", "Terminado"
+        FAILED = "failed", "Fallido"
+
+    kind = models.CharField(max_length=100, help_text="Nombre registrado en core.jobs")
+    payload = models.JSONField(default=dict, blank=True)
+    dealer = models.ForeignKey(
+        "dealers.Dealer",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="jobs",
+        help_text="Tenant del job (límite de concurrencia y visibilidad)",
+    )
+    created_by = models.ForeignKey(
+        "accounts.User",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField(help_text="No se ejecuta antes de esta fecha (reintentos)")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="Último latido del worker")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    progress_message = models.CharField(max_length=255, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            # Claim: WHERE status = 'queued' AND run_at <= now ORDER BY run_at, id
+            models.Index(fields=["status", "run_at", "id"], name="job_claim_idx"),
+            # Límite por dealer: COUNT(*) WHERE dealer_id = ? AND status = 'running'
+            models.Index(fields=["dealer", "status"], name="job_dealer_status_idx"),
+            # Vista de estado: WHERE dealer_id = ? ORDER BY created_at DESC
+            models.Index(fields=["dealer", "-created_at"], name="job_dealer_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    @property
+    def progress_percent(self) -> int | None:
+        if not self.progress_total:
+            return None
+        return min(100, self.progress_done * 100 // self.progress_total)
+
+    def set_progress(self, done: int, total: int | None = None, message: str | None = None) -> None:
+        """
+        Reporta avance desde la tarea (un UPDATE, también sirve de latido).
+        """
+        fields = {"progress_done": done, "locked_at": timezone.now()}
+        if total is not None:
+            fields["progress_total"] = total
+        if message is not None:
+            fields["progress_message"] = message[:255]
+        type(self)._base_manager.filter(pk=self.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
@@ -0,0 +1,390 @@
+"""
+Datos sintéticos multi-tenant y benchmark de vistas.
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from accounts.models import Role, User
+from dealers.models import Dealer, Vehicle, VehicleService
+
+PERF_RUT_PREFIX = "PERF-"
+PERF_PASSWORD = "perf-password"
+
+BRANDS = {
+    "Chevrolet": ["Onix", "Cruze", "S10"],
+    "Fiat": ["Uno", "Cronos", "Strada"],
+    "Ford": ["Ka", "Ranger", "Focus"],
+    "Peugeot": ["208", "2008", "Partner"],
+    "Toyota": ["Corolla", "Hilux", "Yaris"],
+    "Volkswagen": ["Gol", "Polo", "Amarok"],
+}
+SERVICES = ["Cambio de aceite", "Chapa y pintura", "Lavado", "Repuesto", "Neumáticos"]
+ROLES = ["OWNER", "ADMIN", "SALES", "ACCOUNTING", "VIEWER"]
+
+
+def seed_perf_data(dealers: int, vehicles: int, services: int, seed: int = 0, batch_size: int = 2000) -> dict:
+    """
+    Genera dealers / usuarios / roles / vehículos / servicios deterministas
+    (misma semilla => mismos datos) usando bulk_create.
+    """
+    rng = random.Random(seed)
+    password = make_password(PERF_PASSWORD)
+    today = date(2026, 1, 1)
+    totals = {"dealers": 0, "users": 0, "vehicles": 0, "services": 0}
+
+    for d in range(dealers):
+        with transaction.atomic():
+            dealer = Dealer.objects.create(
+                name=f"Perf Dealer {seed}-{d}",
+                rut=f"{PERF_RUT_PREFIX}{seed}-{d}",
+                phone="099000000",
+                whatsapp="099000000",
+                email=f"perf{seed}-{d}@example.com",
+                default_margin_percentage=Decimal(rng.randint(8, 25)),
+            )
+            User.objects.create(
+                username=f"perf{seed}-{d}",
+                password=password,
+                dealer=dealer,
+            )
+            Role.objects.bulk_create([Role(name=name, dealer=dealer) for name in ROLES])
+            totals["dealers"] += 1
+            totals["users"] += 1
+
+        for start in range(0, vehicles, batch_size):
+            count = min(batch_size, vehicles - start)
+            batch = []
+            for _ in range(count):
+                brand = rng.choice(list(BRANDS))
+                batch.append(Vehicle(
+                    dealer=dealer,
+                    brand=brand,
+                    model=rng.choice(BRANDS[brand]),
+                    year=rng.randint(2005, 2025),
+                    ownership_type=rng.choice(Vehicle.Ownership.values),
+                    purchase_price=Decimal(rng.randint(3000, 60000)),
+                    currency=rng.choice(Vehicle.Currency.values),
+                ))
+
+            with transaction.atomic():
+                created = Vehicle.objects.bulk_create(batch)
+                service_objs = [
+                    VehicleService(
+                        vehicle=vehicle,
+                        description=rng.choice(SERVICES),
+                        amount=Decimal(rng.randint(500, 200000)) / 100,
+                        payer=rng.choice(VehicleService.Payer.values),
+                        service_date=today - timedelta(days=rng.randint(0, 720)),
+                    )
+                    for vehicle in created
+                    for _ in range(services)
+                ]
+                VehicleService.objects.bulk_create(service_objs, batch_size=batch_size)
+
+            totals["vehicles"] += len(created)
+            totals["services"] += len(service_objs)
+
+    return totals
+
+
+def flush_perf_data() -> int:
+    """
+    Borra los dealers sintéticos (y todo lo que cuelga de ellos).
+    """
+    deleted, _ = Dealer.all_objects.filter(rut__startswith=PERF_RUT_PREFIX).delete()
+    return deleted
+
+
+# =========================
+# BENCHMARK
+# =========================
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    Ejecuta func `repeat` veces: mediana / p95 en ms y cantidad de queries.
+    """
+    func()  # warm-up
+    samples = []
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        queries = len(ctx.captured_queries)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "queries": queries,
+        "repeat": repeat,
+    }
+
+
+def benchmark_targets(user) -> dict:
+    """
+    Casos a medir: vistas (vía test client) y métodos de costeo.
+    """
+    client = Client()
+    client.force_login(user)
+
+    def get(url):
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return run
+
+    page = 50
+
+    def costing_methods():
+        for vehicle in Vehicle.objects.filter(dealer_id=user.dealer_id)[:page]:
+            vehicle.total_services_cost()
+            vehicle.total_cost()
+            vehicle.suggested_sale_price()
+
+    def costing_annotated():
+        for vehicle in Vehicle.objects.filter(dealer_id=user.dealer_id).with_costing()[:page]:
+            vehicle.total_services_cost()
+            vehicle.total_cost()
+            vehicle.suggested_sale_price()
+
+    return {
+        "DashboardView": get(reverse("dashboard")),
+        "DealerListView": get(reverse("dealers:list")),
+        "VehicleListView": get(reverse("dealers:vehicle_list")),
+        "VehicleServiceListView": get(reverse("dealers:vehicle_service_list")),
+        "Vehicle.costing_methods": costing_methods,
+        "Vehicle.with_costing": costing_annotated,
+    }
+
+
+def run_benchmarks(scales: list[tuple[int, int, int]], repeat: int, seed: int = 0) -> dict:
+    """
+    Para cada escala genera datos, mide y revierte (transacción con rollback).
+    """
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "vendor": connection.vendor,
+        "repeat": repeat,
+        "seed": seed,
+        "scales": [],
+    }
+
+    for dealers, vehicles, services in scales:
+        with transaction.atomic():
+            seed_perf_data(dealers, vehicles, services, seed=seed)
+            user = User.objects.filter(username=f"perf{seed}-0").select_related("dealer").get()
+            results = {
+                name: measure(func, repeat)
+                for name, func in benchmark_targets(user).items()
+            }
+            transaction.set_rollback(True)
+
+        report["scales"].append({
+            "dealers": dealers,
+            "vehicles_per_dealer": vehicles,
+            "services_per_vehicle": services,
+            "results": results,
+        })
+
+    return report
+
+
+# =========================
+# CONCURRENCIA: WSGI vs ASGI
+# =========================
+
+CONCURRENCY_VIEWS = ["dashboard", "dealers:vehicle_list", "dealers:vehicle_service_list"]
+
+
+@contextmanager
+def db_latency(seconds: float):
+    """
+    Suma `seconds` de espera a cada query, en todas las conexiones (también
+    las que se abran en otros hilos): simula una base remota o cargada.
+    """
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(wrapper)
+
+    for conn in connections.all(initialized_only=True):
+        conn.execute_wrappers.append(wrapper)
+    connection_created.connect(install, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        for conn in connections.all(initialized_only=True):
+            if wrapper in conn.execute_wrappers:
+                conn.execute_wrappers.remove(wrapper)
+
+
+def _throughput(samples: list[float], elapsed: float, errors: int) -> dict:
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(samples) / elapsed, 2),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+    }
+
+
+def wsgi_throughput(paths: list[str], cookie: str, requests: int) -> dict:
+    """
+    Un worker WSGI sync: atiende los requests de a uno.
+    """
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    samples = []
+    errors = 0
+
+    start = time.perf_counter()
+    for index in range(requests):
+        environ = factory.get(paths[index % len(paths)], HTTP_COOKIE=cookie).environ
+        status = []
+        began = time.perf_counter()
+        response = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+        b"".join(response)
+        response.close()
+        samples.append(time.perf_counter() - began)
+        errors += not status[0].startswith("200")
+    return _throughput(samples, time.perf_counter() - start, errors)
+
+
+async def asgi_get(handler: ASGIHandler, path: str, cookie: str) -> int:
+    """
+    GET directo contra la aplicación ASGI (sin servidor ni sockets).
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    received = False
+    status = 0
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # El cliente nunca se desconecta: Django cancela esta espera al responder
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await handler(scope, receive, send)
+    return status
+
+
+async def asgi_throughput(paths: list[str], cookie: str, requests: int, concurrency: int) -> dict:
+    """
+    Un worker ASGI (un event loop) con hasta `concurrency` requests en vuelo.
+    """
+    handler = ASGIHandler()
+    slots = asyncio.Semaphore(concurrency)
+    samples = []
+    errors = 0
+
+    async def one(path: str):
+        nonlocal errors
+        async with slots:
+            began = time.perf_counter()
+            status = await asgi_get(handler, path, cookie)
+            samples.append(time.perf_counter() - began)
+            errors += status != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(paths[index % len(paths)]) for index in range(requests)))
+    return _throughput(samples, time.perf_counter() - start, errors)
+
+
+def run_concurrency_benchmark(
+    vehicles: int,
+    services: int,
+    requests: int,
+    concurrency: int,
+    latency_ms: float,
+    seed: int = 0,
+) -> dict:
+    """
+    Requests por segundo de un worker WSGI (vistas sync, crm.urls) contra
+    un worker ASGI (vistas async, crm.urls_asgi) sobre las mismas páginas,
+    con `latency_ms` de espera simulada por query.
+    Los datos quedan commiteados: correr sobre una base descartable.
+    """
+    seed_perf_data(1, vehicles, services, seed=seed)
+    user = User.objects.get(username=f"perf{seed}-0")
+    client = Client()
+    client.force_login(user)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+    paths = [reverse(name) for name in CONCURRENCY_VIEWS]
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "vendor": connection.vendor,
+        "vehicles": vehicles,
+        "services_per_vehicle": services,
+        "requests": requests,
+        "concurrency": concurrency,
+        "latency_ms": latency_ms,
+        "paths": paths,
+    }
+
+    # Sin purga de sesiones: solo lecturas durante la medición
+    with override_settings(SESSION_PURGE_PROBABILITY=0):
+        wsgi_throughput(paths, cookie, len(paths))
+        with db_latency(latency_ms / 1000):
+            report["wsgi"] = wsgi_throughput(paths, cookie, requests)
+
+        with override_settings(ROOT_URLCONF="crm.urls_asgi"):
+            asyncio.run(asgi_throughput(paths, cookie, len(paths), 1))
+            with db_latency(latency_ms / 1000):
+                report["asgi"] = asyncio.run(asgi_throughput(paths, cookie, requests, concurrency))
+
+    report["speedup"] = round(
+        report["asgi"]["requests_per_second"] / report["wsgi"]["requests_per_second"], 2
+    )
+    return report
+
+
+def write_report(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
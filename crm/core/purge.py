@@ -0,0 +1,77 @@
+"""
+Borrado físico en lotes de filas dadas de baja (is_active=False).
+
+En lugar del Collector de Django (que carga todo el árbol de objetos en
+memoria y borra en una sola transacción), recorre las relaciones inversas
+del modelo y borra de hojas a raíz, un lote de PKs por transacción:
+
+- CASCADE: se purgan primero los hijos de cada lote.
+- SET_NULL: un UPDATE por lote.
+- DO_NOTHING: se ignora.
+- PROTECT / RESTRICT / otros: error si el lote tiene filas que lo
+  referencian; hay que resolverlas a mano (o purgarlas antes).
+
+No dispara señales pre/post_delete: está pensado para datos ya ocultos
+por la baja lógica (ver manage.py purge_deleted).
+"""
+import time
+
+from django.db import models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class PurgeBlocked(Exception):
+    """
+    Una relación inversa impide el borrado en lotes (PROTECT, RESTRICT, ...).
+    """
+
+
+def purge(queryset, batch_size: int = DEFAULT_BATCH_SIZE, pause: float = 0) -> int:
+    """
+    Borra las filas del queryset en lotes de batch_size, con sus dependientes.
+    pause: segundos de espera entre lotes, para no saturar la base.
+    Devuelve la cantidad de filas del modelo raíz borradas.
+    """
+    using = queryset.db
+    model = queryset.model
+    deleted = 0
+
+    while True:
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+
+        with transaction.atomic(using=using):
+            _purge_dependents(model, pks, using, batch_size)
+            model._base_manager.using(using).filter(pk__in=pks)._raw_delete(using)
+        deleted += len(pks)
+
+        if pause:
+            time.sleep(pause)
+
+
+def _purge_dependents(model, pks: list, using: str, batch_size: int) -> None:
+    for relation in get_candidate_relations_to_delete(model._meta):
+        related_model = relation.related_model
+        field = relation.field
+        on_delete = field.remote_field.on_delete
+        children = related_model._base_manager.using(using).filter(**{f"{field.name}__in": pks})
+
+        if on_delete is models.DO_NOTHING:
+            continue
+        if on_delete is models.SET_NULL:
+            children.update(**{field.name: None})
+            continue
+        if on_delete is not models.CASCADE:
+            if not children.exists():
+                continue
+            raise PurgeBlocked(
+                f"{related_model._meta.label}.{field.name} ({on_delete.__name__}) "
+                f"impide purgar {model._meta.label}."
+            )
+
+        while child_pks := list(children.order_by("pk").values_list("pk", flat=True)[:batch_size]):
+            _purge_dependents(related_model, child_pks, using, batch_size)
+            related_model._base_manager.using(using).filter(pk__in=child_pks)._raw_delete(using)
@@ -0,0 +1,115 @@
+"""
+Ruteo primario / réplica.
+
+- Escrituras: siempre al primario ("default").
+- Lecturas: al primario, salvo dentro de replica_reads() (listados,
+  exportaciones, dashboard), donde van a la réplica si está configurada.
+- Read-your-writes: cuando un request escribe, el resto del request lee del
+  primario y ReplicaRoutingMiddleware deja una cookie que fija al primario
+  los requests siguientes durante REPLICA_PIN_SECONDS (ej.: el redirect
+  después de VehicleCreateView).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = "replica"
+
+
+@dataclass
+class RoutingState:
+    """
+    Estado de ruteo del request (o tarea) en curso.
+    """
+    replica: bool = False
+    pinned: bool = False
+    wrote: bool = False
+
+
+_state: ContextVar[RoutingState | None] = ContextVar("db_routing_state", default=None)
+
+
+def current_state() -> RoutingState | None:
+    return _state.get()
+
+
+@contextmanager
+def routing_state(pinned: bool = False):
+    """
+    Abre un estado de ruteo nuevo (lo usa el middleware, uno por request).
+    """
+    state = RoutingState(pinned=pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Habilita lecturas desde la réplica en el bloque.
+    Fuera de un request abre su propio estado.
+    """
+    state = _state.get()
+    if state is None:
+        with routing_state() as state:
+            state.replica = True
+            yield state
+        return
+
+    previous = state.replica
+    state.replica = True
+    try:
+        yield state
+    finally:
+        state.replica = previous
+
+
+class ReplicaReadMixin:
+    """
+    Vistas de solo lectura (ListView, exportaciones, dashboard) que pueden
+    leer de la réplica.
+    Los querysets que se evalúan después de dispatch() (StreamingHttpResponse)
+    deben fijar el alias con .using(queryset.db) dentro de la vista.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class PrimaryReplicaRouter:
+    """
+    DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"].
+    Sin alias de réplica en DATABASES todo va a "default".
+    """
+
+    def __init__(self, replica: str | None = None):
+        alias = replica or getattr(settings, "REPLICA_DATABASE_ALIAS", REPLICA_ALIAS)
+        self.replica = alias if alias in settings.DATABASES else None
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if self.replica and state is not None and state.replica and not state.pinned:
+            return self.replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario y réplica tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación
+        return db != self.replica
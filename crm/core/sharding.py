@@ -0,0 +1,214 @@
+"""
+Sharding por tenant (Dealer).
+
+- Directorio: la base "default" guarda Dealer (con su shard) y User, que se
+  necesitan antes de conocer el tenant (login, sesión, principal).
+- Shards: los datos del tenant (TENANT_MODELS) viven en el alias indicado por
+  Dealer.shard. Cada shard tiene además una copia espejo del Dealer y de sus
+  usuarios, para que las FKs sigan siendo válidas dentro de esa base.
+- TenantShardRouter elige el shard por la instancia (hints) o por el tenant
+  del request (TenantShardMiddleware). Con un solo shard no consulta nada.
+
+Mover un tenant: manage.py move_dealer_to_shard.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+
+SHARD_MAP_KEY = "shard:dealer:{dealer_id}"
+
+# Modelos cuyos datos viven en el shard del dealer (app_label.model)
+TENANT_MODELS = frozenset({
+    "dealers.vehicle",
+    "dealers.vehicleservice",
+    "dealers.dealerstats",
+    "dealers.settlement",
+    "accounts.role",
+    "accounts.userrole",
+})
+
+
+class ShardMoveInProgress(DatabaseError):
+    """
+    Escritura sobre un tenant que se está moviendo de shard.
+    """
+
+    def __init__(self, dealer_id: int):
+        super().__init__(f"Dealer {dealer_id} se está moviendo de shard.")
+        self.dealer_id = dealer_id
+
+
+def shard_aliases() -> list[str]:
+    return list(getattr(settings, "SHARD_DATABASES", [DEFAULT_DB_ALIAS]))
+
+
+def sharding_enabled() -> bool:
+    return shard_aliases() != [DEFAULT_DB_ALIAS]
+
+
+# =========================
+# Mapa dealer -> shard
+# =========================
+
+def _cache():
+    return caches[getattr(settings, "SHARD_MAP_CACHE_ALIAS", "default")]
+
+
+def shard_map_timeout() -> int:
+    return getattr(settings, "SHARD_MAP_CACHE_TIMEOUT", 30)
+
+
+def shard_for_dealer(dealer_id: int) -> tuple[str, bool]:
+    """
+    (alias, escrituras_bloqueadas) del dealer, cacheado SHARD_MAP_CACHE_TIMEOUT.
+    """
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS, False
+
+    key = SHARD_MAP_KEY.format(dealer_id=dealer_id)
+    entry = _cache().get(key)
+    if entry is None:
+        from dealers.models import Dealer
+
+        entry = (
+            Dealer._base_manager.using(DEFAULT_DB_ALIAS)
+            .filter(pk=dealer_id)
+            .values_list("shard", "shard_locked")
+            .first()
+        ) or (DEFAULT_DB_ALIAS, False)
+        _cache().set(key, tuple(entry), shard_map_timeout())
+    return tuple(entry)
+
+
+def invalidate_shard(dealer_id: int) -> None:
+    _cache().delete(SHARD_MAP_KEY.format(dealer_id=dealer_id))
+
+
+def group_by_shard(dealers) -> dict[str, list]:
+    """
+    Agrupa Dealers (del directorio) por shard, respetando el orden recibido.
+    """
+    groups: dict[str, list] = {}
+    for dealer in dealers:
+        groups.setdefault(dealer.shard or DEFAULT_DB_ALIAS, []).append(dealer)
+    return groups
+
+
+def fan_out(dealers, fetch) -> dict:
+    """
+    Consulta cada shard una vez y combina los resultados.
+    fetch(alias, dealer_ids) devuelve {dealer_id: valor}.
+    """
+    merged: dict = {}
+    for alias, group in group_by_shard(dealers).items():
+        merged.update(fetch(alias, [dealer.pk for dealer in group]))
+    return merged
+
+
+# =========================
+# Espejos en los shards
+# =========================
+
+def copy_rows(model, rows, alias: str) -> None:
+    """
+    Upsert por PK de filas ya cargadas en otro alias (copia entre shards).
+    """
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    model._base_manager.using(alias).bulk_create(
+        [
+            model(**{f.attname: getattr(row, f.attname) for f in model._meta.concrete_fields})
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=[model._meta.pk.name],
+        update_fields=[f.name for f in fields],
+    )
+
+
+def mirror_row(instance, alias: str) -> None:
+    """
+    Copia espejo de un Dealer / User en el shard de su tenant.
+    """
+    copy_rows(type(instance), [instance], alias)
+
+
+# =========================
+# Tenant del request
+# =========================
+
+_tenant: ContextVar = ContextVar("db_tenant", default=None)
+
+
+@contextmanager
+def tenant(dealer_id):
+    """
+    Fija el tenant para el ruteo. Acepta un id o un callable que lo devuelve
+    (se resuelve recién cuando el router lo necesita).
+    """
+    token = _tenant.set(dealer_id)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def current_tenant() -> int | None:
+    value = _tenant.get()
+    if callable(value):
+        value = value()
+        _tenant.set(value)
+    return value
+
+
+def _hint_dealer_id(instance) -> int | None:
+    if instance._meta.label_lower == "dealers.dealer":
+        return instance.pk
+    dealer_id = getattr(instance, "dealer_id", None)
+    if dealer_id is None:
+        # UserRole: el dealer sale del rol o del usuario, si ya están cargados
+        for name in ("role", "user", "vehicle"):
+            related = instance._state.fields_cache.get(name)
+            if related is not None and getattr(related, "dealer_id", None) is not None:
+                return related.dealer_id
+    return dealer_id
+
+
+class TenantShardRouter:
+    """
+    Va antes de PrimaryReplicaRouter en DATABASE_ROUTERS.
+    Para tenants en "default" devuelve None y deja decidir al router de réplica.
+    """
+
+    def _db_for_tenant(self, model, hints, write: bool):
+        if not sharding_enabled() or model._meta.label_lower not in TENANT_MODELS:
+            return None
+
+        instance = hints.get("instance")
+        dealer_id = _hint_dealer_id(instance) if instance is not None else None
+        if dealer_id is None:
+            dealer_id = current_tenant()
+        if dealer_id is None:
+            if instance is not None and instance._state.db:
+                return instance._state.db
+            return None
+
+        alias, locked = shard_for_dealer(dealer_id)
+        if write and locked:
+            raise ShardMoveInProgress(dealer_id)
+        return None if alias == DEFAULT_DB_ALIAS else alias
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_tenant(model, hints, write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_tenant(model, hints, write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Todos los shards llevan el esquema completo (directorio + espejos)
+        return None
@@ -0,0 +1,17 @@
+// Filtros del changelist con autocompletado (core.admin.AutocompleteFilter):
+// al elegir un valor se recarga la lista con el parámetro del filtro.
+'use strict';
+{
+    const $ = django.jQuery;
+
+    $(document).on('change', '.autocomplete-filter select', function() {
+        const container = this.closest('.autocomplete-filter');
+        const base = container.dataset.baseQuery || '?';
+        let query = base;
+        if (this.value) {
+            const separator = base === '?' ? '' : '&';
+            query = `${base}${separator}${encodeURIComponent(container.dataset.lookup)}=${encodeURIComponent(this.value)}`;
+        }
+        window.location.search = query;
+    });
+}
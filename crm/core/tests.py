@@ -1,3 +1,369 @@
-from django.test import TestCase
+import json
+import tempfile
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.http import HttpResponse
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from dealers.models import Dealer, DealerStats, Vehicle
+
+from .jobs import Worker, claim_next, enqueue, job, mark_failed, mark_succeeded, requeue_stale
+from .middleware import QueryInstrumentationMiddleware, ReplicaRoutingMiddleware, TenantShardMiddleware
+from .models import Job
+from .perf import flush_perf_data, seed_perf_data
+from .routers import PrimaryReplicaRouter, current_state, replica_reads, routing_state
+from .sharding import ShardMoveInProgress, TenantShardRouter, shard_aliases, tenant
+
+
+class SeedPerfDataTests(TestCase):
+
+    def snapshot(self):
+        return list(
+            Vehicle.objects.order_by("pk").values_list(
+                "brand", "model", "year", "purchase_price", "services_total", "services_count"
+            )
+        )
+
+    def test_seed_is_deterministic(self):
+        totals = seed_perf_data(dealers=2, vehicles=10, services=3, seed=7)
+        self.assertEqual(totals, {"dealers": 2, "users": 2, "vehicles": 20, "services": 60})
+        first = self.snapshot()
+
+        flush_perf_data()
+        self.assertFalse(Vehicle.objects.exists())
+
+        seed_perf_data(dealers=2, vehicles=10, services=3, seed=7)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_seed_keeps_services_rollup(self):
+        seed_perf_data(dealers=1, vehicles=10, services=4, seed=1)
+        for vehicle in Vehicle.objects.all():
+            self.assertEqual(vehicle.services_total, vehicle.total_services_cost())
+            self.assertEqual(vehicle.services_count, 4)
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        # Sin base "replica" en los tests: se fuerza el alias
+        self.router = PrimaryReplicaRouter()
+        self.router.replica = "replica"
+
+    def test_reads_use_replica_only_when_enabled(self):
+        self.assertEqual(self.router.db_for_read(Vehicle), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Vehicle), "replica")
+        self.assertEqual(self.router.db_for_read(Vehicle), "default")
+
+    def test_write_pins_rest_of_request_to_primary(self):
+        with routing_state() as state, replica_reads():
+            self.assertEqual(self.router.db_for_write(Vehicle), "default")
+            self.assertEqual(self.router.db_for_read(Vehicle), "default")
+        self.assertTrue(state.wrote)
+
+    def test_replica_is_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica", "dealers"))
+        self.assertTrue(self.router.allow_migrate("default", "dealers"))
+
+
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+
+    def run_request(self, request, write: bool = False):
+        seen = {}
+
+        def view(request):
+            if write:
+                PrimaryReplicaRouter().db_for_write(Vehicle)
+            seen["pinned"] = current_state().pinned
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return response, seen["pinned"]
+
+    def test_write_sets_pin_cookie(self):
+        response, pinned = self.run_request(RequestFactory().post("/"), write=True)
+        self.assertTrue(pinned)
+        self.assertEqual(response.cookies["db_pin"]["max-age"], 5)
+
+    def test_pin_cookie_routes_next_request_to_primary(self):
+        factory = RequestFactory()
+        response, pinned = self.run_request(factory.get("/"))
+        self.assertFalse(pinned)
+        self.assertNotIn("db_pin", response.cookies)
+
+        request = factory.get("/")
+        request.COOKIES["db_pin"] = "1"
+        _, pinned = self.run_request(request)
+        self.assertTrue(pinned)
+
+
+class QueryInstrumentationMiddlewareTests(TestCase):
+
+    def run_request(self, queries: int):
+        def view(request):
+            for _ in range(queries):
+                list(Dealer.objects.filter(name="x"))
+            return HttpResponse()
+
+        return QueryInstrumentationMiddleware(view)(RequestFactory().get("/"))
+
+    def test_server_timing_header(self):
+        with self.assertLogs("core.sql", "INFO") as logs:
+            response = self.run_request(queries=1)
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="1 queries", db-slowest;dur=[\d.]+, '
+            r'db-dup;desc="0 duplicated", app;dur=[\d.]+$',
+        )
+        self.assertEqual(logs.records[0].levelname, "INFO")
+
+    def test_duplicated_queries_log_a_warning(self):
+        with self.assertLogs("core.sql", "INFO") as logs:
+            response = self.run_request(queries=3)
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        self.assertIn('db-dup;desc="2 duplicated"', response["Server-Timing"])
+        self.assertEqual(logs.records[0].levelname, "WARNING")
+        self.assertEqual(json.loads(logs.records[0].getMessage())["duplicates"], 2)
+
+
+@override_settings(SHARD_DATABASES=["default", "shard_1"])
+class TenantShardRouterTests(TestCase):
+
+    def setUp(self):
+        # El mapa dealer -> shard se cachea: no debe sobrevivir al rollback del test
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.router = TenantShardRouter()
+        self.dealer = Dealer.objects.create(
+            name="Sharded",
+            rut="RUT-SHARD",
+            phone="099000000",
+            whatsapp="099000000",
+            email="shard@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        Dealer.objects.filter(pk=self.dealer.pk).update(shard="shard_1")
+
+    def test_tenant_models_follow_dealer_shard(self):
+        self.assertIsNone(self.router.db_for_read(Vehicle))
+        with tenant(self.dealer.pk):
+            self.assertEqual(self.router.db_for_read(Vehicle), "shard_1")
+            # El directorio no se shardea
+            self.assertIsNone(self.router.db_for_read(Dealer))
+
+        vehicle = Vehicle(dealer_id=self.dealer.pk)
+        self.assertEqual(self.router.db_for_write(Vehicle, instance=vehicle), "shard_1")
+
+    def test_locked_dealer_rejects_writes(self):
+        Dealer.objects.filter(pk=self.dealer.pk).update(shard_locked=True)
+        with tenant(self.dealer.pk):
+            self.assertEqual(self.router.db_for_read(Vehicle), "shard_1")
+            with self.assertRaises(ShardMoveInProgress):
+                self.router.db_for_write(Vehicle)
+
+        middleware = TenantShardMiddleware(lambda request: None)
+        response = middleware.process_exception(
+            RequestFactory().post("/"), ShardMoveInProgress(self.dealer.pk)
+        )
+        self.assertEqual(response.status_code, 503)
+
+
+@override_settings(ROOT_URLCONF="crm.urls_asgi")
+class AsyncDashboardViewTests(TestCase):
+    """
+    El dashboard async (perfil ASGI) muestra lo mismo que el sync.
+    """
+    # Los totales de plataforma se suman shard por shard
+    databases = set(shard_aliases())
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Async",
+            rut="RUT-ASYNC",
+            phone="099000000",
+            whatsapp="099000000",
+            email="async@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        for year in (2015, 2016):
+            Vehicle.objects.create(
+                dealer=self.dealer, brand="Fiat", model="Uno", year=year, purchase_price=Decimal("100.00"),
+            )
+        DealerStats.for_dealer(self.dealer.pk)
+        self.user = User.objects.create_user(username="async", password="async", dealer=self.dealer)
+        self.staff = User.objects.create_user(username="async-staff", password="async", is_staff=True)
+
+    async def get_stats(self, user):
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    async def test_tenant_dashboard(self):
+        context = await self.get_stats(self.user)
+        self.assertEqual(context["stats"].users_count, 1)
+        self.assertEqual(context["stats"].vehicles_in_stock, 2)
+        self.assertEqual(context["stats"].inventory_cost_usd, Decimal("200.00"))
+
+    def add_empty_dealer(self):
+        # Sin vehículos ni lecturas del dashboard: la fila de stats nace con el alta
+        return Dealer.objects.create(
+            name="Vacío",
+            rut="RUT-EMPTY",
+            phone="099000000",
+            whatsapp="099000000",
+            email="empty@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+
+    async def test_platform_dashboard(self):
+        await sync_to_async(self.add_empty_dealer)()
+        context = await self.get_stats(self.staff)
+        self.assertTrue(context["platform"])
+        # Usuarios de los dealers (el staff de plataforma no tiene dealer)
+        self.assertEqual((context["stats"]["dealers_count"], context["stats"]["users_count"]), (2, 1))
+        self.assertEqual(context["stats"]["vehicles_in_stock"], 2)
+
+    @override_settings(ROOT_URLCONF="crm.urls")
+    def test_sync_platform_dashboard(self):
+        self.add_empty_dealer()
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("dashboard"))
+        stats = response.context["stats"]
+        self.assertEqual((stats["dealers_count"], stats["users_count"]), (2, 1))
+        self.assertContains(response, "Usuarios")
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 302)
+
+
+@job("core.tests.echo", max_attempts=2)
+def echo_job(job, value, fail_times=0):
+    job.set_progress(1, 2, "mitad")
+    if job.attempts <= fail_times:
+        raise RuntimeError("falla a propósito")
+    return {"value": value}
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Jobs",
+            rut="RUT-JOBS",
+            phone="099000000",
+            whatsapp="099000000",
+            email="jobs@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+
+    def run_worker(self) -> int:
+        return Worker(name="test", burst=True).run()
+
+    def test_worker_runs_job_and_reports_progress(self):
+        queued = enqueue("core.tests.echo", dealer_id=self.dealer.pk, value=42)
+        self.assertEqual(self.run_worker(), 1)
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.SUCCEEDED)
+        self.assertEqual(queued.result, {"value": 42})
+        self.assertEqual((queued.progress_done, queued.progress_total), (1, 2))
+        self.assertEqual(queued.attempts, 1)
+
+    def test_retry_with_backoff_then_fail(self):
+        queued = enqueue("core.tests.echo", value=1, fail_times=5)
+        self.run_worker()
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.QUEUED)
+        self.assertIn("falla a propósito", queued.last_error)
+        self.assertGreater(queued.run_at, timezone.now() + timedelta(seconds=20))
+        # Backoff pendiente: el worker no lo toma
+        self.assertEqual(self.run_worker(), 0)
+
+        Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        self.run_worker()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.Status.FAILED, 2))
+
+    def test_unknown_kind_fails_without_retry(self):
+        queued = Job.objects.create(kind="core.tests.missing", run_at=timezone.now())
+        self.run_worker()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.Status.FAILED, 1))
+
+    def test_dealer_concurrency_limit(self):
+        other = Dealer.objects.create(
+            name="Otro", rut="RUT-OTRO", phone="0", whatsapp="0", email="otro@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        jobs = [enqueue("core.tests.echo", dealer_id=self.dealer.pk, value=i) for i in range(3)]
+        Job.objects.filter(pk__in=[jobs[0].pk, jobs[1].pk]).update(status=Job.Status.RUNNING)
+        other_job = enqueue("core.tests.echo", dealer_id=other.pk, value=9)
+
+        with self.settings(JOB_DEALER_CONCURRENCY=2):
+            claimed = claim_next("test")
+            self.assertEqual(claimed.pk, other_job.pk)
+            self.assertIsNone(claim_next("test"))
+
+    def test_stale_worker_cannot_close_reclaimed_job(self):
+        queued = enqueue("core.tests.echo", dealer_id=self.dealer.pk, value=1)
+        first = claim_next("viejo")
+        Job.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        requeue_stale()
+        second = claim_next("nuevo")
+        self.assertEqual((second.pk, second.locked_by), (queued.pk, "nuevo"))
+
+        self.assertFalse(mark_succeeded(first, {"value": "viejo"}))
+        self.assertFalse(mark_failed(first, "error viejo", permanent=True))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.locked_by), (Job.Status.RUNNING, "nuevo"))
+
+        self.assertTrue(mark_succeeded(second, {"value": 1}))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.result), (Job.Status.SUCCEEDED, {"value": 1}))
+
+    def test_requeue_stale(self):
+        queued = enqueue("core.tests.echo", value=1)
+        Job.objects.filter(pk=queued.pk).update(
+            status=Job.Status.RUNNING,
+            attempts=1,
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(requeue_stale(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.QUEUED)
+
+    def test_background_export_and_status_view(self):
+        Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("100.00"),
+        )
+        user = User.objects.create_user(username="jobs", password="jobs", dealer=self.dealer)
+        self.client.force_login(user)
+
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            response = self.client.post(reverse("dealers:vehicle_export") + "?brand=Fi")
+            queued = Job.objects.get()
+            self.assertRedirects(response, reverse("job_detail", args=[queued.pk]))
+            self.assertEqual(queued.payload["params"], {"brand": "Fi"})
+
+            self.run_worker()
+            status = self.client.get(reverse("job_detail", args=[queued.pk]), {"format": "json"}).json()
+            self.assertEqual(status["status"], "succeeded")
+
+            response = self.client.get(reverse("job_file", args=[queued.pk]))
+            content = b"".join(response.streaming_content).decode("utf-8-sig")
+            response.close()
+            self.assertIn("Fiat", content)
+
+        # Jobs de otro tenant no son visibles
+        other = User.objects.create_user(username="nodealer", password="x")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse("job_detail", args=[queued.pk])).status_code, 404)
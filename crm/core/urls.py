@@ -1,6 +1,9 @@
 from django.urls import path
-from .views import DashboardView
+from .views import DashboardView, JobDetailView, JobFileView, JobListView
 
 urlpatterns = [
     path("", DashboardView.as_view(), name="dashboard"),
+    path("jobs/", JobListView.as_view(), name="job_list"),
+    path("jobs/<int:pk>/", JobDetailView.as_view(), name="job_detail"),
+    path("jobs/<int:pk>/file/", JobFileView.as_view(), name="job_file"),
 ]
@@ -1,17 +1,212 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import TemplateView
+from django.db.models import Count, Sum
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse
+from django.views import View
+from django.views.generic import DetailView, ListView, TemplateView
+from django.views.generic.base import ContextMixin
+
+from accounts.principal import get_optional_principal, get_principal
+from dealers.currency import MissingExchangeRate, convert_totals, reporting_currency
+from dealers.models import DealerStats, Vehicle
+
+from .models import Job
+from .routers import ReplicaReadMixin, replica_reads
+from .sharding import shard_aliases, sharding_enabled
+
+PLATFORM_TOTALS = {
+    "vehicles_in_stock": Sum("vehicles_in_stock"),
+    "consignment_count": Sum("consignment_count"),
+    "owned_count": Sum("owned_count"),
+    "inventory_cost_usd": Sum("inventory_cost_usd"),
+    "inventory_cost_uyu": Sum("inventory_cost_uyu"),
+    "users_count": Sum("users_count"),
+    "dealers_count": Count("pk"),
+}
+
+
+def platform_stats_querysets() -> list:
+    """
+    Filas de DealerStats de los dealers activos, una consulta por shard
+    (sin sharding, la base que elija el router).
+    """
+    aliases = shard_aliases() if sharding_enabled() else [None]
+    return [DealerStats.objects.using(alias).filter(dealer__is_active=True) for alias in aliases]
+
+
+def merge_platform_totals(results) -> dict:
+    """
+    Suma los agregados PLATFORM_TOTALS de cada shard.
+    """
+    totals = dict.fromkeys(PLATFORM_TOTALS)
+    for result in results:
+        for key, value in result.items():
+            if value is not None:
+                totals[key] = (totals[key] or 0) + value
+    return totals
+
 
-from accounts.models import User
-from dealers.models import Dealer
+def inventory_value(stats) -> dict | None:
+    """
+    Costo de inventario en REPORTING_CURRENCY a partir de los totales por
+    moneda de DealerStats (fila o agregado), o None si falta la cotización.
+    """
+    fields = {currency: DealerStats.inventory_cost_field(currency) for currency in Vehicle.Currency.values}
+    if isinstance(stats, dict):
+        amounts = {currency: stats.get(field) for currency, field in fields.items()}
+    else:
+        amounts = {currency: getattr(stats, field) for currency, field in fields.items()}
+    currency = reporting_currency()
+    try:
+        return {"currency": currency, "amount": convert_totals(amounts, currency)}
+    except MissingExchangeRate:
+        return None
 
 
-class DashboardView(LoginRequiredMixin, TemplateView):
+class AsyncViewMixin:
+    """
+    Versión async de una vista de solo lectura existente (perfil ASGI,
+    crm.urls_asgi). La subclase hereda de la vista sync y define get async.
+
+    Resuelve usuario y principal sin bloquear el event loop, habilita la
+    réplica y despacha directamente al handler, sin pasar por los dispatch
+    sync de la vista original (LoginRequiredMixin, ReplicaReadMixin).
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
+        await sync_to_async(get_optional_principal)(request)
+        with replica_reads():
+            return await View.dispatch(self, request, *args, **kwargs)
+
+
+class DashboardView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
+    """
+    Dashboard del tenant: se arma desde la fila precalculada de DealerStats
+    (una lectura por PK), sin COUNT(*) sobre las tablas de negocio.
+    """
     template_name = "core/dashboard.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        principal = get_principal(self.request)
 
-        context["dealers_count"] = Dealer.objects.count()
-        context["users_count"] = User.objects.count()
+        if principal.dealer_id is not None:
+            context["stats"] = DealerStats.for_dealer(principal.dealer_id)
+        else:
+            # Usuarios de sistema: totales de la plataforma (una fila por dealer)
+            context["stats"] = merge_platform_totals(
+                queryset.aggregate(**PLATFORM_TOTALS) for queryset in platform_stats_querysets()
+            )
+            context["platform"] = True
 
+        context["inventory_value"] = inventory_value(context["stats"])
         return context
+
+
+class AsyncDashboardView(AsyncViewMixin, DashboardView):
+    """
+    DashboardView con el ORM async. Los paneles independientes se piden
+    con asyncio.gather; las consultas de un request comparten el hilo y la
+    conexión del ORM, así que la ganancia está en que el worker sigue
+    atendiendo otros requests mientras espera a la base.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        principal = get_principal(request)
+        # Contexto base sin los paneles sync de DashboardView.get_context_data
+        context = ContextMixin.get_context_data(self, **kwargs)
+
+        if principal.dealer_id is not None:
+            context["stats"] = await sync_to_async(DealerStats.for_dealer)(principal.dealer_id)
+        else:
+            context["stats"] = merge_platform_totals(await asyncio.gather(
+                *(queryset.aaggregate(**PLATFORM_TOTALS) for queryset in platform_stats_querysets())
+            ))
+            context["platform"] = True
+
+        context["inventory_value"] = await sync_to_async(inventory_value)(context["stats"])
+        return self.render_to_response(context)
+
+
+class SoftDeleteMixin:
+    """
+    DeleteView con baja lógica: marca is_active=False en vez de borrar.
+    El CASCADE real corre fuera del request (manage.py purge_deleted).
+    """
+
+    def form_valid(self, form):
+        success_url = self.get_success_url()
+        self.object.soft_delete()
+        return HttpResponseRedirect(success_url)
+
+
+# =========================
+# JOBS
+# =========================
+
+class JobQuerysetMixin:
+    """
+    Jobs del tenant del usuario (los de sistema, sin dealer, para usuarios
+    sin dealer). Se leen del primario: el estado cambia segundo a segundo.
+    """
+
+    def get_queryset(self):
+        principal = get_principal(self.request)
+        return Job.objects.filter(dealer_id=principal.dealer_id)
+
+
+class JobListView(LoginRequiredMixin, JobQuerysetMixin, ListView):
+    template_name = "core/job_list.html"
+    context_object_name = "jobs"
+
+    def get_queryset(self):
+        return super().get_queryset().defer("payload", "result", "last_error")[:50]
+
+
+class JobDetailView(LoginRequiredMixin, JobQuerysetMixin, DetailView):
+    """
+    Estado y avance de un job. Con ?format=json devuelve solo el estado
+    (para consultar desde JS sin recargar la página).
+    """
+    template_name = "core/job_detail.html"
+    context_object_name = "job"
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get("format") != "json":
+            return super().render_to_response(context, **response_kwargs)
+        job = self.object
+        return JsonResponse({
+            "id": job.pk,
+            "kind": job.kind,
+            "status": job.status,
+            "attempts": job.attempts,
+            "progress_done": job.progress_done,
+            "progress_total": job.progress_total,
+            "progress_percent": job.progress_percent,
+            "progress_message": job.progress_message,
+            "finished": job.is_finished,
+        })
+
+
+class JobFileView(LoginRequiredMixin, JobQuerysetMixin, View):
+    """
+    Descarga el archivo generado por un job terminado (result["file"]).
+    """
+
+    def get(self, request, pk):
+        job = self.get_queryset().filter(pk=pk, status=Job.Status.SUCCEEDED).first()
+        name = (job.result or {}).get("file") if job else None
+        if not name or not default_storage.exists(name):
+            raise Http404
+        return FileResponse(
+            default_storage.open(name, "rb"),
+            as_attachment=True,
+            filename=name.rsplit("/", 1)[-1],
+        )
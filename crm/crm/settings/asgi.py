@@ -0,0 +1,36 @@
+"""
+Perfil de despliegue ASGI (uvicorn) sobre la configuración de producción.
+
+    pip install "uvicorn[standard]" gunicorn
+    DJANGO_SETTINGS_MODULE=crm.settings.asgi \
+        gunicorn crm.asgi:application -k uvicorn.workers.UvicornWorker \
+        --workers 4 --bind 0.0.0.0:8000
+
+o, sin gunicorn:
+
+    DJANGO_SETTINGS_MODULE=crm.settings.asgi uvicorn crm.asgi:application --workers 4
+
+- crm.urls_asgi sirve los listados de vehículos / servicios y el dashboard
+  con vistas async (ORM async); el resto de las vistas siguen siendo sync y
+  Django las ejecuta en un hilo por request.
+- Todos los middlewares son sync + async (core.middleware.HybridMiddleware).
+- Bajo ASGI cada request usa su propio hilo para el ORM: las conexiones
+  persistentes no se reutilizan entre requests. Se desactiva CONN_MAX_AGE y
+  se usa el pool de psycopg (DB_POOL_MAX_SIZE) o un pgbouncer delante.
+
+Comparación con WSGI: manage.py benchmark_concurrency.
+"""
+import os
+
+from .prod import *  # noqa: F403, F401
+from .prod import DATABASES
+
+ROOT_URLCONF = "crm.urls_asgi"
+
+for database in DATABASES.values():
+    database["CONN_MAX_AGE"] = 0
+    if os.environ.get("DB_POOL_MAX_SIZE"):
+        database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ["DB_POOL_MAX_SIZE"]),
+        }
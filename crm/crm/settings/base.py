@@ -49,17 +49,85 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
 
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.PrincipalMiddleware',
+    'core.middleware.TenantShardMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'crm.urls'
 
+# Primario / réplica (core.routers). Sin alias "replica" en DATABASES todo va a default.
+# Sharding por dealer (core.sharding): SHARD_DATABASES lista los alias con datos de tenants.
+DATABASE_ROUTERS = [
+    "core.sharding.TenantShardRouter",
+    "core.routers.PrimaryReplicaRouter",
+]
+SHARD_DATABASES = ["default"]
+SHARD_MAP_CACHE_ALIAS = "default"
+SHARD_MAP_CACHE_TIMEOUT = 30
+REPLICA_DATABASE_ALIAS = "replica"
+REPLICA_PIN_COOKIE = "db_pin"
+REPLICA_PIN_SECONDS = 5
+
+# Sesiones con índice por usuario / dealer (accounts.sessions)
+SESSION_ENGINE = "accounts.sessions"
+SESSION_PURGE_PROBABILITY = 0.01
+
+# Bajas lógicas (is_active=False): días antes de que purge_deleted las borre
+SOFT_DELETE_RETENTION_DAYS = 7
+
+# Cola de jobs en la base (core.jobs, manage.py run_workers)
+JOB_DEALER_CONCURRENCY = 2
+JOB_LEASE_SECONDS = 300
+JOB_RETRY_BASE_SECONDS = 30
+JOB_RETRY_MAX_SECONDS = 3600
+
+# Principal cacheado (accounts.principal). Con LocMemCache la invalidación
+# es por proceso: el timeout acota cuánto puede durar un dato viejo en otro worker.
+PRINCIPAL_CACHE_ALIAS = "default"
+PRINCIPAL_CACHE_TIMEOUT = 60
+
+# Caché de filas de listados por versión de datos del dealer (core.fragments).
+# Con LocMemCache la versión es por proceso, pero la clave de cada fila lleva
+# su updated_at y las escrituras de vehículos lo actualizan (también el
+# recálculo por margen del dealer): otro worker no sirve precios viejos.
+# manage.py fragment_cache_stats necesita una caché compartida (REDIS_URL en prod).
+FRAGMENT_CACHE_ALIAS = "default"
+FRAGMENT_CACHE_TIMEOUT = 300
+
+# Moneda de los totales de inventario (dealers.currency). La serie de
+# cotizaciones se cachea en memoria por proceso; con LocMemCache la versión
+# también es por proceso y el timeout acota cuánto dura una serie vieja.
+REPORTING_CURRENCY = "USD"
+EXCHANGE_RATE_CACHE_ALIAS = "default"
+EXCHANGE_RATE_CACHE_TIMEOUT = 300
+
+# Instrumentación SQL por request (Server-Timing + log "core.sql")
+SQL_INSTRUMENTATION_ENABLED = True
+SQL_SLOW_QUERY_MS = 100
+
+# "core.sql" loguea una línea JSON por request: en INFO todas, en WARNING
+# solo las lentas o con SQL duplicadas (default, también en tests).
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core.sql": {"handlers": ["console"], "level": "WARNING", "propagate": False},
+        "core.jobs": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -124,3 +192,6 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+# Archivos generados por jobs (exportaciones en segundo plano)
+MEDIA_ROOT = BASE_DIR / "media"
@@ -0,0 +1,18 @@
+"""
+Desarrollo con primario + réplica en dos archivos SQLite.
+
+    DJANGO_SETTINGS_MODULE=crm.settings.replica python manage.py migrate
+    DJANGO_SETTINGS_MODULE=crm.settings.replica python manage.py sync_replica --every 2
+
+sync_replica copia el primario sobre la réplica (sustituto local de la
+replicación); con --every se repite, simulando el retraso de una réplica real.
+"""
+from .dev import *  # noqa: F403, F401
+from .dev import BASE_DIR, DATABASES
+
+DATABASES["replica"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": BASE_DIR / "db.replica.sqlite3",
+    # En tests la réplica es la misma base que el primario
+    "TEST": {"MIRROR": "default"},
+}
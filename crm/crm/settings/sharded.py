@@ -0,0 +1,16 @@
+"""
+Desarrollo con dos shards SQLite (core.sharding).
+
+    DJANGO_SETTINGS_MODULE=crm.settings.sharded python manage.py migrate
+    DJANGO_SETTINGS_MODULE=crm.settings.sharded python manage.py migrate --database shard_1
+    DJANGO_SETTINGS_MODULE=crm.settings.sharded python manage.py move_dealer_to_shard <id> shard_1
+"""
+from .dev import *  # noqa: F403, F401
+from .dev import BASE_DIR, DATABASES
+
+DATABASES["shard_1"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": BASE_DIR / "db.shard_1.sqlite3",
+}
+
+SHARD_DATABASES = ["default", "shard_1"]
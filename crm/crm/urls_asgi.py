@@ -0,0 +1,24 @@
+"""
+URLs del perfil ASGI (crm.settings.asgi): mismas rutas y nombres que
+crm.urls, con las versiones async de los listados y del dashboard.
+Las rutas async van primero y toman precedencia sobre las sync.
+"""
+from django.contrib import admin
+from django.urls import include, path
+
+from core.views import AsyncDashboardView
+from dealers import urls as dealers_urls
+from dealers.views import AsyncVehicleListView, AsyncVehicleServiceListView
+
+dealers_patterns = [
+    path("vehicles/", AsyncVehicleListView.as_view(), name="vehicle_list"),
+    path("services/", AsyncVehicleServiceListView.as_view(), name="vehicle_service_list"),
+    *dealers_urls.urlpatterns,
+]
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path("", AsyncDashboardView.as_view(), name="dashboard"),
+    path("", include("core.urls")),
+    path("dealers/", include((dealers_patterns, dealers_urls.app_name))),
+]
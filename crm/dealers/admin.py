@@ -1,15 +1,18 @@
 from django.contrib import admin
-from .models import Dealer, Vehicle, VehicleService
+
+from core.admin import AdminPerformanceMixin
+
+from .models import Dealer, ExchangeRate, Settlement, Vehicle, VehicleService
 
 
 @admin.register(Dealer)
-class DealerAdmin(admin.ModelAdmin):
+class DealerAdmin(AdminPerformanceMixin, admin.ModelAdmin):
     list_display = ("name", "rut", "email", "is_active")
     search_fields = ("name", "rut", "email")
     list_filter = ("is_active",)
 
 @admin.register(Vehicle)
-class VehicleAdmin(admin.ModelAdmin):
+class VehicleAdmin(AdminPerformanceMixin, admin.ModelAdmin):
     list_display = (
         "brand",
         "model",
@@ -19,11 +22,12 @@ class VehicleAdmin(admin.ModelAdmin):
         "purchase_price",
         "currency",
     )
-    list_filter = ("dealer", "ownership_type", "currency")
+    list_filter = ("dealer", "ownership_type", "currency", "is_active")
     search_fields = ("brand", "model")
 
+
 @admin.register(VehicleService)
-class VehicleServiceAdmin(admin.ModelAdmin):
+class VehicleServiceAdmin(AdminPerformanceMixin, admin.ModelAdmin):
     list_display = (
         "vehicle",
         "description",
@@ -31,5 +35,36 @@ class VehicleServiceAdmin(admin.ModelAdmin):
         "payer",
         "service_date",
     )
-    list_filter = ("payer", "service_date")
-    search_fields = ("description",)
\ No newline at end of file
+    list_filter = ("dealer", "payer", "service_date", "is_active")
+    search_fields = ("description",)
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(AdminPerformanceMixin, admin.ModelAdmin):
+    list_display = ("date", "base", "quote", "rate", "source")
+    list_filter = ("base", "quote")
+    date_hierarchy = "date"
+
+
+@admin.register(Settlement)
+class SettlementAdmin(AdminPerformanceMixin, admin.ModelAdmin):
+    list_display = (
+        "vehicle",
+        "dealer",
+        "period",
+        "sequence",
+        "currency",
+        "ownership_type",
+        "owner_paid",
+        "dealer_paid",
+        "created_at",
+    )
+    list_filter = ("dealer", "period", "currency", "ownership_type")
+
+    # Inmutables: se generan con generate_settlements
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
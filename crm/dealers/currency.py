@@ -0,0 +1,171 @@
+"""
+Cotizaciones (ExchangeRate) y conversión a una moneda de reporte.
+
+La tabla es chica (un valor por par y día), así que cada proceso guarda la
+serie completa en memoria y resuelve "la cotización vigente en tal fecha"
+con una búsqueda binaria. La serie se recarga cuando cambia la versión
+compartida (EXCHANGE_RATE_VERSION_KEY, incrementada al escribir cotizaciones)
+o cada EXCHANGE_RATE_CACHE_TIMEOUT segundos.
+
+Las anotaciones convierten dentro del SQL con un CASE por moneda y la
+cotización como literal: sin JOIN a la tabla de cotizaciones (que vive en el
+directorio, no en el shard del tenant) ni consultas por fila.
+"""
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, ExpressionWrapper, Value, When
+from django.utils import timezone
+
+from .models import CENTS, COSTING_FIELD, ExchangeRate, Vehicle
+
+EXCHANGE_RATE_VERSION_KEY = "exchange_rates:version"
+# Decimales de una cotización invertida (UYU -> USD a partir de USD/UYU)
+INVERSE_PRECISION = Decimal("1e-10")
+
+
+class MissingExchangeRate(LookupError):
+    """
+    No hay cotización para el par en (o antes de) la fecha pedida.
+    """
+
+    def __init__(self, from_currency: str, to_currency: str, on: date):
+        super().__init__(f"Sin cotización {from_currency}/{to_currency} al {on}.")
+        self.from_currency = from_currency
+        self.to_currency = to_currency
+        self.on = on
+
+
+def _cache():
+    return caches[getattr(settings, "EXCHANGE_RATE_CACHE_ALIAS", "default")]
+
+
+def _timeout() -> int:
+    return getattr(settings, "EXCHANGE_RATE_CACHE_TIMEOUT", 300)
+
+
+def reporting_currency() -> str:
+    return getattr(settings, "REPORTING_CURRENCY", Vehicle.Currency.USD)
+
+
+# =========================
+# Serie en memoria
+# =========================
+
+@dataclass(frozen=True)
+class RateSeries:
+    """
+    Cotizaciones de un par ordenadas por fecha.
+    """
+    dates: tuple
+    rates: tuple
+
+    def on(self, day: date) -> Decimal | None:
+        """
+        Última cotización con fecha <= day.
+        """
+        index = bisect_right(self.dates, day)
+        return self.rates[index - 1] if index else None
+
+
+# (versión, cargada_en, serie); compartida por los threads del proceso
+_entry: tuple | None = None
+
+
+def load_rate_series() -> dict[tuple[str, str], RateSeries]:
+    """
+    {(base, quote): RateSeries} desde la base, en una consulta.
+    """
+    series: dict = {}
+    rows = ExchangeRate.objects.order_by("base", "quote", "date").values_list("base", "quote", "date", "rate")
+    for base, quote, day, rate in rows:
+        dates, rates = series.setdefault((base, quote), ([], []))
+        dates.append(day)
+        rates.append(rate)
+    return {pair: RateSeries(tuple(dates), tuple(rates)) for pair, (dates, rates) in series.items()}
+
+
+def rate_series() -> dict[tuple[str, str], RateSeries]:
+    global _entry
+    version = _cache().get(EXCHANGE_RATE_VERSION_KEY, 0)
+    entry = _entry
+    if entry is None or entry[0] != version or time.monotonic() - entry[1] > _timeout():
+        entry = _entry = (version, time.monotonic(), load_rate_series())
+    return entry[2]
+
+
+def invalidate_rate_series() -> None:
+    """
+    Fuerza la recarga de la serie en todos los procesos que comparten la caché.
+    """
+    global _entry
+    _entry = None
+    cache = _cache()
+    try:
+        cache.incr(EXCHANGE_RATE_VERSION_KEY)
+    except ValueError:
+        cache.set(EXCHANGE_RATE_VERSION_KEY, 1, None)
+
+
+# =========================
+# Conversión
+# =========================
+
+def exchange_rate(from_currency: str, to_currency: str, on: date | None = None) -> Decimal:
+    """
+    Multiplicador de from_currency a to_currency vigente en on (hoy por
+    defecto). Usa el par directo o, si no hay, la inversa del contrario.
+    """
+    if from_currency == to_currency:
+        return Decimal("1")
+    on = on or timezone.localdate()
+    series = rate_series()
+
+    direct = series.get((from_currency, to_currency))
+    rate = direct.on(on) if direct else None
+    if rate is not None:
+        return rate
+
+    inverse = series.get((to_currency, from_currency))
+    rate = inverse.on(on) if inverse else None
+    if rate is not None:
+        return (Decimal("1") / rate).quantize(INVERSE_PRECISION)
+    raise MissingExchangeRate(from_currency, to_currency, on)
+
+
+def convert(amount, from_currency: str, to_currency: str, on: date | None = None) -> Decimal:
+    return (Decimal(amount or 0) * exchange_rate(from_currency, to_currency, on)).quantize(CENTS)
+
+
+def convert_totals(amounts: dict, to_currency: str, on: date | None = None) -> Decimal:
+    """
+    Suma {moneda: monto} convertida a to_currency (los montos en cero no
+    necesitan cotización).
+    """
+    return sum(
+        (convert(amount, currency, to_currency, on) for currency, amount in amounts.items() if amount),
+        Decimal("0.00"),
+    )
+
+
+def conversion_expression(expression, to_currency: str, on: date | None = None, currency_field: str = "currency"):
+    """
+    expression convertida a to_currency dentro del SQL:
+    CASE currency WHEN 'UYU' THEN expression * <cotización> ... END.
+    """
+    whens = [
+        When(
+            **{currency_field: currency},
+            then=ExpressionWrapper(
+                expression * Value(exchange_rate(currency, to_currency, on)),
+                output_field=COSTING_FIELD,
+            ),
+        )
+        for currency in Vehicle.Currency.values
+    ]
+    return Case(*whens, default=Value(None), output_field=COSTING_FIELD)
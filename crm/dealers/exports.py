@@ -0,0 +1,220 @@
+import csv
+import io
+import tempfile
+from decimal import Decimal
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Value
+from django.http import FileResponse, Http404, StreamingHttpResponse
+
+from .currency import MissingExchangeRate, reporting_currency
+from .forms import SettlementPeriodForm, VehicleFilterForm, VehicleServiceFilterForm
+from .models import COSTING_FIELD, Settlement, Vehicle, VehicleService, to_cents
+
+EXPORT_CHUNK_SIZE = 2000
+
+VEHICLE_EXPORT_COLUMNS = (
+    ("external_ref", "Referencia"),
+    ("brand", "Marca"),
+    ("model", "Modelo"),
+    ("year", "Año"),
+    ("ownership_type", "Tipo"),
+    ("currency", "Moneda"),
+    ("purchase_price", "Compra"),
+    ("costing_services_total", "Servicios"),
+    ("costing_total_cost", "Costo total"),
+    ("costing_suggested_price", "Precio sugerido"),
+    # Convertidos a REPORTING_CURRENCY en el mismo SELECT
+    ("reporting_total_cost", "Costo total (moneda de reporte)"),
+    ("reporting_suggested_price", "Precio sugerido (moneda de reporte)"),
+)
+
+SERVICE_EXPORT_COLUMNS = (
+    ("vehicle__external_ref", "Referencia vehículo"),
+    ("vehicle__brand", "Marca"),
+    ("vehicle__model", "Modelo"),
+    ("vehicle__year", "Año"),
+    ("description", "Descripción"),
+    ("service_date", "Fecha"),
+    ("payer", "Pagado por"),
+    ("amount", "Monto"),
+)
+
+
+SETTLEMENT_EXPORT_COLUMNS = (
+    ("period", "Período"),
+    ("vehicle__external_ref", "Referencia vehículo"),
+    ("vehicle__brand", "Marca"),
+    ("vehicle__model", "Modelo"),
+    ("vehicle__year", "Año"),
+    ("currency", "Moneda"),
+    ("owner_services_count", "Servicios del dueño"),
+    ("owner_paid", "Pagado por el dueño"),
+    ("dealer_services_count", "Servicios de la automotora"),
+    ("dealer_paid", "Pagado por la automotora"),
+    ("sequence", "Versión"),
+    ("created_at", "Generada"),
+)
+
+
+def vehicle_export_queryset(dealer_id: int, params):
+    queryset = VehicleFilterForm(params).filter(
+        Vehicle.objects.filter(dealer_id=dealer_id)
+    ).with_costing()
+    try:
+        queryset = queryset.with_reporting_currency(reporting_currency())
+    except MissingExchangeRate:
+        # Sin cotización vigente las columnas convertidas quedan vacías
+        queryset = queryset.annotate(
+            reporting_total_cost=Value(None, output_field=COSTING_FIELD),
+            reporting_suggested_price=Value(None, output_field=COSTING_FIELD),
+        )
+    return queryset.order_by("-created_at", "-id")
+
+
+def service_export_queryset(dealer_id: int, params):
+    return VehicleServiceFilterForm(params).filter(
+        VehicleService.objects.for_dealer(dealer_id)
+    ).order_by("-service_date", "-id")
+
+
+def settlement_export_queryset(dealer_id: int, params):
+    return Settlement.objects.filter(
+        dealer_id=dealer_id,
+        period=SettlementPeriodForm(params).get_period(),
+    ).current().order_by("vehicle__brand", "vehicle__model", "vehicle_id")
+
+
+# nombre -> (queryset(dealer_id, params), columnas, archivo)
+EXPORTS = {
+    "vehicles": (vehicle_export_queryset, VEHICLE_EXPORT_COLUMNS, "inventario"),
+    "services": (service_export_queryset, SERVICE_EXPORT_COLUMNS, "servicios"),
+    "settlements": (settlement_export_queryset, SETTLEMENT_EXPORT_COLUMNS, "liquidaciones"),
+}
+
+
+class Echo:
+    """
+    Pseudo-buffer para csv.writer: devuelve la línea en lugar de guardarla.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, columns):
+    """
+    Itera filas (tuplas) en bloques, sin cargar el queryset en memoria.
+    """
+    fields = [field for field, _ in columns]
+    for row in queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [_format(value) for value in row]
+
+
+def _format(value):
+    if isinstance(value, (Decimal, float)):
+        return to_cents(value)
+    if value is None:
+        return ""
+    return value
+
+
+def csv_response(queryset, columns, filename: str) -> StreamingHttpResponse:
+    writer = csv.writer(Echo())
+
+    def stream():
+        yield "\ufeff"  # BOM para que Excel detecte UTF-8
+        yield writer.writerow([label for _, label in columns])
+        for row in export_rows(queryset, columns):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def write_xlsx(rows, columns, title: str):
+    """
+    XLSX en modo write-only (openpyxl, opcional) sobre un archivo temporal.
+    Devuelve el archivo, o None si openpyxl no está instalado.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        return None
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append([label for _, label in columns])
+    for row in rows:
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def write_csv(rows, columns):
+    output = tempfile.TemporaryFile()
+    text = io.TextIOWrapper(output, encoding="utf-8", newline="", write_through=True)
+    text.write("\ufeff")
+    writer = csv.writer(text)
+    writer.writerow([label for _, label in columns])
+    writer.writerows(rows)
+    text.detach()
+    output.seek(0)
+    return output
+
+
+def xlsx_response(queryset, columns, filename: str) -> FileResponse:
+    """
+    Las filas se vuelcan a un archivo temporal y se sirven por bloques.
+    """
+    output = write_xlsx(export_rows(queryset, columns), columns, filename)
+    if output is None:
+        raise Http404("Exportación XLSX no disponible (falta openpyxl).")
+
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+def export_response(request, queryset, columns, filename: str):
+    # El CSV se genera después de dispatch(): fijamos ya el alias elegido por el router
+    queryset = queryset.using(queryset.db)
+    if request.GET.get("format") == "xlsx":
+        return xlsx_response(queryset, columns, filename)
+    return csv_response(queryset, columns, filename)
+
+
+def save_export(queryset, columns, filename: str, fmt: str, name: str, progress=None) -> str | None:
+    """
+    Genera la exportación en el storage (jobs en segundo plano).
+    progress(done, total) se llama cada EXPORT_CHUNK_SIZE filas.
+    Devuelve el nombre guardado, o None si el formato no está disponible.
+    """
+    total = queryset.count()
+
+    def rows():
+        for done, row in enumerate(export_rows(queryset, columns), start=1):
+            if progress and done % EXPORT_CHUNK_SIZE == 0:
+                progress(done, total)
+            yield row
+
+    if fmt == "xlsx":
+        output = write_xlsx(rows(), columns, filename)
+    else:
+        output = write_csv(rows(), columns)
+    if output is None:
+        return None
+
+    with output:
+        saved = default_storage.save(f"{name}.{fmt}", File(output))
+    if progress:
+        progress(total, total)
+    return saved
@@ -0,0 +1,183 @@
+from decimal import Decimal, InvalidOperation
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from .models import Vehicle, VehicleService
+from .pricing import MAX_SCENARIOS
+from .settlements import previous_period
+
+
+class VehicleFilterForm(forms.Form):
+    """
+    Filtros del listado de vehículos (GET).
+    """
+    brand = forms.CharField(required=False, label="Marca")
+    year = forms.IntegerField(required=False, label="Año")
+    ownership_type = forms.ChoiceField(
+        required=False,
+        label="Tipo",
+        choices=[("", "Todos")] + list(Vehicle.Ownership.choices),
+    )
+    max_price = forms.DecimalField(
+        required=False,
+        label="Precio sugerido hasta",
+        min_value=0,
+        decimal_places=2,
+    )
+
+    def filter(self, queryset):
+        if not self.is_valid():
+            return queryset
+
+        data = self.cleaned_data
+        if data["max_price"] is not None:
+            queryset = queryset.filter(suggested_price__lte=data["max_price"])
+        if data["brand"]:
+            queryset = queryset.filter(brand__istartswith=data["brand"])
+        if data["year"]:
+            queryset = queryset.filter(year=data["year"])
+        if data["ownership_type"]:
+            queryset = queryset.filter(ownership_type=data["ownership_type"])
+        return queryset
+
+
+class VehicleServiceFilterForm(forms.Form):
+    """
+    Filtros del listado de servicios (GET).
+    """
+    payer = forms.ChoiceField(
+        required=False,
+        label="Pagado por",
+        choices=[("", "Todos")] + list(VehicleService.Payer.choices),
+    )
+    date_from = forms.DateField(
+        required=False,
+        label="Desde",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    date_to = forms.DateField(
+        required=False,
+        label="Hasta",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+
+    def filter(self, queryset):
+        if not self.is_valid():
+            return queryset
+
+        data = self.cleaned_data
+        if data["payer"]:
+            queryset = queryset.filter(payer=data["payer"])
+        if data["date_from"]:
+            queryset = queryset.filter(service_date__gte=data["date_from"])
+        if data["date_to"]:
+            queryset = queryset.filter(service_date__lte=data["date_to"])
+        return queryset
+
+
+class PricingSimulationForm(forms.Form):
+    """
+    Escenarios del simulador de precios (GET): "12, 15, 18".
+    """
+    GROUP_CHOICES = {
+        "brand_year": ("brand", "year"),
+        "brand": ("brand",),
+        "year": ("year",),
+        "none": (),
+    }
+
+    margins = forms.CharField(label="Márgenes (%)", initial="10, 15, 20")
+    group_by = forms.ChoiceField(
+        label="Agrupar por",
+        choices=[
+            ("brand_year", "Marca y año"),
+            ("brand", "Marca"),
+            ("year", "Año"),
+            ("none", "Solo moneda"),
+        ],
+        initial="brand_year",
+    )
+
+    def clean_margins(self) -> list[Decimal]:
+        values = self.cleaned_data["margins"].replace(";", ",").replace(",", " ").split()
+        try:
+            margins = [Decimal(value) for value in values]
+        except InvalidOperation:
+            raise ValidationError("Ingrese números separados por coma.")
+        if not margins or len(margins) > MAX_SCENARIOS:
+            raise ValidationError(f"Entre 1 y {MAX_SCENARIOS} márgenes.")
+        if any(not Decimal("-100") < margin < Decimal("1000") for margin in margins):
+            raise ValidationError("Cada margen debe estar entre -100 y 1000.")
+        if any(margin != margin.quantize(Decimal("0.01")) for margin in margins):
+            raise ValidationError("Cada margen admite hasta 2 decimales.")
+        return margins
+
+    def clean_group_by(self) -> tuple:
+        return self.GROUP_CHOICES[self.cleaned_data["group_by"]]
+
+
+class SettlementPeriodForm(forms.Form):
+    """
+    Período de las liquidaciones (GET / POST): "2026-09". Por defecto el
+    mes anterior.
+    """
+    period = forms.DateField(
+        required=False,
+        label="Período",
+        input_formats=["%Y-%m"],
+        widget=forms.DateInput(attrs={"type": "month"}, format="%Y-%m"),
+    )
+
+    def get_period(self):
+        if self.is_valid() and self.cleaned_data["period"]:
+            return self.cleaned_data["period"].replace(day=1)
+        return previous_period()
+
+
+class VehicleAutocompleteWidget(forms.Widget):
+    """
+    Selector de vehículo con búsqueda (dealers:vehicle_autocomplete) en lugar
+    de un <select> con todo el inventario del dealer.
+    Al renderizar solo carga el vehículo ya elegido, para mostrar su nombre.
+    """
+    template_name = "dealers/widgets/vehicle_autocomplete.html"
+    # ModelChoiceIterator del campo: lo asigna ModelChoiceField
+    choices = None
+
+    class Media:
+        js = ["dealers/vehicle_autocomplete.js"]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["label"] = self.selected_label(value)
+        context["widget"]["url"] = reverse("dealers:vehicle_autocomplete")
+        return context
+
+    def selected_label(self, value) -> str:
+        if value in (None, "") or self.choices is None:
+            return ""
+        try:
+            vehicle = self.choices.queryset.filter(pk=value).first()
+        except (TypeError, ValueError, ValidationError):
+            return ""
+        return self.choices.field.label_from_instance(vehicle) if vehicle else ""
+
+
+class VehicleServiceForm(forms.ModelForm):
+    """
+    Alta / edición de servicios. La vista limita el queryset de vehicle al
+    dealer; al validar solo se busca el pk elegido.
+    """
+
+    class Meta:
+        model = VehicleService
+        fields = [
+            "vehicle",
+            "description",
+            "amount",
+            "payer",
+            "service_date",
+        ]
+        widgets = {"vehicle": VehicleAutocompleteWidget}
@@ -0,0 +1,69 @@
+"""
+Tareas de dealers para la cola de core.jobs.
+Se ejecutan en manage.py run_workers, con el tenant del job ya fijado.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import QueryDict
+
+from core.jobs import PermanentJobError, job
+
+from .exports import EXPORTS, save_export
+
+
+def _command(name: str, *args, **options) -> dict:
+    stdout = StringIO()
+    call_command(name, *args, stdout=stdout, stderr=stdout, **options)
+    return {"output": stdout.getvalue()[-4000:]}
+
+
+@job("dealers.export")
+def export(job, export: str, params: dict, format: str = "csv"):
+    """
+    Exportación de vehículos / servicios a un archivo en el storage.
+    """
+    if export not in EXPORTS:
+        raise PermanentJobError(f"Exportación '{export}' desconocida.")
+
+    build, columns, filename = EXPORTS[export]
+    query = QueryDict(mutable=True)
+    query.update(params)
+    saved = save_export(
+        build(job.dealer_id, query),
+        columns,
+        filename,
+        "xlsx" if format == "xlsx" else "csv",
+        f"exports/{job.dealer_id}/{filename}-{job.pk}",
+        progress=lambda done, total: job.set_progress(done, total),
+    )
+    if saved is None:
+        raise PermanentJobError("Exportación XLSX no disponible (falta openpyxl).")
+    return {"file": saved}
+
+
+# Sin reintentos: un import fallido a mitad de camino se revisa antes de repetirlo
+@job("dealers.import_inventory", max_attempts=1)
+def import_inventory(job, vehicles_csv: str, services_csv: str | None = None, rejects: str | None = None):
+    args = [str(job.dealer_id), vehicles_csv] + ([services_csv] if services_csv else [])
+    return _command("import_inventory", *args, rejects=rejects)
+
+
+@job("dealers.reconcile_vehicle_costs")
+def reconcile_vehicle_costs(job, **options):
+    return _command("reconcile_vehicle_costs", dealer=job.dealer_id, **options)
+
+
+@job("dealers.reconcile_dealer_stats")
+def reconcile_dealer_stats(job, **options):
+    return _command("reconcile_dealer_stats", dealer=job.dealer_id, **options)
+
+
+@job("dealers.generate_settlements")
+def generate_settlements(job, period: str, force: bool = False):
+    return _command("generate_settlements", period=period, dealer=job.dealer_id, force=force)
+
+
+@job("dealers.purge_deleted")
+def purge_deleted(job, **options):
+    return _command("purge_deleted", **options)
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sharding import tenant
+from dealers.models import Dealer
+from dealers.settlements import generate_settlements, previous_period
+
+
+def parse_period(value: str):
+    for fmt in ("%Y-%m", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date().replace(day=1)
+        except ValueError:
+            continue
+    raise CommandError(f"Período '{value}' inválido (AAAA-MM).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera las liquidaciones de los vehículos en consignación de un "
+        "período. Solo se vuelven a liquidar los vehículos cuyos servicios "
+        "cambiaron desde la última liquidación del período."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--period",
+            help="Mes a liquidar, AAAA-MM (default: el mes anterior)",
+        )
+        parser.add_argument(
+            "--dealer",
+            type=int,
+            help="Limitar a un Dealer (id)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Generar una versión nueva aunque los servicios no hayan cambiado",
+        )
+
+    def handle(self, *args, **options):
+        period = parse_period(options["period"]) if options["period"] else previous_period()
+
+        dealers = Dealer.objects.order_by("pk")
+        if options["dealer"]:
+            dealers = dealers.filter(pk=options["dealer"])
+
+        created = unchanged = 0
+        for dealer_id in dealers.values_list("pk", flat=True).iterator():
+            # Ruteo al shard del dealer (core.sharding)
+            with tenant(dealer_id):
+                run = generate_settlements(dealer_id, period, force=options["force"])
+            created += run.created
+            unchanged += run.unchanged
+            if run.created:
+                self.stdout.write(f"Dealer {dealer_id}: {run.created} liquidaciones nuevas, {run.unchanged} sin cambios.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{period:%Y-%m}: {created} liquidaciones generadas, {unchanged} sin cambios."
+            )
+        )
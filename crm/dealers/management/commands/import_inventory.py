@@ -0,0 +1,221 @@
+import csv
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from core.sharding import tenant
+from dealers.models import Dealer, Vehicle, VehicleService
+
+VEHICLE_COLUMNS = (
+    "external_ref",
+    "brand",
+    "model",
+    "year",
+    "ownership_type",
+    "purchase_price",
+    "currency",
+)
+SERVICE_COLUMNS = (
+    "vehicle_ref",
+    "description",
+    "amount",
+    "payer",
+    "service_date",
+)
+
+
+def read_rows(path: str):
+    """
+    Genera (nro_de_línea, fila) leyendo el CSV de a una fila.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            yield reader.line_num, {k.strip(): (v or "").strip() for k, v in row.items() if k}
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa vehículos y servicios de un Dealer desde CSV, "
+        "en lotes con bulk_create y memoria constante."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dealer", help="RUT o id del Dealer")
+        parser.add_argument("vehicles_csv", help=f"Columnas: {', '.join(VEHICLE_COLUMNS)}")
+        parser.add_argument(
+            "services_csv",
+            nargs="?",
+            help=f"Columnas: {', '.join(SERVICE_COLUMNS)}",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Filas por lote / transacción (default: 1000)",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Archivo CSV donde guardar las filas rechazadas",
+        )
+
+    def handle(self, *args, **options):
+        self.dealer = self.get_dealer(options["dealer"])
+        self.batch_size = options["batch_size"]
+        self.rejected = 0
+
+        rejects_file = open(options["rejects"], "w", newline="", encoding="utf-8") if options["rejects"] else None
+        self.rejects_writer = csv.writer(rejects_file) if rejects_file else None
+        if self.rejects_writer:
+            self.rejects_writer.writerow(["file", "line", "error"])
+
+        try:
+            # Ruteo al shard del dealer (core.sharding)
+            with tenant(self.dealer.pk):
+                vehicles = self.import_vehicles(options["vehicles_csv"])
+                services = 0
+                if options["services_csv"]:
+                    services = self.import_services(options["services_csv"])
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{vehicles} vehículos y {services} servicios importados, "
+                f"{self.rejected} filas rechazadas."
+            )
+        )
+
+    def get_dealer(self, value: str) -> Dealer:
+        lookup = Q(rut=value)
+        if value.isdigit():
+            lookup |= Q(pk=int(value))
+        dealer = Dealer.objects.filter(lookup).first()
+        if dealer is None:
+            raise CommandError(f"Dealer '{value}' no encontrado.")
+        return dealer
+
+    def reject(self, path: str, line: int, error) -> None:
+        self.rejected += 1
+        if isinstance(error, ValidationError):
+            error = "; ".join(
+                f"{field}: {' '.join(messages)}"
+                for field, messages in error.message_dict.items()
+            )
+        self.stderr.write(f"{path}:{line}: {error}")
+        if self.rejects_writer:
+            self.rejects_writer.writerow([path, line, error])
+
+    # -------------------------
+    # Vehículos
+    # -------------------------
+
+    def import_vehicles(self, path: str) -> int:
+        created = 0
+        for batch in batched(read_rows(path), self.batch_size):
+            refs = {row.get("external_ref") for _, row in batch if row.get("external_ref")}
+            existing = set(
+                Vehicle.all_objects.filter(dealer=self.dealer, external_ref__in=refs)
+                .values_list("external_ref", flat=True)
+            )
+
+            objs = []
+            for line, row in batch:
+                vehicle = self.build_vehicle(path, line, row, existing)
+                if vehicle is not None:
+                    existing.add(vehicle.external_ref)
+                    objs.append(vehicle)
+
+            with transaction.atomic():
+                Vehicle.objects.bulk_create(objs, batch_size=self.batch_size)
+            created += len(objs)
+        return created
+
+    def build_vehicle(self, path: str, line: int, row: dict, existing: set) -> Vehicle | None:
+        ref = row.get("external_ref")
+        if not ref:
+            self.reject(path, line, "external_ref: requerido")
+            return None
+        if ref in existing:
+            self.reject(path, line, f"external_ref: '{ref}' ya existe")
+            return None
+
+        vehicle = Vehicle(
+            dealer=self.dealer,
+            external_ref=ref,
+            brand=row.get("brand", ""),
+            model=row.get("model", ""),
+            year=row.get("year") or None,
+            ownership_type=row.get("ownership_type") or Vehicle.Ownership.DEALER,
+            purchase_price=row.get("purchase_price") or None,
+            currency=row.get("currency") or Vehicle.Currency.USD,
+        )
+        try:
+            vehicle.full_clean(
+                exclude=["dealer"],
+                validate_unique=False,
+                validate_constraints=False,
+            )
+        except ValidationError as exc:
+            self.reject(path, line, exc)
+            return None
+        return vehicle
+
+    # -------------------------
+    # Servicios
+    # -------------------------
+
+    def import_services(self, path: str) -> int:
+        created = 0
+        for batch in batched(read_rows(path), self.batch_size):
+            refs = {row.get("vehicle_ref") for _, row in batch if row.get("vehicle_ref")}
+            vehicle_ids = dict(
+                Vehicle.all_objects.filter(dealer=self.dealer, external_ref__in=refs)
+                .values_list("external_ref", "pk")
+            )
+
+            objs = []
+            for line, row in batch:
+                service = self.build_service(path, line, row, vehicle_ids)
+                if service is not None:
+                    objs.append(service)
+
+            with transaction.atomic():
+                VehicleService.objects.bulk_create(objs, batch_size=self.batch_size)
+            created += len(objs)
+        return created
+
+    def build_service(self, path: str, line: int, row: dict, vehicle_ids: dict) -> VehicleService | None:
+        vehicle_id = vehicle_ids.get(row.get("vehicle_ref"))
+        if vehicle_id is None:
+            self.reject(path, line, f"vehicle_ref: '{row.get('vehicle_ref', '')}' no encontrado")
+            return None
+
+        service = VehicleService(
+            vehicle_id=vehicle_id,
+            dealer=self.dealer,
+            description=row.get("description", ""),
+            amount=row.get("amount") or None,
+            payer=row.get("payer") or VehicleService.Payer.DEALER,
+            service_date=row.get("service_date") or None,
+        )
+        try:
+            service.full_clean(
+                exclude=["vehicle", "dealer"],
+                validate_unique=False,
+                validate_constraints=False,
+            )
+        except ValidationError as exc:
+            self.reject(path, line, exc)
+            return None
+        return service
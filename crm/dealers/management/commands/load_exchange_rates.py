@@ -0,0 +1,81 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dealers.models import ExchangeRate, Vehicle, invalidate_exchange_rates
+
+from .import_inventory import batched, read_rows
+
+RATE_COLUMNS = ("date", "base", "quote", "rate")
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga cotizaciones desde un CSV local (columnas: date, base, quote, "
+        "rate; 1 base = rate quote). Las existentes para el mismo par y fecha "
+        "se actualizan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help=f"CSV con columnas: {', '.join(RATE_COLUMNS)}")
+        parser.add_argument(
+            "--source",
+            help="Origen de las cotizaciones (default: nombre del archivo)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Filas por lote / transacción (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not Path(path).is_file():
+            raise CommandError(f"Archivo '{path}' no encontrado.")
+        source = (options["source"] or Path(path).name)[:50]
+
+        loaded = rejected = 0
+        for batch in batched(read_rows(path), options["batch_size"]):
+            rates = []
+            for line, row in batch:
+                try:
+                    rates.append(self.build_rate(row, source))
+                except ValueError as exc:
+                    rejected += 1
+                    self.stderr.write(f"{path}:{line}: {exc}")
+
+            with transaction.atomic():
+                ExchangeRate.objects.bulk_create(
+                    rates,
+                    update_conflicts=True,
+                    unique_fields=["base", "quote", "date"],
+                    update_fields=["rate", "source", "updated_at"],
+                )
+                # bulk_create no pasa por ExchangeRate.save()
+                invalidate_exchange_rates()
+            loaded += len(rates)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{loaded} cotizaciones cargadas, {rejected} filas rechazadas.")
+        )
+
+    def build_rate(self, row: dict, source: str) -> ExchangeRate:
+        currencies = set(Vehicle.Currency.values)
+        base, quote = row.get("base", "").upper(), row.get("quote", "").upper()
+        if base not in currencies or quote not in currencies or base == quote:
+            raise ValueError(f"par inválido: '{base}/{quote}'")
+        try:
+            day = date.fromisoformat(row.get("date", ""))
+        except ValueError:
+            raise ValueError(f"date: '{row.get('date', '')}' no es AAAA-MM-DD") from None
+        try:
+            rate = Decimal(row.get("rate", ""))
+        except InvalidOperation:
+            raise ValueError(f"rate: '{row.get('rate', '')}' no es un número") from None
+        if not rate.is_finite() or rate <= 0:
+            raise ValueError(f"rate: '{rate}' debe ser mayor que cero")
+        return ExchangeRate(date=day, base=base, quote=quote, rate=rate, source=source)
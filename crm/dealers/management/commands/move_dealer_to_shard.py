@@ -0,0 +1,227 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import Role, User, UserRole
+from accounts.principal import invalidate_dealer
+from core.purge import purge
+from core.sharding import (
+    copy_rows,
+    invalidate_shard,
+    mirror_row,
+    shard_aliases,
+    shard_map_timeout,
+)
+from dealers.models import Dealer, DealerStats, Settlement, Vehicle, VehicleService, refresh_dealer_stats
+
+# Margen para relojes / transacciones en curso al tomar el corte del delta
+DELTA_MARGIN = timedelta(seconds=5)
+
+
+def tenant_tables(dealer_id: int):
+    """
+    (modelo, filtro) de los datos del tenant, en orden de dependencias.
+    """
+    return [
+        (Role, Q(dealer_id=dealer_id)),
+        (UserRole, Q(role__dealer_id=dealer_id)),
+        (Vehicle, Q(dealer_id=dealer_id)),
+        (VehicleService, Q(dealer_id=dealer_id)),
+        (Settlement, Q(dealer_id=dealer_id)),
+        (DealerStats, Q(dealer_id=dealer_id)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los datos de un Dealer a otro shard: copia en lotes sin cortar "
+        "escrituras, bloquea solo durante el delta final y cambia el mapa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dealer", type=int, help="Id del Dealer")
+        parser.add_argument("shard", help="Alias destino (debe estar en SHARD_DATABASES)")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Filas por lote (default: 1000)",
+        )
+        parser.add_argument(
+            "--settle",
+            type=float,
+            help="Segundos de espera tras bloquear, para que venza el mapa "
+                 "cacheado en todos los procesos (default: SHARD_MAP_CACHE_TIMEOUT)",
+        )
+        parser.add_argument(
+            "--keep-source",
+            action="store_true",
+            help="No borrar los datos del shard de origen",
+        )
+
+    def handle(self, *args, **options):
+        dealer = Dealer._base_manager.using(DEFAULT_DB_ALIAS).filter(pk=options["dealer"]).first()
+        if dealer is None:
+            raise CommandError(f"Dealer {options['dealer']} no encontrado.")
+
+        target = options["shard"]
+        if target not in shard_aliases():
+            raise CommandError(f"'{target}' no está en SHARD_DATABASES.")
+        if target == dealer.shard:
+            raise CommandError(f"Dealer {dealer.pk} ya está en '{target}'.")
+        if dealer.shard_locked:
+            raise CommandError(f"Dealer {dealer.pk} tiene las escrituras bloqueadas (¿otra migración?).")
+
+        self.source = dealer.shard
+        self.target = target
+        self.batch_size = options["batch_size"]
+        settle = options["settle"] if options["settle"] is not None else shard_map_timeout()
+
+        # 1) Espejos del directorio + copia completa, con escrituras habilitadas
+        started = timezone.now() - DELTA_MARGIN
+        self.mirror_directory(dealer)
+        for model, condition in tenant_tables(dealer.pk):
+            copied = self.copy(model, condition)
+            self.stdout.write(f"{model._meta.label}: {copied} filas copiadas.")
+
+        # 2) Bloqueo de escrituras, delta y cambio del mapa
+        self.set_dealer(dealer.pk, shard_locked=True)
+        try:
+            self.stdout.write(f"Escrituras bloqueadas; esperando {settle:g}s.")
+            time.sleep(settle)
+
+            self.mirror_directory(dealer)
+            for model, condition in tenant_tables(dealer.pk):
+                delta = condition & Q(updated_at__gte=started) if _has_updated_at(model) else condition
+                copied = self.copy(model, delta)
+                removed = self.remove_deleted(model, condition)
+                self.stdout.write(f"{model._meta.label}: delta {copied} copiadas, {removed} borradas.")
+
+            with transaction.atomic(using=self.target):
+                refresh_dealer_stats({dealer.pk}, using=self.target)
+            self.set_dealer(dealer.pk, shard=self.target, shard_locked=False)
+        except BaseException:
+            self.set_dealer(dealer.pk, shard_locked=False)
+            raise
+
+        dealer.refresh_from_db(using=DEFAULT_DB_ALIAS)
+        mirror_row(dealer, self.target)
+        invalidate_dealer(dealer.pk)
+        self.stdout.write(self.style.SUCCESS(f"Dealer {dealer.pk} ahora en '{self.target}'."))
+
+        # 3) Limpieza del origen, fuera de la ventana de bloqueo
+        if not options["keep_source"]:
+            self.purge_source(dealer)
+
+    # -------------------------
+    # Pasos
+    # -------------------------
+
+    def set_dealer(self, dealer_id: int, **fields) -> None:
+        Dealer._base_manager.using(DEFAULT_DB_ALIAS).filter(pk=dealer_id).update(**fields)
+        invalidate_shard(dealer_id)
+
+    def mirror_directory(self, dealer: Dealer) -> None:
+        mirror_row(dealer, self.target)
+        users = User._base_manager.using(DEFAULT_DB_ALIAS).filter(dealer_id=dealer.pk)
+        for batch in self.batches(users):
+            copy_rows(User, batch, self.target)
+
+    def batches(self, queryset):
+        """
+        Recorre el queryset por PK (keyset), en lotes.
+        """
+        last_pk = None
+        queryset = queryset.order_by("pk")
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(page[:self.batch_size])
+            if not batch:
+                return
+            last_pk = batch[-1].pk
+            yield batch
+
+    def pk_batches(self, queryset):
+        """
+        Como batches(), pero solo los PKs.
+        """
+        last_pk = None
+        queryset = queryset.order_by("pk").values_list("pk", flat=True)
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            pks = list(page[:self.batch_size])
+            if not pks:
+                return
+            last_pk = pks[-1]
+            yield pks
+
+    def copy(self, model, condition) -> int:
+        copied = 0
+        source = model._base_manager.using(self.source).filter(condition)
+        for batch in self.batches(source):
+            pks = [row.pk for row in batch]
+            # Los PK deben ser únicos entre shards: nunca pisar filas de otro tenant
+            clash = (
+                model._base_manager.using(self.target)
+                .filter(pk__in=pks)
+                .exclude(condition)
+                .values_list("pk", flat=True)[:5]
+            )
+            if clash:
+                raise CommandError(
+                    f"{model._meta.label}: PKs {list(clash)} ya existen en '{self.target}' "
+                    "para otro dealer. Los shards deben usar rangos de PK disjuntos."
+                )
+            with transaction.atomic(using=self.target):
+                copy_rows(model, batch, self.target)
+            copied += len(batch)
+        return copied
+
+    def remove_deleted(self, model, condition) -> int:
+        """
+        Borra del destino las filas que ya no están en el origen. Recorre el
+        destino por PK en lotes y compara cada lote contra el origen: no
+        carga todos los PKs del tenant en memoria.
+        """
+        removed = 0
+        target = model._base_manager.using(self.target).filter(condition)
+        for pks in self.pk_batches(target):
+            alive = set(
+                model._base_manager.using(self.source)
+                .filter(condition, pk__in=pks)
+                .values_list("pk", flat=True)
+            )
+            stale = [pk for pk in pks if pk not in alive]
+            if stale:
+                removed += purge(
+                    model._base_manager.using(self.target).filter(pk__in=stale),
+                    batch_size=self.batch_size,
+                )
+        return removed
+
+    def purge_source(self, dealer: Dealer) -> None:
+        """
+        Borra el tenant del origen con core.purge (lotes, de hojas a raíz),
+        como purge_deleted. En un shard puro también se borran los espejos
+        del directorio (usuarios y dealer).
+        """
+        querysets = [
+            model._base_manager.using(self.source).filter(condition)
+            for model, condition in reversed(tenant_tables(dealer.pk))
+        ]
+        if self.source != DEFAULT_DB_ALIAS:
+            querysets += [
+                User._base_manager.using(self.source).filter(dealer_id=dealer.pk),
+                Dealer._base_manager.using(self.source).filter(pk=dealer.pk),
+            ]
+        for queryset in querysets:
+            deleted = purge(queryset, batch_size=self.batch_size)
+            self.stdout.write(f"{queryset.model._meta.label}: {deleted} filas borradas de '{self.source}'.")
+
+
+def _has_updated_at(model) -> bool:
+    return any(field.name == "updated_at" for field in model._meta.concrete_fields)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from accounts.models import Role, User
+from core.purge import DEFAULT_BATCH_SIZE, purge
+from core.sharding import shard_aliases
+from dealers.models import Dealer, DealerStats, Settlement, Vehicle, VehicleService
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra físicamente, en lotes, las bajas lógicas (is_active=False) "
+        "más viejas que SOFT_DELETE_RETENTION_DAYS: servicios, vehículos y dealers. "
+        "Los vehículos con liquidaciones se conservan hasta que se purga su dealer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Filas por lote / transacción (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            help="Días de retención (default: SOFT_DELETE_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Segundos de pausa entre lotes (default: 0)",
+        )
+
+    def handle(self, *args, **options):
+        retention = options["retention_days"]
+        if retention is None:
+            retention = getattr(settings, "SOFT_DELETE_RETENTION_DAYS", 7)
+        self.cutoff = timezone.now() - timedelta(days=retention)
+        self.batch_size = options["batch_size"]
+        self.pause = options["sleep"]
+
+        # 1) Bajas de servicios y vehículos (dealers activos o no), shard por shard
+        for alias in shard_aliases():
+            for model in (VehicleService, Vehicle):
+                queryset = model.all_objects.using(alias).filter(is_active=False, updated_at__lt=self.cutoff)
+                if model is Vehicle:
+                    # Settlement.vehicle es RESTRICT: las liquidaciones son fotos inmutables
+                    queryset = queryset.exclude(Exists(Settlement.objects.filter(vehicle_id=OuterRef("pk"))))
+                deleted = self.purge(queryset)
+                self.stdout.write(f"{model._meta.label} [{alias}]: {deleted} filas borradas.")
+
+        # 2) Dealers dados de baja: primero los datos del tenant en su shard
+        #    (lotes chicos), después el directorio
+        dealers = Dealer.all_objects.using(DEFAULT_DB_ALIAS).filter(
+            is_active=False,
+            updated_at__lt=self.cutoff,
+        )
+        for dealer in dealers.order_by("pk").iterator():
+            self.purge_dealer(dealer)
+
+        self.stdout.write(self.style.SUCCESS("Purga terminada."))
+
+    def purge(self, queryset) -> int:
+        return purge(queryset, batch_size=self.batch_size, pause=self.pause)
+
+    def purge_dealer(self, dealer: Dealer) -> None:
+        aliases = [dealer.shard] if dealer.shard != DEFAULT_DB_ALIAS else []
+        for alias in aliases + [DEFAULT_DB_ALIAS]:
+            for model in (VehicleService, Settlement, Vehicle, DealerStats, Role):
+                self.purge(model._base_manager.using(alias).filter(dealer_id=dealer.pk))
+            self.purge(User._base_manager.using(alias).filter(dealer_id=dealer.pk))
+            self.purge(Dealer._base_manager.using(alias).filter(pk=dealer.pk))
+        self.stdout.write(f"Dealer {dealer.pk} borrado.")
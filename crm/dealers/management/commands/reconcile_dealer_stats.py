@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dealers.models import (
+    Dealer,
+    DealerStats,
+    current_month,
+    dealer_stats_expressions,
+    refresh_dealer_stats,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Detecta y corrige desvíos entre DealerStats y los datos reales "
+        "(vehículos, servicios y usuarios), procesando los dealers en lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Cantidad de dealers por lote (default: 100)",
+        )
+        parser.add_argument(
+            "--dealer",
+            type=int,
+            help="Limitar a un Dealer (id)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reportar desvíos, sin corregirlos",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        dealers = Dealer.objects.order_by("pk")
+        if options["dealer"]:
+            dealers = dealers.filter(pk=options["dealer"])
+
+        month = current_month()
+        expressions = dealer_stats_expressions(month)
+        fields = list(expressions)
+
+        checked = 0
+        drifted = 0
+        last_pk = 0
+
+        while True:
+            ids = list(dealers.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+
+            last_pk = ids[-1]
+            checked += len(ids)
+
+            stored = {
+                row["dealer_id"]: row
+                for row in DealerStats.objects.filter(dealer_id__in=ids)
+                .annotate(**{f"live_{field}": expr for field, expr in expressions.items()})
+                .values("dealer_id", "services_month", *fields, *(f"live_{f}" for f in fields))
+            }
+            stale = [
+                dealer_id
+                for dealer_id in ids
+                if dealer_id not in stored
+                or stored[dealer_id]["services_month"] != month
+                or any(stored[dealer_id][f] != stored[dealer_id][f"live_{f}"] for f in fields)
+            ]
+            if not stale:
+                continue
+
+            drifted += len(stale)
+            if dry_run:
+                self.stdout.write(f"Dealers con desvío: {stale}")
+                continue
+
+            with transaction.atomic():
+                refresh_dealer_stats(stale)
+
+        action = "detectados" if dry_run else "corregidos"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{checked} dealers revisados, {drifted} desvíos {action}."
+            )
+        )
@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dealers.models import CENTS, Vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        "Detecta y corrige desvíos entre Vehicle.services_total / "
+        "services_count y los servicios reales, procesando en lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de vehículos por lote (default: 1000)",
+        )
+        parser.add_argument(
+            "--dealer",
+            type=int,
+            help="Limitar a un Dealer (id)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reportar desvíos, sin corregirlos",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        vehicles = Vehicle.all_objects.order_by("pk")
+        if options["dealer"]:
+            vehicles = vehicles.filter(dealer_id=options["dealer"])
+
+        checked = 0
+        drifted = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                vehicles.filter(pk__gt=last_pk)
+                .with_live_services_rollup()
+                .values_list(
+                    "pk",
+                    "services_total",
+                    "services_count",
+                    "live_services_total",
+                    "live_services_count",
+                )[:batch_size]
+            )
+            if not batch:
+                break
+
+            last_pk = batch[-1][0]
+            checked += len(batch)
+
+            stale = [
+                pk
+                for pk, total, count, live_total, live_count in batch
+                if _cents(total) != _cents(live_total) or count != live_count
+            ]
+            if not stale:
+                continue
+
+            drifted += len(stale)
+            if dry_run:
+                self.stdout.write(f"Vehículos con desvío: {stale}")
+                continue
+
+            with transaction.atomic():
+                Vehicle.all_objects.filter(pk__in=stale).refresh_services_rollup()
+
+        action = "detectados" if dry_run else "corregidos"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{checked} vehículos revisados, {drifted} desvíos {action}."
+            )
+        )
+
+
+def _cents(value) -> Decimal:
+    return Decimal(value or 0).quantize(CENTS)
@@ -0,0 +1,77 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from core.sharding import tenant
+from dealers.models import Dealer
+from dealers.pricing import GROUP_FIELDS, MAX_SCENARIOS, PricingUnavailable, load_inventory, simulate
+
+
+class Command(BaseCommand):
+    help = (
+        "Valor del inventario de un Dealer con varios márgenes a la vez, "
+        "agrupado por moneda (y marca / año)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dealer", help="RUT o id del Dealer")
+        parser.add_argument(
+            "--margins",
+            nargs="+",
+            type=Decimal,
+            required=True,
+            help=f"Márgenes en porcentaje, hasta {MAX_SCENARIOS} (ej: --margins 12 15 18)",
+        )
+        parser.add_argument(
+            "--group-by",
+            nargs="*",
+            choices=GROUP_FIELDS,
+            default=list(GROUP_FIELDS),
+            help="Campos de agrupación además de la moneda (default: brand year)",
+        )
+
+    def handle(self, *args, **options):
+        dealer = self.get_dealer(options["dealer"])
+        if len(options["margins"]) > MAX_SCENARIOS:
+            raise CommandError(f"Hasta {MAX_SCENARIOS} márgenes.")
+
+        started = time.perf_counter()
+        try:
+            # Ruteo al shard del dealer (core.sharding)
+            with tenant(dealer.pk):
+                inventory = load_inventory(dealer.pk)
+            loaded = time.perf_counter()
+            simulation = simulate(inventory, options["margins"], options["group_by"])
+        except (PricingUnavailable, ValueError) as exc:
+            raise CommandError(str(exc))
+        finished = time.perf_counter()
+
+        header = ["currency", *simulation.group_by, "vehicles", "cost", *(f"{m}%" for m in simulation.margins)]
+        self.stdout.write("\t".join(header))
+        for row in simulation.rows():
+            self.stdout.write("\t".join(map(str, [
+                row["currency"], *row["group"], row["vehicles"], row["cost"], *row["totals"],
+            ])))
+        for row in simulation.currency_totals():
+            self.stdout.write("\t".join(map(str, [
+                f"TOTAL {row['currency']}", *[""] * len(simulation.group_by),
+                row["vehicles"], row["cost"], *row["totals"],
+            ])))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(inventory)} vehículos x {len(simulation.margins)} escenarios: "
+                f"carga {(loaded - started) * 1000:.0f} ms, cálculo {(finished - loaded) * 1000:.0f} ms."
+            )
+        )
+
+    def get_dealer(self, value: str) -> Dealer:
+        lookup = Q(rut=value)
+        if value.isdigit():
+            lookup |= Q(pk=int(value))
+        dealer = Dealer.objects.filter(lookup).first()
+        if dealer is None:
+            raise CommandError(f"Dealer '{value}' no encontrado.")
+        return dealer
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:25
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def backfill_services_rollup(apps, schema_editor):
+    Vehicle = apps.get_model("dealers", "Vehicle")
+    VehicleService = apps.get_model("dealers", "VehicleService")
+    db = schema_editor.connection.alias
+
+    active = VehicleService.objects.using(db).filter(
+        vehicle=OuterRef("pk"),
+        is_active=True,
+    ).order_by().values("vehicle")
+    total = active.filter(payer="DEALER").annotate(total=Sum("amount")).values("total")
+    count = active.annotate(count=Count("pk")).values("count")
+
+    ids = list(Vehicle.objects.using(db).order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        Vehicle.objects.using(db).filter(pk__in=ids[start:start + BATCH_SIZE]).update(
+            services_total=Coalesce(
+                Subquery(total, output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+                Value(Decimal("0.00")),
+            ),
+            services_count=Coalesce(
+                Subquery(count, output_field=models.IntegerField()),
+                Value(0),
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0003_vehicleservice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='services_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Cantidad de servicios activos'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='services_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Total de servicios activos pagados por la automotora', max_digits=14),
+        ),
+        migrations.RunPython(backfill_services_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0004_vehicle_services_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['dealer', '-created_at', '-id'], name='vehicle_dealer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleservice',
+            index=models.Index(fields=['vehicle', 'payer', 'is_active', 'amount'], name='service_vehicle_payer_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0005_tenant_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleservice',
+            name='dealer',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vehicle_services', to='dealers.dealer'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 1000
+
+
+def backfill_service_dealer(apps, schema_editor):
+    Vehicle = apps.get_model("dealers", "Vehicle")
+    VehicleService = apps.get_model("dealers", "VehicleService")
+    db = schema_editor.connection.alias
+
+    vehicle_dealer = Vehicle.objects.using(db).filter(pk=OuterRef("vehicle_id")).values("dealer_id")[:1]
+    pending = VehicleService.objects.using(db).filter(dealer__isnull=True).order_by("pk")
+
+    last_pk = 0
+    while True:
+        ids = list(pending.filter(pk__gt=last_pk).values_list("pk", flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        VehicleService.objects.using(db).filter(pk__in=ids).update(dealer_id=Subquery(vehicle_dealer))
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('dealers', '0006_vehicleservice_dealer'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_service_dealer, migrations.RunPython.noop),
+    ]
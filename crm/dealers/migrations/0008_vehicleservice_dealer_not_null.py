@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0007_backfill_vehicleservice_dealer'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vehicleservice',
+            name='dealer',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='vehicle_services', to='dealers.dealer'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleservice',
+            index=models.Index(fields=['dealer', '-service_date', '-id'], name='service_dealer_date_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0008_vehicleservice_dealer_not_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='external_ref',
+            field=models.CharField(blank=True, help_text='Identificador externo (planillas de importación)', max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='vehicle',
+            constraint=models.UniqueConstraint(fields=('dealer', 'external_ref'), name='vehicle_dealer_external_ref_uniq'),
+        ),
+    ]
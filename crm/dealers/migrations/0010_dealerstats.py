@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0009_vehicle_external_ref'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DealerStats',
+            fields=[
+                ('dealer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='dealers.dealer')),
+                ('vehicles_in_stock', models.PositiveIntegerField(default=0)),
+                ('consignment_count', models.PositiveIntegerField(default=0)),
+                ('owned_count', models.PositiveIntegerField(default=0)),
+                ('inventory_cost_usd', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('inventory_cost_uyu', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('services_month', models.DateField(blank=True, help_text='Mes (primer día) al que corresponde services_month_count', null=True)),
+                ('services_month_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Dealer Stats',
+                'verbose_name_plural': 'Dealer Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0010_dealerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dealer',
+            name='shard',
+            field=models.CharField(default='default', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='dealer',
+            name='shard_locked',
+            field=models.BooleanField(default=False, editable=False, help_text='Escrituras bloqueadas mientras se mueve de shard'),
+        ),
+    ]
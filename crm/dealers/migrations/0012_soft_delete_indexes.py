@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0011_dealer_shard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['updated_at'], name='vehicle_inactive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleservice',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['updated_at'], name='service_inactive_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:29
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Round
+
+BATCH_SIZE = 1000
+PRICE_FIELD = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def backfill_suggested_price(apps, schema_editor):
+    Dealer = apps.get_model("dealers", "Dealer")
+    Vehicle = apps.get_model("dealers", "Vehicle")
+    db = schema_editor.connection.alias
+
+    margin = Dealer.objects.using(db).filter(pk=OuterRef("dealer_id")).values("default_margin_percentage")[:1]
+    zero = Value(Decimal("0.00"), output_field=PRICE_FIELD)
+    cost = Coalesce(F("purchase_price"), zero) + Coalesce(F("services_total"), zero)
+    factor = Value(Decimal("1")) + Coalesce(F("price_margin_percentage"), zero) * Value(Decimal("0.01"))
+
+    ids = list(Vehicle.objects.using(db).order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = Vehicle.objects.using(db).filter(pk__in=ids[start:start + BATCH_SIZE])
+        batch.update(price_margin_percentage=Subquery(margin))
+        batch.update(suggested_price=Round(ExpressionWrapper(cost * factor, output_field=PRICE_FIELD), 2))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0012_soft_delete_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='price_margin_percentage',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='Margen con el que se calculó el precio sugerido', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='price_override',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Precio fijado a mano; el recálculo por margen no lo toca', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='suggested_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='(Compra + servicios) * (1 + margen), o el precio fijado a mano', max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['dealer', 'suggested_price', 'id'], name='vehicle_dealer_price_idx'),
+        ),
+        migrations.RunPython(backfill_suggested_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0013_vehicle_suggested_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('base', models.CharField(choices=[('UYU', 'Pesos Uruguayos'), ('USD', 'Dólares')], max_length=3)),
+                ('quote', models.CharField(choices=[('UYU', 'Pesos Uruguayos'), ('USD', 'Dólares')], max_length=3)),
+                ('rate', models.DecimalField(decimal_places=6, max_digits=18)),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Exchange rate',
+                'verbose_name_plural': 'Exchange rates',
+                'ordering': ['base', 'quote', '-date'],
+                'constraints': [models.UniqueConstraint(fields=('base', 'quote', 'date'), name='exchange_rate_pair_date_uniq'), models.CheckConstraint(condition=models.Q(('rate__gt', 0)), name='exchange_rate_positive')],
+            },
+        ),
+    ]
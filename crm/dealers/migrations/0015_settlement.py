@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0014_exchange_rate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Settlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='Primer día del mes liquidado')),
+                ('sequence', models.PositiveIntegerField(default=1, help_text='1 = primera liquidación del período; las siguientes la corrigen')),
+                ('currency', models.CharField(choices=[('UYU', 'Pesos Uruguayos'), ('USD', 'Dólares')], max_length=3)),
+                ('owner_paid', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('dealer_paid', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('owner_services_count', models.PositiveIntegerField(default=0)),
+                ('dealer_services_count', models.PositiveIntegerField(default=0)),
+                ('services_rows', models.PositiveIntegerField(default=0, help_text='Filas de servicios (incluidas bajas) hasta el fin del período')),
+                ('services_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dealer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='settlements', to='dealers.dealer')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='settlements', to='dealers.vehicle')),
+            ],
+            options={
+                'verbose_name': 'Settlement',
+                'verbose_name_plural': 'Settlements',
+                'ordering': ['-period', 'vehicle', '-sequence'],
+                'indexes': [models.Index(fields=['dealer', 'period', 'vehicle', '-sequence'], name='settlement_dealer_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vehicle', 'period', 'sequence'), name='settlement_vehicle_period_seq_uniq')],
+            },
+        ),
+    ]
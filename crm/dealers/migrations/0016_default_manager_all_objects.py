@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:05
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0015_settlement'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dealer',
+            options={'default_manager_name': 'all_objects', 'verbose_name': 'Dealer', 'verbose_name_plural': 'Dealers'},
+        ),
+        migrations.AlterModelOptions(
+            name='vehicle',
+            options={'default_manager_name': 'all_objects', 'ordering': ['-created_at'], 'verbose_name': 'Vehicle', 'verbose_name_plural': 'Vehicles'},
+        ),
+        migrations.AlterModelOptions(
+            name='vehicleservice',
+            options={'default_manager_name': 'all_objects', 'ordering': ['-service_date'], 'verbose_name': 'Vehicle Service', 'verbose_name_plural': 'Vehicle Services'},
+        ),
+        migrations.AlterModelManagers(
+            name='dealer',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='vehicle',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='vehicleservice',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
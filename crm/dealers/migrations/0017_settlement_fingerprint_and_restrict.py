@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealers', '0016_default_manager_all_objects'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settlement',
+            name='ownership_type',
+            field=models.CharField(choices=[('DEALER', 'Propio de la automotora'), ('CONSIGNMENT', 'En consignación')], default='CONSIGNMENT', help_text='Tipo del vehículo al liquidar; distinto de consignación = anulada', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='settlement',
+            name='vehicle',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='settlements', to='dealers.vehicle'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_users_count(apps, schema_editor):
+    """
+    Crea la fila de stats de los dealers que no la tenían (el dashboard de
+    plataforma cuenta dealers sobre DealerStats) y calcula users_count.
+    Los demás contadores de las filas nuevas los completa
+    reconcile_dealer_stats (services_month queda vacío hasta entonces).
+    """
+    Dealer = apps.get_model("dealers", "Dealer")
+    DealerStats = apps.get_model("dealers", "DealerStats")
+    User = apps.get_model("accounts", "User")
+    db = schema_editor.connection.alias
+
+    existing = DealerStats.objects.using(db).values("dealer_id")
+    DealerStats.objects.using(db).bulk_create(
+        [
+            DealerStats(dealer_id=dealer_id)
+            for dealer_id in Dealer._default_manager.using(db).exclude(pk__in=existing).values_list("pk", flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+
+    users = User.objects.using(db).filter(dealer=OuterRef("dealer_id")).order_by().values("dealer")
+    DealerStats.objects.using(db).update(
+        users_count=Coalesce(
+            Subquery(users.annotate(n=Count("pk")).values("n"), output_field=models.IntegerField()),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_usersession'),
+        ('dealers', '0017_settlement_fingerprint_and_restrict'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dealerstats',
+            name='users_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_users_count, migrations.RunPython.noop),
+    ]
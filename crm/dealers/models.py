@@ -1,9 +1,37 @@
 from typing import TYPE_CHECKING
 
-from django.db import models
-from core.models import BaseModel
-from django.db.models import Sum
-from decimal import Decimal
+from django.db import models, router, transaction
+from core.fragments import bump_data_version
+from core.models import ActiveManager, BaseModel
+from django.db.models import (
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+COSTING_FIELD = DecimalField(max_digits=14, decimal_places=2)
+CENTS = Decimal("0.01")
+
+
+def to_cents(value) -> Decimal:
+    """
+    Monto al centavo con ROUND_HALF_UP, como el precio guardado (y ROUND()
+    en SQL): los métodos de costeo devuelven lo mismo con o sin anotación.
+    """
+    return Decimal(value or 0).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+# Cantidad máxima de ids por UPDATE ... WHERE id IN (...)
+ROLLUP_REFRESH_CHUNK = 500
+STATS_REFRESH_CHUNK = 100
 
 
 class Dealer(BaseModel):
@@ -24,13 +52,327 @@ class Dealer(BaseModel):
 
     is_active = models.BooleanField(default=True)
 
+    # Sharding por tenant (core.sharding): alias de la base con sus datos
+    shard = models.CharField(max_length=64, default="default", editable=False)
+    shard_locked = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Escrituras bloqueadas mientras se mueve de shard"
+    )
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = "Dealer"
         verbose_name_plural = "Dealers"
+        default_manager_name = "all_objects"
 
     def __str__(self) -> str:
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_margin = instance.__dict__.get("default_margin_percentage")
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        adding = self._state.adding
+        margin_changed = (
+            not adding
+            and (update_fields is None or "default_margin_percentage" in update_fields)
+            and self.default_margin_percentage != getattr(self, "_loaded_margin", None)
+        )
+        super().save(*args, **kwargs)
+        self._loaded_margin = self.default_margin_percentage
+        if adding:
+            # Fila de stats desde el alta: el dashboard de plataforma cuenta
+            # los dealers sobre DealerStats
+            refresh_dealer_stats({self.pk}, using=self.shard)
+        if margin_changed:
+            self.reprice_inventory()
+
+    def reprice_inventory(self) -> int:
+        """
+        Recalcula el precio sugerido de todo el inventario con el margen
+        actual, en un solo UPDATE. El margen se guarda también en los
+        vehículos con precio fijado a mano (suggested_price_expression
+        conserva el override): al quitarlo vuelven al margen vigente.
+        """
+        return (
+            Vehicle.all_objects.using(self.shard)
+            .filter(dealer_id=self.pk)
+            .update(price_margin_percentage=self.default_margin_percentage)
+        )
+
+    def soft_delete(self) -> None:
+        """
+        Baja lógica: oculta el dealer y bloquea a sus usuarios.
+        Los datos se borran después, en lotes (purge_deleted).
+        """
+        from accounts.models import User
+        from accounts.sessions import revoke_dealer_sessions
+
+        with transaction.atomic():
+            self.is_active = False
+            self.save(update_fields=["is_active", "updated_at"])
+            # save() de a uno: las señales invalidan el principal cacheado y
+            # actualizan el espejo en el shard (son pocos usuarios por dealer)
+            for user in User.objects.filter(dealer=self, is_active=True):
+                user.is_active = False
+                user.save(update_fields=["is_active", "updated_at"])
+            revoke_dealer_sessions(self.pk)
     
+def stamp_updated_at(objs, fields) -> list:
+    """
+    bulk_update no aplica auto_now: se agrega updated_at a los campos.
+    """
+    fields = list(fields)
+    if "updated_at" not in fields:
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        fields.append("updated_at")
+    return fields
+
+
+# Columnas de las que depende Vehicle.suggested_price
+PRICE_INPUT_FIELDS = frozenset({
+    "purchase_price",
+    "services_total",
+    "price_margin_percentage",
+    "price_override",
+})
+
+# Acumulados que mantienen los servicios (apply_rollup_deltas /
+# refresh_vehicle_rollups); Vehicle.save() no los escribe
+ROLLUP_COLUMNS = frozenset({"services_total", "services_count"})
+
+
+def suggested_price_expression(**values):
+    """
+    Expresión SQL de Vehicle.suggested_price (misma regla que
+    Vehicle.compute_suggested_price). En un UPDATE el lado derecho del SET
+    ve los valores viejos de la fila: quien cambia una de las columnas de
+    PRICE_INPUT_FIELDS en el mismo UPDATE pasa el valor nuevo en values.
+    """
+    def column(name):
+        value = values.get(name, F(name))
+        if not hasattr(value, "resolve_expression"):
+            value = Value(value, output_field=COSTING_FIELD)
+        return value
+
+    zero = Value(Decimal("0.00"), output_field=COSTING_FIELD)
+    cost = Coalesce(column("purchase_price"), zero) + Coalesce(column("services_total"), zero)
+    factor = Value(Decimal("1")) + Coalesce(column("price_margin_percentage"), zero) * Value(CENTS)
+    return Coalesce(
+        column("price_override"),
+        Round(ExpressionWrapper(cost * factor, output_field=COSTING_FIELD), 2),
+        output_field=COSTING_FIELD,
+    )
+
+
+class VehicleQuerySet(models.QuerySet):
+    """
+    QuerySet de vehículos con helpers de costeo.
+    """
+
+    def with_costing(self) -> "VehicleQuerySet":
+        """
+        Anota servicios, costo total y precio sugerido en una sola consulta.
+        El total de servicios sale del acumulado Vehicle.services_total,
+        que sigue la misma regla que Vehicle.total_services_cost():
+        solo servicios activos pagados por la automotora.
+        """
+        return self.annotate(
+            costing_services_total=Coalesce(
+                F("services_total"),
+                Value(Decimal("0.00")),
+                output_field=COSTING_FIELD,
+            ),
+        ).annotate(
+            costing_total_cost=ExpressionWrapper(
+                Coalesce(F("purchase_price"), Value(Decimal("0.00")))
+                + F("costing_services_total"),
+                output_field=COSTING_FIELD,
+            ),
+        ).annotate(
+            # Guardado en la fila (Vehicle.suggested_price): sin JOIN al dealer
+            costing_suggested_price=F("suggested_price"),
+        )
+
+    def with_reporting_currency(self, currency: str, on: date | None = None) -> "VehicleQuerySet":
+        """
+        Anota costo total y precio sugerido convertidos a currency con la
+        cotización vigente en on (dealers.currency). Los servicios se
+        registran en la moneda del vehículo.
+        """
+        from .currency import conversion_expression
+
+        zero = Value(Decimal("0.00"))
+        cost = Coalesce(F("purchase_price"), zero) + Coalesce(F("services_total"), zero)
+        return self.annotate(
+            reporting_total_cost=conversion_expression(cost, currency, on),
+            reporting_suggested_price=conversion_expression(F("suggested_price"), currency, on),
+        )
+
+    # Palabras de search(): cada una agrega un filtro con tres OR
+    SEARCH_TERMS = 3
+
+    def search(self, query: str) -> "VehicleQuerySet":
+        """
+        Búsqueda por prefijo: cada palabra debe ser el comienzo de la marca,
+        del modelo o del año ("fiat uno 20"). Solo cuentan las primeras
+        SEARCH_TERMS palabras; search_terms() devuelve las ignoradas para
+        avisarle al usuario.
+        """
+        queryset = self
+        for term in self.search_terms(query)[0]:
+            condition = models.Q(brand__istartswith=term) | models.Q(model__istartswith=term)
+            if term.isdigit():
+                condition |= models.Q(year__startswith=term)
+            queryset = queryset.filter(condition)
+        return queryset
+
+    @classmethod
+    def search_terms(cls, query: str) -> tuple[list, list]:
+        """
+        (palabras usadas, palabras ignoradas) de una búsqueda.
+        """
+        terms = query.split()
+        return terms[:cls.SEARCH_TERMS], terms[cls.SEARCH_TERMS:]
+
+    def with_live_services_rollup(self) -> "VehicleQuerySet":
+        """
+        Anota live_services_total / live_services_count calculados
+        directamente desde VehicleService (sin usar el acumulado).
+        """
+        live_total, live_count = services_rollup_expressions()
+        return self.annotate(
+            live_services_total=live_total,
+            live_services_count=live_count,
+        )
+
+    def refresh_services_rollup(self) -> int:
+        """
+        Recalcula services_total / services_count con un único UPDATE.
+        """
+        live_total, live_count = services_rollup_expressions()
+        return self.update(
+            services_total=live_total,
+            services_count=live_count,
+        )
+
+    # -------------------------
+    # DealerStats en operaciones masivas
+    # -------------------------
+
+    STATS_FIELDS = frozenset({
+        "dealer",
+        "dealer_id",
+        "is_active",
+        "ownership_type",
+        "currency",
+        "purchase_price",
+        "services_total",
+    })
+
+    def _dealer_ids(self) -> set:
+        return set(self.order_by().values_list("dealer_id", flat=True).distinct())
+
+    def _fill_suggested_prices(self, objs) -> None:
+        """
+        Margen del dealer (una consulta para todos) y precio sugerido
+        de los vehículos nuevos.
+        """
+        missing = {o.dealer_id for o in objs if o.price_margin_percentage is None}
+        margins = dict(
+            Dealer._base_manager.using(self.db)
+            .filter(pk__in=missing)
+            .values_list("pk", "default_margin_percentage")
+        ) if missing else {}
+        for obj in objs:
+            if obj.price_margin_percentage is None:
+                obj.price_margin_percentage = margins.get(obj.dealer_id)
+            obj.suggested_price = obj.compute_suggested_price()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self._fill_suggested_prices(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            affected = {o.dealer_id for o in created}
+            refresh_dealer_stats(affected, using=self.db)
+            bump_data_version(affected, using=self.db)
+
+        for obj in created:
+            obj._remember_stats_state()
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = stamp_updated_at(objs, fields)
+        if PRICE_INPUT_FIELDS.intersection(fields) and "suggested_price" not in fields:
+            for obj in objs:
+                obj.suggested_price = obj.compute_suggested_price()
+            fields.append("suggested_price")
+        if not self.STATS_FIELDS.intersection(fields):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            bump_data_version({o.dealer_id for o in objs}, using=self.db)
+            return rows
+
+        with transaction.atomic(using=self.db):
+            affected = set(
+                self.model._base_manager.using(self.db)
+                .filter(pk__in=[o.pk for o in objs])
+                .values_list("dealer_id", flat=True)
+            )
+            affected.update(o.dealer_id for o in objs)
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            refresh_dealer_stats(affected, using=self.db)
+            bump_data_version(affected, using=self.db)
+
+        for obj in objs:
+            obj._remember_stats_state()
+        return rows
+
+    def update(self, **kwargs):
+        # Como auto_now en save(): move_dealer_to_shard copia por updated_at
+        kwargs.setdefault("updated_at", timezone.now())
+        inputs = {name: kwargs[name] for name in PRICE_INPUT_FIELDS if name in kwargs}
+        if inputs and "suggested_price" not in kwargs:
+            kwargs["suggested_price"] = suggested_price_expression(**inputs)
+
+        with transaction.atomic(using=self.db):
+            affected = self._dealer_ids()
+            new_dealer = kwargs.get("dealer", kwargs.get("dealer_id"))
+            if new_dealer is not None:
+                new_dealer = getattr(new_dealer, "pk", new_dealer)
+                affected.add(new_dealer)
+                # Antes del UPDATE: el filtro puede dejar de matchear (dealer=...)
+                moved = set(self.order_by().values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            if new_dealer is not None:
+                move_services(moved, new_dealer, using=self.db)
+            if self.STATS_FIELDS.intersection(kwargs):
+                refresh_dealer_stats(affected, using=self.db)
+            bump_data_version(affected, using=self.db)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            affected = self._dealer_ids()
+            result = super().delete()
+            refresh_dealer_stats(affected, using=self.db)
+            bump_data_version(affected, using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Vehicle(BaseModel):
     """
     Vehículo perteneciente a una automotora.
@@ -74,21 +416,111 @@ class Vehicle(BaseModel):
     )
 
     is_active = models.BooleanField(default=True)
-    
+
+    external_ref = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text="Identificador externo (planillas de importación)"
+    )
+
+    # Acumulados mantenidos por VehicleService (ver reconcile_vehicle_costs)
+    services_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        editable=False,
+        help_text="Total de servicios activos pagados por la automotora"
+    )
+
+    services_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Cantidad de servicios activos"
+    )
+
+    # Precio sugerido guardado (ver PRICE_INPUT_FIELDS): se recalcula al
+    # escribir sus insumos y, con un UPDATE, al cambiar el margen del dealer
+    suggested_price = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        editable=False,
+        help_text="(Compra + servicios) * (1 + margen), o el precio fijado a mano"
+    )
+
+    price_margin_percentage = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        help_text="Margen con el que se calculó el precio sugerido"
+    )
+
+    price_override = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Precio fijado a mano; el recálculo por margen no lo toca"
+    )
+
+    objects = ActiveManager.from_queryset(VehicleQuerySet)()
+    all_objects = VehicleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Vehicle"
         verbose_name_plural = "Vehicles"
+        default_manager_name = "all_objects"
         ordering = ["-created_at"]
+        indexes = [
+            # Listado por tenant: WHERE dealer_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(
+                fields=["dealer", "-created_at", "-id"],
+                name="vehicle_dealer_created_idx",
+            ),
+            # Listado ordenado / filtrado por precio sugerido
+            models.Index(
+                fields=["dealer", "suggested_price", "id"],
+                name="vehicle_dealer_price_idx",
+            ),
+            # purge_deleted: solo las bajas lógicas (índice parcial, chico)
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(is_active=False),
+                name="vehicle_inactive_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dealer", "external_ref"],
+                name="vehicle_dealer_external_ref_uniq",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.brand} {self.model} ({self.year})"
+
+    def soft_delete(self) -> None:
+        """
+        Baja lógica del vehículo y de sus servicios.
+        """
+        using = router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            self.is_active = False
+            self.save(update_fields=["is_active", "updated_at"])
+            # Un UPDATE para todos los servicios (recalcula acumulados y DealerStats)
+            self.services.filter(is_active=True).update(is_active=False)
     
     def total_services_cost(self) -> Decimal:
         """
         Total de servicios PAGADOS POR LA AUTOMOTORA.
         Los servicios pagados por el dueño NO cuentan.
         """
+        annotated = getattr(self, "costing_services_total", None)
+        if annotated is not None:
+            return to_cents(annotated)
+
         total = self.services.filter(
             payer=VehicleService.Payer.DEALER,
             is_active=True
@@ -96,22 +528,439 @@ class Vehicle(BaseModel):
             total=Sum("amount")
         )["total"]
 
-        return total or Decimal("0.00")
+        return to_cents(total)
 
     def total_cost(self) -> Decimal:
         """
         Costo total real del vehículo para la automotora.
         Compra + servicios propios.
         """
-        return (self.purchase_price or Decimal("0.00")) + self.total_services_cost()
+        annotated = getattr(self, "costing_total_cost", None)
+        if annotated is not None:
+            return to_cents(annotated)
+
+        return to_cents(self.purchase_price) + self.total_services_cost()
 
     def suggested_sale_price(self) -> Decimal:
         """
-        Precio sugerido según margen por defecto del dealer.
+        Precio sugerido según margen por defecto del dealer (guardado en la fila).
+        """
+        return to_cents(self.suggested_price)
+
+    def compute_suggested_price(self) -> Decimal:
+        """
+        Precio fijado a mano o (compra + servicios) * (1 + margen / 100),
+        con el margen y los acumulados guardados en la fila.
         """
-        margin = self.dealer.default_margin_percentage or Decimal("0.00")
-        factor = Decimal("1") + (margin / Decimal("100"))
-        return self.total_cost() * factor
+        if self.price_override is not None:
+            return to_cents(self.price_override)
+        cost = Decimal(self.purchase_price or 0) + Decimal(self.services_total or 0)
+        margin = Decimal(self.price_margin_percentage or 0)
+        return to_cents(cost * (Decimal("1") + margin / Decimal("100")))
+
+    def _refresh_suggested_price(self, using: str, update_fields) -> list | None:
+        """
+        Recalcula suggested_price antes de save(); devuelve update_fields
+        con las columnas agregadas.
+        """
+        if update_fields is not None and not PRICE_INPUT_FIELDS.intersection(update_fields):
+            return update_fields
+        if self.price_margin_percentage is None and self.dealer_id is not None:
+            if type(self).dealer.is_cached(self) and self.dealer.pk == self.dealer_id:
+                self.price_margin_percentage = self.dealer.default_margin_percentage
+            else:
+                self.price_margin_percentage = (
+                    Dealer._base_manager.using(using)
+                    .filter(pk=self.dealer_id)
+                    .values_list("default_margin_percentage", flat=True)
+                    .first()
+                )
+        self.suggested_price = self.compute_suggested_price()
+        if update_fields is None:
+            return None
+        return list({*update_fields, "suggested_price", "price_margin_percentage"})
+
+    # -------------------------
+    # Contadores en DealerStats
+    # -------------------------
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stats_state()
+        return instance
+
+    def stats_contribution(self) -> tuple[int | None, dict]:
+        """
+        Aporte de este vehículo a los contadores de su dealer:
+        (dealer_id, {campo: valor}). Solo cuentan los vehículos activos.
+        """
+        if not self.is_active:
+            return self.dealer_id, {}
+        cost = Decimal(self.purchase_price or 0) + Decimal(self.services_total or 0)
+        return self.dealer_id, {
+            "vehicles_in_stock": 1,
+            "consignment_count": int(self.ownership_type == self.Ownership.CONSIGNMENT),
+            "owned_count": int(self.ownership_type == self.Ownership.DEALER),
+            DealerStats.inventory_cost_field(self.currency): cost,
+        }
+
+    def _remember_stats_state(self) -> None:
+        if self.get_deferred_fields() & VehicleQuerySet.STATS_FIELDS:
+            self._stats_state = None
+        else:
+            self._stats_state = self.stats_contribution()
+
+    # -------------------------
+    # Acumulados de servicios
+    # -------------------------
+
+    def _without_rollup_fields(self, update_fields) -> list:
+        """
+        update_fields de un save() sobre una fila existente, sin los
+        acumulados: los escriben los servicios con deltas F() y una instancia
+        cargada antes los tiene viejos. Como save(), omite los diferidos.
+        """
+        if update_fields is None:
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        return [name for name in update_fields if name not in ROLLUP_COLUMNS]
+
+    def _reload_services_rollup(self, using: str) -> None:
+        """
+        Relee services_total / services_count (bloqueando la fila) antes de
+        recalcular precio sugerido y contadores. El aporte recordado a
+        DealerStats se corrige: los deltas de los servicios ya lo ajustaron.
+        """
+        row = (
+            type(self)._base_manager.using(using)
+            .select_for_update()
+            .filter(pk=self.pk)
+            .values_list("services_total", "services_count")
+            .first()
+        )
+        if row is None:
+            return
+        drift = Decimal(row[0]) - Decimal(self.services_total or 0)
+        self.services_total, self.services_count = row
+
+        state = getattr(self, "_stats_state", None)
+        if drift and state is not None:
+            dealer_id, values = state
+            values = dict(values)
+            for currency in self.Currency.values:
+                field = DealerStats.inventory_cost_field(currency)
+                if field in values:
+                    values[field] += drift
+            self._stats_state = (dealer_id, values)
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        is_new = self._state.adding
+
+        with transaction.atomic(using=using):
+            if not is_new and using == self._state.db:
+                kwargs["update_fields"] = self._without_rollup_fields(kwargs.get("update_fields"))
+                # Precio sugerido y aporte a DealerStats dependen de los acumulados
+                if (PRICE_INPUT_FIELDS | VehicleQuerySet.STATS_FIELDS).intersection(kwargs["update_fields"]):
+                    self._reload_services_rollup(using)
+
+            update_fields = self._refresh_suggested_price(using, kwargs.get("update_fields"))
+            if update_fields is not None:
+                kwargs["update_fields"] = update_fields
+            if (
+                update_fields is not None
+                and not VehicleQuerySet.STATS_FIELDS.intersection(update_fields)
+            ):
+                super().save(*args, **kwargs)
+                bump_data_version({self.dealer_id}, using=using)
+                return
+
+            previous = getattr(self, "_stats_state", None)
+            if not is_new and previous is None:
+                old_dealer_id = (
+                    type(self)._base_manager.using(using)
+                    .filter(pk=self.pk)
+                    .values_list("dealer_id", flat=True)
+                    .first()
+                )
+                super().save(*args, **kwargs)
+                move_services({self.pk}, self.dealer_id, using=using)
+                refresh_dealer_stats({old_dealer_id, self.dealer_id}, using=using)
+            else:
+                old_dealer_id = previous[0] if previous is not None else None
+                super().save(*args, **kwargs)
+                deltas: dict = {}
+                add_stats_deltas(deltas, *self.stats_contribution())
+                if previous is not None and not is_new:
+                    add_stats_deltas(deltas, *previous, sign=-1)
+                apply_stats_deltas(deltas, using=using)
+                if not is_new and old_dealer_id != self.dealer_id:
+                    # Los servicios del mes cuentan en el dealer de su columna dealer_id
+                    move_services({self.pk}, self.dealer_id, using=using)
+                    refresh_dealer_stats({old_dealer_id, self.dealer_id}, using=using)
+            bump_data_version({old_dealer_id, self.dealer_id}, using=using)
+
+        self._remember_stats_state()
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+
+        with transaction.atomic(using=using):
+            result = super().delete(*args, **kwargs)
+            # El CASCADE borra servicios sin pasar por VehicleService.delete()
+            refresh_dealer_stats({self.dealer_id}, using=using)
+            bump_data_version({self.dealer_id}, using=using)
+
+        self._stats_state = None
+        return result
+
+def move_services(vehicle_ids, dealer_id: int, using: str) -> int:
+    """
+    Lleva el dealer denormalizado de los servicios al dealer nuevo de sus
+    vehículos, en la misma transacción que el cambio del vehículo. Un
+    UPDATE directo: los acumulados del vehículo no cambian.
+    """
+    if not vehicle_ids:
+        return 0
+    return (
+        VehicleService._base_manager.using(using)
+        .filter(vehicle_id__in=vehicle_ids)
+        .exclude(dealer_id=dealer_id)
+        .update(dealer_id=dealer_id, updated_at=timezone.now())
+    )
+
+
+def services_rollup_expressions() -> tuple[Coalesce, Coalesce]:
+    """
+    Subconsultas correlacionadas (por Vehicle) para total y cantidad
+    de servicios activos.
+    """
+    active = VehicleService.all_objects.filter(
+        vehicle=OuterRef("pk"),
+        is_active=True,
+    ).order_by().values("vehicle")
+
+    total = active.filter(
+        payer=VehicleService.Payer.DEALER
+    ).annotate(total=Sum("amount")).values("total")
+    count = active.annotate(count=Count("pk")).values("count")
+
+    return (
+        Coalesce(
+            Subquery(total, output_field=COSTING_FIELD),
+            Value(Decimal("0.00")),
+            output_field=COSTING_FIELD,
+        ),
+        Coalesce(
+            Subquery(count, output_field=models.IntegerField()),
+            Value(0),
+            output_field=models.IntegerField(),
+        ),
+    )
+
+
+def refresh_vehicle_rollups(vehicle_ids, using: str = "default") -> None:
+    """
+    Recalcula los acumulados de los vehículos indicados, en bloques.
+    """
+    ids = sorted({vid for vid in vehicle_ids if vid is not None})
+    for start in range(0, len(ids), ROLLUP_REFRESH_CHUNK):
+        chunk = ids[start:start + ROLLUP_REFRESH_CHUNK]
+        Vehicle.all_objects.using(using).filter(pk__in=chunk).refresh_services_rollup()
+
+
+def apply_rollup_deltas(deltas, using: str = "default") -> None:
+    """
+    Aplica deltas {vehicle_id: (total, count)} con expresiones F atómicas.
+    También ajusta el costo de inventario del dealer (solo vehículos activos).
+    """
+    deltas = {
+        vehicle_id: (total, count)
+        for vehicle_id, (total, count) in deltas.items()
+        if vehicle_id is not None and (total or count)
+    }
+    for vehicle_id, (total, count) in deltas.items():
+        # _base_manager: sin el recálculo de DealerStats de VehicleQuerySet.update()
+        Vehicle._base_manager.using(using).filter(pk=vehicle_id).update(
+            services_total=F("services_total") + total,
+            services_count=F("services_count") + count,
+            suggested_price=suggested_price_expression(services_total=F("services_total") + total),
+            updated_at=timezone.now(),
+        )
+
+    with_total = [vehicle_id for vehicle_id, (total, _) in deltas.items() if total]
+    if not with_total:
+        return
+    stats: dict = {}
+    vehicles = (
+        Vehicle._base_manager.using(using)
+        .filter(pk__in=with_total, is_active=True)
+        .values_list("pk", "dealer_id", "currency")
+    )
+    for vehicle_id, dealer_id, currency in vehicles:
+        add_stats_deltas(
+            stats,
+            dealer_id,
+            {DealerStats.inventory_cost_field(currency): deltas[vehicle_id][0]},
+        )
+    apply_stats_deltas(stats, using=using)
+
+
+class VehicleServiceQuerySet(models.QuerySet):
+    """
+    Servicios con scope por tenant.
+    Mantiene los acumulados de Vehicle y el dealer denormalizado
+    también en operaciones masivas.
+    """
+
+    # service_date: afecta DealerStats.services_month_count
+    ROLLUP_FIELDS = frozenset({
+        "vehicle",
+        "vehicle_id",
+        "amount",
+        "payer",
+        "is_active",
+        "service_date",
+    })
+
+    def for_dealer(self, dealer) -> "VehicleServiceQuerySet":
+        """
+        Servicios de un dealer, sin JOIN contra dealers_vehicle.
+        """
+        return self.filter(dealer=dealer)
+
+    def _dealer_ids(self) -> set:
+        return set(self.order_by().values_list("dealer_id", flat=True).distinct())
+
+    def _vehicle_dealer_ids(self, vehicle_ids) -> dict:
+        ids = {vid for vid in vehicle_ids if vid is not None}
+        if not ids:
+            return {}
+        return dict(
+            Vehicle._base_manager.using(self.db)
+            .filter(pk__in=ids)
+            .values_list("pk", "dealer_id")
+        )
+
+    def _sync_dealers(self, objs) -> None:
+        """
+        Completa dealer_id desde el vehículo (una sola consulta para todo el lote).
+        """
+        pending = [obj for obj in objs if not obj._sync_dealer_from_cached_vehicle()]
+        dealer_ids = self._vehicle_dealer_ids(obj.vehicle_id for obj in pending)
+        for obj in pending:
+            obj.dealer_id = dealer_ids.get(obj.vehicle_id, obj.dealer_id)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self._sync_dealers(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+
+            vehicle_ids = {o.vehicle_id for o in created}
+            if (
+                len(vehicle_ids) > 1
+                or kwargs.get("ignore_conflicts")
+                or kwargs.get("update_conflicts")
+            ):
+                # Lotes de varios vehículos (importaciones): un UPDATE con
+                # subconsulta por bloque es mucho más barato que un delta por fila.
+                # Con conflictos tampoco sabemos qué filas se insertaron.
+                refresh_vehicle_rollups(vehicle_ids, using=self.db)
+            else:
+                deltas: dict = {}
+                months: dict = {}
+                for obj in created:
+                    vehicle_id, total, count = obj.rollup_contribution()
+                    prev_total, prev_count = deltas.get(vehicle_id, (Decimal("0.00"), 0))
+                    deltas[vehicle_id] = (prev_total + total, prev_count + count)
+                    add_month_delta(months, obj.month_contribution())
+                apply_rollup_deltas(deltas, using=self.db)
+                apply_month_deltas(months, using=self.db)
+            bump_data_version({o.dealer_id for o in created}, using=self.db)
+
+        for obj in created:
+            obj._remember_rollup_state()
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = stamp_updated_at(objs, fields)
+        if {"vehicle", "vehicle_id"}.intersection(fields):
+            self._sync_dealers(objs)
+            if "dealer" not in fields:
+                fields.append("dealer")
+
+        if not self.ROLLUP_FIELDS.intersection(fields):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            bump_data_version({o.dealer_id for o in objs}, using=self.db)
+            return rows
+
+        with transaction.atomic(using=self.db):
+            previous = list(
+                self.model._base_manager.using(self.db)
+                .filter(pk__in=[o.pk for o in objs])
+                .values_list("vehicle_id", "dealer_id")
+            )
+            affected = {vehicle_id for vehicle_id, _ in previous}
+            affected.update(o.vehicle_id for o in objs)
+            dealers = {dealer_id for _, dealer_id in previous}
+            dealers.update(o.dealer_id for o in objs)
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            refresh_vehicle_rollups(affected, using=self.db)
+            bump_data_version(dealers, using=self.db)
+
+        for obj in objs:
+            obj._remember_rollup_state()
+        return rows
+
+    def update(self, **kwargs):
+        # Como auto_now en save(): move_dealer_to_shard copia por updated_at
+        kwargs.setdefault("updated_at", timezone.now())
+        if not self.ROLLUP_FIELDS.intersection(kwargs):
+            with transaction.atomic(using=self.db):
+                dealers = self._dealer_ids()
+                rows = super().update(**kwargs)
+                bump_data_version(dealers, using=self.db)
+            return rows
+
+        with transaction.atomic(using=self.db):
+            previous = list(self.order_by().values_list("vehicle_id", "dealer_id").distinct())
+            affected = {vehicle_id for vehicle_id, _ in previous}
+            dealers = {dealer_id for _, dealer_id in previous}
+            new_vehicle = kwargs.get("vehicle", kwargs.get("vehicle_id"))
+            if new_vehicle is not None:
+                new_vehicle_id = getattr(new_vehicle, "pk", new_vehicle)
+                affected.add(new_vehicle_id)
+                if "dealer" not in kwargs and "dealer_id" not in kwargs:
+                    kwargs["dealer_id"] = self._vehicle_dealer_ids([new_vehicle_id]).get(
+                        new_vehicle_id
+                    )
+            new_dealer = kwargs.get("dealer", kwargs.get("dealer_id"))
+            dealers.add(getattr(new_dealer, "pk", new_dealer))
+            rows = super().update(**kwargs)
+            refresh_vehicle_rollups(affected, using=self.db)
+            bump_data_version(dealers, using=self.db)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            previous = list(self.order_by().values_list("vehicle_id", "dealer_id").distinct())
+            affected = {vehicle_id for vehicle_id, _ in previous}
+            dealers = {dealer_id for _, dealer_id in previous}
+            result = super().delete()
+            refresh_vehicle_rollups(affected, using=self.db)
+            bump_data_version(dealers, using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class VehicleService(BaseModel):
     """
@@ -129,6 +978,14 @@ class VehicleService(BaseModel):
         related_name="services"
     )
 
+    # Denormalizado desde vehicle.dealer (evita el JOIN en cada consulta por tenant)
+    dealer = models.ForeignKey(
+        Dealer,
+        on_delete=models.CASCADE,
+        related_name="vehicle_services",
+        editable=False,
+    )
+
     description = models.CharField(
         max_length=255,
         help_text="Ej: Cambio de aceite, Chapa y pintura, Lavado, Repuesto"
@@ -150,11 +1007,543 @@ class VehicleService(BaseModel):
 
     is_active = models.BooleanField(default=True)
 
+    objects = ActiveManager.from_queryset(VehicleServiceQuerySet)()
+    all_objects = VehicleServiceQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Vehicle Service"
         verbose_name_plural = "Vehicle Services"
+        default_manager_name = "all_objects"
         ordering = ["-service_date"]
+        indexes = [
+            # purge_deleted: solo las bajas lógicas (índice parcial, chico)
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(is_active=False),
+                name="service_inactive_idx",
+            ),
+            # total_services_cost / acumulados: cubre (vehicle, payer, is_active) -> amount
+            models.Index(
+                fields=["vehicle", "payer", "is_active", "amount"],
+                name="service_vehicle_payer_idx",
+            ),
+            # Listado por tenant: WHERE dealer_id = ? ORDER BY service_date DESC, id DESC
+            models.Index(
+                fields=["dealer", "-service_date", "-id"],
+                name="service_dealer_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
-        return f"{self.vehicle} - {self.description}"     
-    
\ No newline at end of file
+        return f"{self.vehicle} - {self.description}"
+
+    def soft_delete(self) -> None:
+        """
+        Baja lógica: deja de contar en acumulados y listados.
+        """
+        self.is_active = False
+        self.save(update_fields=["is_active", "updated_at"])
+
+    # -------------------------
+    # Dealer denormalizado
+    # -------------------------
+
+    def _sync_dealer_from_cached_vehicle(self) -> bool:
+        """
+        Copia el dealer del vehículo si ya está cargado en memoria.
+        """
+        if self.vehicle_id is None:
+            return True
+        if type(self).vehicle.is_cached(self) and self.vehicle.pk == self.vehicle_id:
+            self.dealer_id = self.vehicle.dealer_id
+            return True
+        return False
+
+    def sync_dealer(self, using: str | None = None) -> None:
+        """
+        Alinea dealer_id con el dealer del vehículo.
+        """
+        if self._sync_dealer_from_cached_vehicle():
+            return
+        self.dealer_id = (
+            Vehicle._base_manager.using(using)
+            .filter(pk=self.vehicle_id)
+            .values_list("dealer_id", flat=True)
+            .first()
+        )
+
+    # -------------------------
+    # Acumulados en Vehicle
+    # -------------------------
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_rollup_state()
+        return instance
+
+    def rollup_contribution(self) -> tuple[int | None, Decimal, int]:
+        """
+        Aporte de este servicio a los acumulados de su vehículo:
+        (vehicle_id, total, cantidad).
+        """
+        if not self.is_active:
+            return self.vehicle_id, Decimal("0.00"), 0
+        if self.payer == self.Payer.DEALER:
+            return self.vehicle_id, Decimal(self.amount or 0), 1
+        return self.vehicle_id, Decimal("0.00"), 1
+
+    def month_contribution(self) -> tuple[int | None, date] | None:
+        """
+        Mes (dealer, primer día) en el que cuenta este servicio para
+        DealerStats.services_month_count, o None si no cuenta.
+        """
+        if not self.is_active or self.service_date is None:
+            return None
+        return self.dealer_id, self.service_date.replace(day=1)
+
+    def _remember_rollup_state(self) -> None:
+        deferred = self.get_deferred_fields()
+        if deferred & (VehicleServiceQuerySet.ROLLUP_FIELDS | {"dealer", "dealer_id"}):
+            self._rollup_state = None
+            self._month_state = None
+        else:
+            self._rollup_state = self.rollup_contribution()
+            self._month_state = self.month_contribution()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        loaded_state = getattr(self, "_rollup_state", None)
+        vehicle_unchanged = (
+            self.dealer_id is not None
+            and loaded_state is not None
+            and loaded_state[0] == self.vehicle_id
+        )
+        if not vehicle_unchanged and (
+            update_fields is None or {"vehicle", "vehicle_id"}.intersection(update_fields)
+        ):
+            self.sync_dealer(using=kwargs.get("using"))
+            if update_fields is not None:
+                kwargs["update_fields"] = update_fields = {*update_fields, "dealer"}
+
+        if (
+            update_fields is not None
+            and not VehicleServiceQuerySet.ROLLUP_FIELDS.intersection(update_fields)
+        ):
+            super().save(*args, **kwargs)
+            bump_data_version({self.dealer_id}, using=self._state.db)
+            return
+
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        previous = getattr(self, "_rollup_state", None)
+        previous_month = getattr(self, "_month_state", None)
+        is_new = self._state.adding
+
+        with transaction.atomic(using=using):
+            if not is_new and previous is None:
+                # Instancia sin estado conocido: recalculamos desde la base
+                old_vehicle_id = (
+                    type(self)._base_manager.using(using)
+                    .filter(pk=self.pk)
+                    .values_list("vehicle_id", flat=True)
+                    .first()
+                )
+                super().save(*args, **kwargs)
+                refresh_vehicle_rollups({old_vehicle_id, self.vehicle_id}, using=using)
+            else:
+                super().save(*args, **kwargs)
+                vehicle_id, total, count = self.rollup_contribution()
+                deltas = {vehicle_id: (total, count)}
+                if previous is not None and not is_new:
+                    old_id, old_total, old_count = previous
+                    cur_total, cur_count = deltas.get(old_id, (Decimal("0.00"), 0))
+                    deltas[old_id] = (cur_total - old_total, cur_count - old_count)
+                apply_rollup_deltas(deltas, using=using)
+
+                months: dict = {}
+                add_month_delta(months, self.month_contribution())
+                if not is_new:
+                    add_month_delta(months, previous_month, sign=-1)
+                apply_month_deltas(months, using=using)
+            bump_data_version({self.dealer_id}, using=using)
+
+        self._remember_rollup_state()
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        previous = getattr(self, "_rollup_state", None)
+        previous_month = getattr(self, "_month_state", None)
+
+        with transaction.atomic(using=using):
+            result = super().delete(*args, **kwargs)
+            if previous is None:
+                refresh_vehicle_rollups({self.vehicle_id}, using=using)
+            else:
+                vehicle_id, total, count = previous
+                apply_rollup_deltas({vehicle_id: (-total, -count)}, using=using)
+                months: dict = {}
+                add_month_delta(months, previous_month, sign=-1)
+                apply_month_deltas(months, using=using)
+            bump_data_version({self.dealer_id}, using=using)
+
+        self._rollup_state = None
+        self._month_state = None
+        return result     
+    
+
+
+class DealerStats(models.Model):
+    """
+    Contadores precalculados del dashboard: una fila por dealer.
+
+    Se mantienen en la misma transacción que cada escritura (deltas con F
+    en los caminos de a una fila, recálculo por dealer en las operaciones
+    masivas) y se reconcilian con el comando reconcile_dealer_stats.
+    """
+    dealer = models.OneToOneField(
+        Dealer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+
+    vehicles_in_stock = models.PositiveIntegerField(default=0)
+    consignment_count = models.PositiveIntegerField(default=0)
+    owned_count = models.PositiveIntegerField(default=0)
+
+    # Compra + servicios propios de los vehículos activos, por moneda
+    inventory_cost_usd = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    inventory_cost_uyu = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+
+    services_month = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Mes (primer día) al que corresponde services_month_count"
+    )
+    services_month_count = models.PositiveIntegerField(default=0)
+
+    # Usuarios del dealer (activos o no), para el dashboard
+    users_count = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Dealer Stats"
+        verbose_name_plural = "Dealer Stats"
+
+    def __str__(self) -> str:
+        return f"Stats {self.dealer_id}"
+
+    @staticmethod
+    def inventory_cost_field(currency: str) -> str:
+        return f"inventory_cost_{currency.lower()}"
+
+    @classmethod
+    def for_dealer(cls, dealer_id: int, using: str | None = None) -> "DealerStats":
+        """
+        Lee la fila del dealer (una consulta por PK).
+        Si no existe o cambió el mes, la recalcula antes de devolverla.
+        """
+        stats = cls.objects.using(using).filter(dealer_id=dealer_id).first()
+        if stats is None or stats.services_month != current_month():
+            using = using or router.db_for_write(cls)
+            refresh_dealer_stats({dealer_id}, using=using)
+            stats = cls.objects.using(using).get(dealer_id=dealer_id)
+        return stats
+
+
+# =========================
+# DealerStats: recálculo y deltas
+# =========================
+
+def current_month() -> date:
+    return timezone.localdate().replace(day=1)
+
+
+def dealer_stats_expressions(month: date) -> dict:
+    """
+    Subconsultas correlacionadas (por DealerStats.dealer_id) con los
+    valores reales de cada contador.
+    """
+    from accounts.models import User
+
+    vehicles = Vehicle._base_manager.filter(
+        dealer=OuterRef("dealer_id"),
+        is_active=True,
+    ).order_by().values("dealer")
+
+    def count(queryset) -> Coalesce:
+        return Coalesce(
+            Subquery(
+                queryset.annotate(n=Count("pk")).values("n"),
+                output_field=models.IntegerField(),
+            ),
+            Value(0),
+            output_field=models.IntegerField(),
+        )
+
+    def cost(currency: str) -> Coalesce:
+        total = vehicles.filter(currency=currency).annotate(
+            total=Sum(
+                Coalesce(F("purchase_price"), Value(Decimal("0.00"))) + F("services_total"),
+                output_field=COSTING_FIELD,
+            )
+        ).values("total")
+        return Coalesce(
+            Subquery(total, output_field=COSTING_FIELD),
+            Value(Decimal("0.00")),
+            output_field=COSTING_FIELD,
+        )
+
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    services = VehicleService._base_manager.filter(
+        dealer=OuterRef("dealer_id"),
+        is_active=True,
+        service_date__gte=month,
+        service_date__lt=next_month,
+    ).order_by().values("dealer")
+
+    # Los usuarios viven en el directorio; en los shards se cuentan los espejos
+    users = User._base_manager.filter(
+        dealer=OuterRef("dealer_id"),
+    ).order_by().values("dealer")
+
+    expressions = {
+        "vehicles_in_stock": count(vehicles),
+        "consignment_count": count(vehicles.filter(ownership_type=Vehicle.Ownership.CONSIGNMENT)),
+        "owned_count": count(vehicles.filter(ownership_type=Vehicle.Ownership.DEALER)),
+        "services_month_count": count(services),
+        "users_count": count(users),
+    }
+    for currency in Vehicle.Currency.values:
+        expressions[DealerStats.inventory_cost_field(currency)] = cost(currency)
+    return expressions
+
+
+def refresh_dealer_stats(dealer_ids, using: str = "default") -> None:
+    """
+    Recalcula (y crea si falta) la fila de DealerStats de cada dealer,
+    con un UPDATE por bloque.
+    """
+    ids = sorted({did for did in dealer_ids if did is not None})
+    if not ids:
+        return
+
+    month = current_month()
+    expressions = dealer_stats_expressions(month)
+    stats = DealerStats.objects.using(using)
+    for start in range(0, len(ids), STATS_REFRESH_CHUNK):
+        chunk = ids[start:start + STATS_REFRESH_CHUNK]
+        missing = set(chunk) - set(
+            stats.filter(dealer_id__in=chunk).values_list("dealer_id", flat=True)
+        )
+        if missing:
+            stats.bulk_create(
+                [
+                    DealerStats(dealer_id=dealer_id)
+                    for dealer_id in Dealer._base_manager.using(using)
+                    .filter(pk__in=missing)
+                    .values_list("pk", flat=True)
+                ],
+                ignore_conflicts=True,
+            )
+        stats.filter(dealer_id__in=chunk).update(
+            **expressions,
+            services_month=month,
+            refreshed_at=timezone.now(),
+        )
+
+
+def add_stats_deltas(deltas: dict, dealer_id: int | None, values: dict, sign: int = 1) -> None:
+    """
+    Acumula {campo: valor} en deltas[dealer_id].
+    """
+    if dealer_id is None:
+        return
+    current = deltas.setdefault(dealer_id, {})
+    for field, value in values.items():
+        current[field] = current.get(field, 0) + sign * value
+
+
+def apply_stats_deltas(deltas: dict, using: str = "default") -> None:
+    """
+    Aplica deltas {dealer_id: {campo: valor}} con expresiones F atómicas.
+    Si la fila aún no existe no hace nada: se calcula completa al leerla.
+    """
+    for dealer_id, values in deltas.items():
+        changes = {field: F(field) + value for field, value in values.items() if value}
+        if changes:
+            DealerStats.objects.using(using).filter(dealer_id=dealer_id).update(**changes)
+
+
+def add_month_delta(deltas: dict, contribution, sign: int = 1) -> None:
+    if contribution is not None:
+        deltas[contribution] = deltas.get(contribution, 0) + sign
+
+
+def apply_month_deltas(deltas: dict, using: str = "default") -> None:
+    """
+    Aplica deltas {(dealer_id, mes): n} a services_month_count, solo si la
+    fila corresponde a ese mes (los demás meses no se cuentan).
+    """
+    for (dealer_id, month), count in deltas.items():
+        if dealer_id is None or not count:
+            continue
+        DealerStats.objects.using(using).filter(
+            dealer_id=dealer_id,
+            services_month=month,
+        ).update(services_month_count=F("services_month_count") + count)
+
+
+class ExchangeRate(models.Model):
+    """
+    Cotización diaria de un par de monedas: 1 base = rate quote.
+    Tabla de plataforma (directorio, no por tenant); se lee a través de la
+    serie cacheada en dealers.currency.
+    """
+    date = models.DateField()
+    base = models.CharField(max_length=3, choices=Vehicle.Currency.choices)
+    quote = models.CharField(max_length=3, choices=Vehicle.Currency.choices)
+    rate = models.DecimalField(max_digits=18, decimal_places=6)
+    source = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Exchange rate"
+        verbose_name_plural = "Exchange rates"
+        ordering = ["base", "quote", "-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["base", "quote", "date"],
+                name="exchange_rate_pair_date_uniq",
+            ),
+            models.CheckConstraint(
+                condition=models.Q(rate__gt=0),
+                name="exchange_rate_positive",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.base}/{self.quote} {self.date}: {self.rate}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_exchange_rates(using=self._state.db)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_exchange_rates(using=self._state.db)
+        return result
+
+
+def invalidate_exchange_rates(using: str | None = None) -> None:
+    """
+    Descarta la serie cacheada (dealers.currency) al confirmar la transacción.
+    """
+    from .currency import invalidate_rate_series
+
+    transaction.on_commit(invalidate_rate_series, using=using)
+
+
+class SettlementQuerySet(models.QuerySet):
+    """
+    Las liquidaciones no se modifican: una corrección es una fila nueva
+    (sequence + 1) para el mismo vehículo y período.
+    """
+
+    def update(self, **kwargs):
+        raise TypeError("Settlement es inmutable: genere una liquidación nueva.")
+
+    update.queryset_only = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        raise TypeError("Settlement es inmutable: genere una liquidación nueva.")
+
+    def current(self) -> "SettlementQuerySet":
+        """
+        Solo la última liquidación de cada vehículo y período, si sigue en
+        consignación: una versión con otro ownership_type anula las
+        anteriores (el vehículo se corrigió a propio).
+        """
+        newer = Settlement.objects.filter(
+            vehicle_id=OuterRef("vehicle_id"),
+            period=OuterRef("period"),
+            sequence__gt=OuterRef("sequence"),
+        )
+        return self.filter(~models.Exists(newer), ownership_type=Vehicle.Ownership.CONSIGNMENT)
+
+
+class Settlement(models.Model):
+    """
+    Liquidación mensual de un vehículo en consignación: lo que pagó el dueño
+    y lo que pagó la automotora en servicios (activos, con fecha hasta el fin
+    del período). Foto inmutable generada por dealers.settlements.
+    """
+    dealer = models.ForeignKey(
+        Dealer,
+        on_delete=models.CASCADE,
+        related_name="settlements"
+    )
+    # RESTRICT: borrar el vehículo no se lleva sus liquidaciones (solo el
+    # borrado del dealer completo, que las incluye, puede hacerlo)
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.RESTRICT,
+        related_name="settlements"
+    )
+
+    period = models.DateField(help_text="Primer día del mes liquidado")
+    sequence = models.PositiveIntegerField(
+        default=1,
+        help_text="1 = primera liquidación del período; las siguientes la corrigen"
+    )
+    currency = models.CharField(max_length=3, choices=Vehicle.Currency.choices)
+    ownership_type = models.CharField(
+        max_length=20,
+        choices=Vehicle.Ownership.choices,
+        default=Vehicle.Ownership.CONSIGNMENT,
+        help_text="Tipo del vehículo al liquidar; distinto de consignación = anulada"
+    )
+
+    owner_paid = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    dealer_paid = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    owner_services_count = models.PositiveIntegerField(default=0)
+    dealer_services_count = models.PositiveIntegerField(default=0)
+
+    # Huella de lo liquidado (con currency y ownership_type del vehículo):
+    # si no cambia, no se vuelve a liquidar
+    services_rows = models.PositiveIntegerField(
+        default=0,
+        help_text="Filas de servicios (incluidas bajas) hasta el fin del período"
+    )
+    services_updated_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SettlementQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Settlement"
+        verbose_name_plural = "Settlements"
+        ordering = ["-period", "vehicle", "-sequence"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vehicle", "period", "sequence"],
+                name="settlement_vehicle_period_seq_uniq",
+            ),
+        ]
+        indexes = [
+            # Liquidaciones del dealer por período (listado / exportación)
+            models.Index(
+                fields=["dealer", "period", "vehicle", "-sequence"],
+                name="settlement_dealer_period_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.vehicle_id} {self.period:%Y-%m} #{self.sequence}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("Settlement es inmutable: genere una liquidación nueva.")
+        super().save(*args, **kwargs)
@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+
+from django.core import signing
+from django.db.models import Q, QuerySet
+
+
+@dataclass
+class KeysetPage:
+    """
+    Página de resultados con paginación por cursor (keyset).
+    """
+    object_list: list
+    next_query: str | None
+    first_query: str | None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_query is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.first_query is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginationMixin:
+    """
+    Paginación por cursor para ListViews.
+
+    Cada página se obtiene con un WHERE sobre (campo de orden, id) en lugar de
+    OFFSET, por lo que la página N cuesta lo mismo que la primera.
+    El cursor va firmado con el id del dealer: un cursor de otro tenant
+    (o manipulado) se descarta y se vuelve a la primera página.
+    """
+
+    paginate_by = 50
+    cursor_param = "cursor"
+    sort_param = "sort"
+    # clave pública -> campo de orden (con "-" para descendente)
+    sort_options: dict[str, str] = {}
+    default_sort: str = ""
+
+    def get_sort_key(self) -> str:
+        sort = self.request.GET.get(self.sort_param, "")
+        return sort if sort in self.sort_options else self.default_sort
+
+    def get_ordering(self):
+        field = self.sort_options[self.get_sort_key()]
+        tiebreak = "-id" if field.startswith("-") else "id"
+        return [field, tiebreak]
+
+    def get_cursor_salt(self) -> str:
+        dealer_id = getattr(self.request.user, "dealer_id", None)
+        return f"dealers.keyset.{type(self).__name__}.{dealer_id}"
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int):
+        queryset, cursor = self.keyset_queryset(queryset)
+        rows = list(queryset[:page_size + 1])
+        return self.keyset_page(rows, page_size, cursor)
+
+    async def apaginate_queryset(self, queryset: QuerySet, page_size: int):
+        """
+        paginate_queryset con el ORM async (vistas del perfil ASGI).
+        """
+        queryset, cursor = self.keyset_queryset(queryset)
+        rows = [row async for row in queryset[:page_size + 1].aiterator()]
+        return self.keyset_page(rows, page_size, cursor)
+
+    def keyset_queryset(self, queryset: QuerySet):
+        """
+        Ordena y aplica el cursor recibido. Devuelve (queryset, cursor).
+        """
+        sort_key = self.get_sort_key()
+        field = self.sort_options[sort_key]
+        name = field.lstrip("-")
+        descending = field.startswith("-")
+
+        queryset = queryset.order_by(*self.get_ordering())
+
+        cursor = self._load_cursor(sort_key)
+        if cursor is not None:
+            value, last_id = cursor
+            value = queryset.model._meta.get_field(name).to_python(value)
+            if descending:
+                queryset = queryset.filter(
+                    Q(**{f"{name}__lt": value}) | Q(**{name: value, "id__lt": last_id})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{name}__gt": value}) | Q(**{name: value, "id__gt": last_id})
+                )
+        return queryset, cursor
+
+    def keyset_page(self, rows: list, page_size: int, cursor):
+        """
+        Arma la página a partir de page_size + 1 filas leídas.
+        """
+        sort_key = self.get_sort_key()
+        name = self.sort_options[sort_key].lstrip("-")
+
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        next_query = None
+        if has_next:
+            last = rows[-1]
+            next_query = self._build_query(
+                self._dump_cursor(sort_key, getattr(last, name), last.pk)
+            )
+
+        first_query = self._build_query(None) if cursor is not None else None
+        page = KeysetPage(
+            object_list=rows,
+            next_query=next_query,
+            first_query=first_query,
+        )
+        return None, page, rows, page.has_other_pages()
+
+    # -------------------------
+    # Cursor opaco
+    # -------------------------
+
+    def _dump_cursor(self, sort_key: str, value, last_id: int) -> str:
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif not isinstance(value, (int, str)):
+            value = str(value)
+        return signing.dumps(
+            {"s": sort_key, "v": value, "id": last_id},
+            salt=self.get_cursor_salt(),
+            compress=True,
+        )
+
+    def _load_cursor(self, sort_key: str):
+        raw = self.request.GET.get(self.cursor_param)
+        if not raw:
+            return None
+        try:
+            data = signing.loads(raw, salt=self.get_cursor_salt())
+        except signing.BadSignature:
+            return None
+        if data.get("s") != sort_key:
+            return None
+        return data["v"], int(data["id"])
+
+    def _build_query(self, cursor: str | None) -> str:
+        params = self.request.GET.copy()
+        params.pop(self.cursor_param, None)
+        if cursor is not None:
+            params[self.cursor_param] = cursor
+        return params.urlencode()
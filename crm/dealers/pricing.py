@@ -0,0 +1,215 @@
+"""
+Simulador de precios: "¿cuánto vale el inventario con 12% vs 18% de margen,
+por marca y año?".
+
+load_inventory() trae las columnas de costeo de los vehículos activos de un
+dealer en una sola consulta (costo = compra + servicios pagados por la
+automotora, ya acumulados en Vehicle.services_total) y las deja en arrays
+de NumPy. simulate() evalúa todos los márgenes juntos sobre una matriz
+vehículos x escenarios y la agrupa con np.add.reduceat: 100k vehículos x
+decenas de escenarios en milisegundos, sin pasar por los modelos.
+
+Misma regla que Vehicle.compute_suggested_price: los precios fijados a mano
+(price_override) no dependen del margen. Los totales nunca mezclan monedas.
+Todo se calcula en enteros (centavos y márgenes en puntos básicos), así que
+cada precio coincide con el Decimal ROUND_HALF_UP guardado en la fila.
+
+NumPy es opcional: sin él, simulate() / load_inventory() levantan
+PricingUnavailable.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Cast, Coalesce, Round
+
+from .models import CENTS, Vehicle
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Columnas por las que se puede agrupar (además de la moneda, siempre)
+GROUP_FIELDS = ("brand", "year")
+MAX_SCENARIOS = 50
+
+
+class PricingUnavailable(Exception):
+    """
+    El simulador necesita NumPy y no está instalado.
+    """
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise PricingUnavailable("El simulador de precios requiere numpy.")
+
+
+@dataclass(frozen=True)
+class Inventory:
+    """
+    Columnas de costeo de un inventario, una posición por vehículo. Los
+    montos son centavos en int64. Las columnas de agrupación se guardan
+    codificadas: codes[field] indexa labels[field].
+    """
+    cost: "np.ndarray"
+    override: "np.ndarray"
+    fixed: "np.ndarray"  # bool: tiene precio fijado a mano (override)
+    codes: dict
+    labels: dict
+
+    def __len__(self) -> int:
+        return len(self.cost)
+
+
+@dataclass(frozen=True)
+class Simulation:
+    """
+    Resultado por grupo (moneda + group_by) y escenario.
+    """
+    margins: tuple
+    group_by: tuple
+    keys: list  # [(moneda, *valores de group_by)]
+    vehicles: "np.ndarray"  # (grupos,)
+    cost: "np.ndarray"  # (grupos,) centavos
+    totals: "np.ndarray"  # (grupos, escenarios) centavos
+
+    def rows(self) -> list[dict]:
+        totals = self.totals.tolist()
+        return [
+            {
+                "currency": key[0],
+                "group": key[1:],
+                "vehicles": int(self.vehicles[i]),
+                "cost": _money(int(self.cost[i])),
+                "totals": [_money(value) for value in totals[i]],
+            }
+            for i, key in enumerate(self.keys)
+        ]
+
+    def currency_totals(self) -> list[dict]:
+        """
+        Un total por moneda y escenario (suma de los grupos).
+        """
+        totals: dict = {}
+        for i, key in enumerate(self.keys):
+            entry = totals.setdefault(key[0], [0, 0, np.zeros(len(self.margins), dtype=np.int64)])
+            entry[0] += int(self.vehicles[i])
+            entry[1] += int(self.cost[i])
+            entry[2] += self.totals[i]
+        return [
+            {
+                "currency": currency,
+                "vehicles": vehicles,
+                "cost": _money(cost),
+                "totals": [_money(value) for value in values.tolist()],
+            }
+            for currency, (vehicles, cost, values) in totals.items()
+        ]
+
+
+def _money(cents: int) -> Decimal:
+    return (Decimal(cents) * CENTS).quantize(CENTS)
+
+
+def _cents(expression):
+    return Cast(Round(expression * Value(Decimal("100"))), BigIntegerField())
+
+
+def basis_points(margin) -> int:
+    """
+    Margen en porcentaje -> puntos básicos (30.6 -> 3060). Hasta dos
+    decimales, como price_margin_percentage.
+    """
+    bp = Decimal(margin) * 100
+    if bp != bp.to_integral_value():
+        raise ValueError("Los márgenes admiten hasta 2 decimales.")
+    return int(bp)
+
+
+def load_inventory(dealer_id: int) -> Inventory:
+    """
+    Vehículos activos del dealer en una consulta. Los montos se convierten
+    a centavos enteros en SQL: no se construye un Decimal por celda.
+    """
+    _require_numpy()
+    rows = list(
+        Vehicle.objects.filter(dealer_id=dealer_id)
+        .order_by()
+        .annotate(
+            pricing_cost=_cents(
+                Coalesce(F("purchase_price"), Value(Decimal("0.00")))
+                + Coalesce(F("services_total"), Value(Decimal("0.00")))
+            ),
+            pricing_override=_cents(F("price_override")),
+        )
+        .values_list("pricing_cost", "pricing_override", "currency", *GROUP_FIELDS)
+    )
+
+    columns = list(zip(*rows)) or [()] * (2 + 1 + len(GROUP_FIELDS))
+    codes, labels = {}, {}
+    for field, values in zip(("currency", *GROUP_FIELDS), columns[2:]):
+        labels[field], codes[field] = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+        codes[field] = codes[field].reshape(-1)
+    fixed = np.asarray([value is not None for value in columns[1]], dtype=bool)
+    return Inventory(
+        cost=np.asarray(columns[0], dtype=np.int64),
+        override=np.asarray([value or 0 for value in columns[1]], dtype=np.int64),
+        fixed=fixed,
+        codes=codes,
+        labels=labels,
+    )
+
+
+def simulate(inventory: Inventory, margins, group_by=GROUP_FIELDS) -> Simulation:
+    """
+    Valor del inventario con cada margen (porcentaje), agrupado por moneda
+    y por los campos de group_by (subconjunto de GROUP_FIELDS).
+    """
+    _require_numpy()
+    margins = tuple(Decimal(m) for m in margins)
+    group_by = tuple(field for field in GROUP_FIELDS if field in group_by)
+    if not margins or len(margins) > MAX_SCENARIOS:
+        raise ValueError(f"Entre 1 y {MAX_SCENARIOS} márgenes.")
+
+    factors = 10000 + np.asarray([basis_points(m) for m in margins], dtype=np.int64)
+    # (vehículos, escenarios) en centavos: costo * (1 + margen) con
+    # ROUND_HALF_UP al centavo, como compute_suggested_price (costo y
+    # factor no negativos)
+    prices = (inventory.cost[:, None] * factors[None, :] + 5000) // 10000
+    prices[inventory.fixed] = inventory.override[inventory.fixed, None]
+
+    # Una clave entera por combinación de moneda + group_by
+    fields = ("currency", *group_by)
+    key = np.zeros(len(inventory), dtype=np.int64)
+    for field in fields:
+        key = key * len(inventory.labels[field]) + inventory.codes[field]
+    groups, inverse = np.unique(key, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    if len(inventory):
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(groups)))
+        totals = np.add.reduceat(prices[order], starts, axis=0)
+        cost = np.add.reduceat(inventory.cost[order], starts)
+    else:
+        totals = np.zeros((0, len(margins)), dtype=np.int64)
+        cost = np.zeros(0, dtype=np.int64)
+
+    keys = []
+    for value in groups.tolist():
+        parts = []
+        for field in reversed(fields):
+            value, code = divmod(value, len(inventory.labels[field]))
+            parts.append(inventory.labels[field][code])
+        keys.append(tuple(reversed(parts)))
+
+    return Simulation(
+        margins=margins,
+        group_by=group_by,
+        keys=keys,
+        vehicles=np.bincount(inverse, minlength=len(groups)),
+        cost=cost,
+        totals=totals,
+    )
@@ -0,0 +1,152 @@
+"""
+Liquidaciones de vehículos en consignación: lo que pagó el dueño
+(Payer.OWNER) frente a lo que pagó la automotora (Payer.DEALER).
+
+generate_settlements(dealer_id, period):
+1. Una consulta agrupada (vehículos LEFT JOIN servicios, GROUP BY vehículo)
+   calcula los totales de todos los vehículos en consignación del dealer
+   (y de los que ya se liquidaron en el período) y la huella de lo
+   liquidado: moneda y tipo del vehículo, filas de servicios (bajas
+   incluidas) y último updated_at, con fecha hasta el fin del período.
+2. Una consulta trae la huella de la última liquidación de cada vehículo
+   en ese período.
+3. Solo los vehículos cuya huella cambió (o sin liquidación) reciben una
+   fila nueva de Settlement (sequence + 1), con un bulk_create. Las
+   liquidaciones anteriores quedan como estaban. Un vehículo corregido a
+   propio recibe una versión que anula la liquidación (ver
+   SettlementQuerySet.current).
+"""
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.db.models import Count, Exists, Max, OuterRef, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import COSTING_FIELD, Settlement, Vehicle, VehicleService
+
+SETTLEMENT_BATCH_SIZE = 500
+# Columnas de statement_rows() guardadas en Settlement con el mismo nombre
+FINGERPRINT_FIELDS = ("currency", "ownership_type", "services_rows", "services_updated_at")
+
+
+@dataclass(frozen=True)
+class SettlementRun:
+    period: date
+    created: int
+    unchanged: int
+
+
+def period_bounds(period: date) -> tuple[date, date]:
+    """
+    (primer día, último día) del mes de period.
+    """
+    first = period.replace(day=1)
+    return first, first.replace(day=monthrange(first.year, first.month)[1])
+
+
+def previous_period(today: date | None = None) -> date:
+    """
+    Primer día del mes anterior (el que se liquida a fin de mes).
+    """
+    today = today or timezone.localdate()
+    return (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def statement_rows(dealer_id: int, period: date):
+    """
+    Totales y huella por vehículo en consignación, en una consulta. Entran
+    los vehículos activos dados de alta hasta el fin del período, más los
+    que ya tienen liquidación en el período aunque hayan dejado de estar en
+    consignación.
+    """
+    first, end = period_bounds(period)
+    until = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    zero = Value(Decimal("0.00"), output_field=COSTING_FIELD)
+
+    in_period = Q(services__service_date__lte=end)
+    active = in_period & Q(services__is_active=True)
+    owner = active & Q(services__payer=VehicleService.Payer.OWNER)
+    dealer = active & Q(services__payer=VehicleService.Payer.DEALER)
+
+    settled = Settlement.objects.filter(vehicle_id=OuterRef("pk"), period=first)
+
+    return (
+        Vehicle.objects.filter(
+            Q(ownership_type=Vehicle.Ownership.CONSIGNMENT) | Exists(settled),
+            dealer_id=dealer_id,
+            created_at__lt=until,
+        )
+        .order_by("pk")
+        .values("pk", "currency", "ownership_type")
+        .annotate(
+            owner_paid=Coalesce(Sum("services__amount", filter=owner), zero),
+            dealer_paid=Coalesce(Sum("services__amount", filter=dealer), zero),
+            owner_services_count=Count("services", filter=owner),
+            dealer_services_count=Count("services", filter=dealer),
+            services_rows=Count("services", filter=in_period),
+            services_updated_at=Max("services__updated_at", filter=in_period),
+        )
+    )
+
+
+def generate_settlements(dealer_id: int, period: date, force: bool = False) -> SettlementRun:
+    """
+    Liquida el período para todos los vehículos en consignación del dealer.
+    Con force=True se genera una fila nueva aunque la huella no haya cambiado.
+    """
+    period, _ = period_bounds(period)
+    latest = {
+        vehicle_id: (sequence, fingerprint)
+        for vehicle_id, sequence, *fingerprint in (
+            Settlement.objects.filter(dealer_id=dealer_id, period=period)
+            .order_by("vehicle_id", "sequence")
+            .values_list("vehicle_id", "sequence", *FINGERPRINT_FIELDS)
+        )
+    }
+
+    settlements = []
+    unchanged = 0
+    for row in statement_rows(dealer_id, period):
+        previous = latest.get(row["pk"])
+        fingerprint = [row[field] for field in FINGERPRINT_FIELDS]
+        if previous is not None and not force and previous[1] == fingerprint:
+            unchanged += 1
+            continue
+        settlements.append(Settlement(
+            dealer_id=dealer_id,
+            vehicle_id=row["pk"],
+            period=period,
+            sequence=previous[0] + 1 if previous is not None else 1,
+            currency=row["currency"],
+            ownership_type=row["ownership_type"],
+            owner_paid=row["owner_paid"],
+            dealer_paid=row["dealer_paid"],
+            owner_services_count=row["owner_services_count"],
+            dealer_services_count=row["dealer_services_count"],
+            services_rows=row["services_rows"],
+            services_updated_at=row["services_updated_at"],
+        ))
+
+    # Todo o nada: dos corridas simultáneas chocan en la restricción única
+    with transaction.atomic(using=router.db_for_write(Settlement)):
+        Settlement.objects.bulk_create(settlements, batch_size=SETTLEMENT_BATCH_SIZE)
+    return SettlementRun(period=period, created=len(settlements), unchanged=unchanged)
+
+
+def period_totals(queryset) -> list[dict]:
+    """
+    Totales de un listado de liquidaciones, uno por moneda.
+    """
+    return list(
+        queryset.order_by("currency")
+        .values("currency")
+        .annotate(
+            vehicles=Count("pk"),
+            owner_paid=Sum("owner_paid"),
+            dealer_paid=Sum("dealer_paid"),
+        )
+    )
@@ -0,0 +1,77 @@
+// Selector de vehículo con búsqueda (VehicleAutocompleteWidget).
+// Consulta dealers:vehicle_autocomplete mientras se escribe y guarda el id
+// elegido en el input oculto; el texto solo sirve para buscar.
+(function () {
+    "use strict";
+
+    const DELAY_MS = 200;
+
+    function setup(root) {
+        const url = root.dataset.url;
+        const value = root.querySelector("[data-autocomplete-value]");
+        const input = root.querySelector("[data-autocomplete-input]");
+        const results = root.querySelector("[data-autocomplete-results]");
+        let timer = null;
+        let controller = null;
+
+        function close() {
+            results.classList.add("d-none");
+            results.replaceChildren();
+        }
+
+        function show(items) {
+            results.replaceChildren();
+            for (const item of items) {
+                const button = document.createElement("button");
+                button.type = "button";
+                button.className = "list-group-item list-group-item-action";
+                button.textContent = item.text;
+                button.addEventListener("mousedown", (event) => {
+                    event.preventDefault();
+                    value.value = item.id;
+                    input.value = item.text;
+                    close();
+                });
+                results.appendChild(button);
+            }
+            results.classList.toggle("d-none", items.length === 0);
+        }
+
+        async function search(term) {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            try {
+                const response = await fetch(`${url}?q=${encodeURIComponent(term)}`, {
+                    signal: controller.signal,
+                    headers: {"Accept": "application/json"},
+                });
+                if (response.ok) {
+                    show((await response.json()).results);
+                }
+            } catch (error) {
+                if (error.name !== "AbortError") {
+                    throw error;
+                }
+            }
+        }
+
+        input.addEventListener("input", () => {
+            // El texto cambió: el id anterior ya no corresponde
+            value.value = "";
+            clearTimeout(timer);
+            const term = input.value.trim();
+            if (!term) {
+                close();
+                return;
+            }
+            timer = setTimeout(() => search(term), DELAY_MS);
+        });
+        input.addEventListener("blur", close);
+    }
+
+    document.addEventListener("DOMContentLoaded", () => {
+        document.querySelectorAll("[data-vehicle-autocomplete]").forEach(setup);
+    });
+})();
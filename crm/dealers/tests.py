@@ -1,3 +1,1692 @@
-from django.test import TestCase
+import csv
+import importlib.util
+import os
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from accounts.models import User
+from core.fragments import data_version, fragment_cache_stats
+from core.jobs import Worker
+from core.purge import purge
+
+from . import pricing
+from .currency import MissingExchangeRate, exchange_rate
+from .exports import SERVICE_EXPORT_COLUMNS, VEHICLE_EXPORT_COLUMNS, _format
+from .settlements import generate_settlements, statement_rows
+from .views import AsyncVehicleListView, VehicleListView
+from .models import (
+    Dealer,
+    DealerStats,
+    ExchangeRate,
+    Settlement,
+    Vehicle,
+    VehicleQuerySet,
+    VehicleService,
+    current_month,
+    refresh_dealer_stats,
+    to_cents,
+)
+
+
+FULL_SCAN = re.compile(r"\bSCAN (\w+)(?! USING (COVERING )?INDEX)(?! USING INTEGER PRIMARY KEY)")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)")
+SHARDED = "shard_1" in settings.DATABASES
+
+
+class ServicesRollupTests(TestCase):
+    """
+    Los acumulados de servicios en Vehicle los escriben los servicios;
+    reconcile_vehicle_costs corrige los desvíos.
+    """
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Acumulados",
+            rut="RUT-ROLLUP",
+            phone="099000000",
+            whatsapp="099000000",
+            email="rollup@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        DealerStats.for_dealer(self.dealer.pk)
+        self.vehicle = Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("1000.00"),
+        )
+
+    def add_service(self, amount="100.00"):
+        return VehicleService.objects.create(
+            vehicle_id=self.vehicle.pk, description="Service", amount=Decimal(amount), service_date=current_month(),
+        )
+
+    def test_stale_instance_does_not_overwrite_rollup(self):
+        stale = Vehicle.objects.get(pk=self.vehicle.pk)
+        self.add_service()
+        self.add_service()
+
+        stale.brand = "Renault"
+        stale.save()
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+        self.assertEqual((vehicle.brand, vehicle.services_total, vehicle.services_count), ("Renault", Decimal("200.00"), 2))
+        self.assertEqual(vehicle.suggested_price, Decimal("1320.00"))
+
+        stale.purchase_price = Decimal("2000.00")
+        stale.save(update_fields=["purchase_price"])
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.suggested_price, Decimal("2420.00"))
+        stats = DealerStats.objects.get(dealer=self.dealer)
+        self.assertEqual(stats.inventory_cost_usd, Decimal("2200.00"))
+        refresh_dealer_stats({self.dealer.pk})
+        stats.refresh_from_db()
+        self.assertEqual(stats.inventory_cost_usd, Decimal("2200.00"))
+
+    def test_reconcile_fixes_drift(self):
+        self.add_service("50.00")
+        VehicleService.objects.create(
+            vehicle=self.vehicle, description="Owner", amount=Decimal("30.00"),
+            payer=VehicleService.Payer.OWNER, service_date=current_month(),
+        )
+        other = Vehicle.objects.create(
+            dealer=self.dealer, brand="VW", model="Gol", year=2016, purchase_price=Decimal("100.00"),
+        )
+        # Desvío a propósito, sin pasar por los servicios
+        Vehicle._base_manager.filter(pk=self.vehicle.pk).update(services_total=Decimal("999.00"), services_count=7)
+
+        out = StringIO()
+        call_command("reconcile_vehicle_costs", "--dry-run", stdout=out)
+        self.assertIn(f"Vehículos con desvío: [{self.vehicle.pk}]", out.getvalue())
+        self.assertIn("2 vehículos revisados, 1 desvíos detectados", out.getvalue())
+        self.assertEqual(Vehicle.objects.get(pk=self.vehicle.pk).services_count, 7)
+
+        out = StringIO()
+        call_command("reconcile_vehicle_costs", "--batch-size", "1", stdout=out)
+        self.assertIn("2 vehículos revisados, 1 desvíos corregidos", out.getvalue())
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+        self.assertEqual((vehicle.services_total, vehicle.services_count), (Decimal("50.00"), 2))
+        self.assertEqual(vehicle.suggested_price, Decimal("1155.00"))
+        other.refresh_from_db()
+        self.assertEqual(other.services_count, 0)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Regresión de planes de consulta (SQLite): las pantallas por tenant
+    no deben hacer full scans ni ordenar en una tabla temporal.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        dealers = [
+            Dealer.objects.create(
+                name=f"Dealer {i}",
+                rut=f"RUT-{i}",
+                phone="099000000",
+                whatsapp="099000000",
+                email=f"dealer{i}@example.com",
+                default_margin_percentage=Decimal("15.00"),
+            )
+            for i in range(3)
+        ]
+        cls.dealer = dealers[0]
+        cls.user = User.objects.create_user(
+            username="plan", password="plan", dealer=cls.dealer
+        )
+
+        for dealer in dealers:
+            vehicles = Vehicle.objects.bulk_create([
+                Vehicle(
+                    dealer=dealer,
+                    brand="Fiat" if i % 2 else "Volkswagen",
+                    model="Uno",
+                    year=2010 + i % 5,
+                    purchase_price=Decimal("1000.00") + i,
+                )
+                for i in range(60)
+            ])
+            VehicleService.objects.bulk_create([
+                VehicleService(
+                    vehicle=vehicle,
+                    description="Service",
+                    amount=Decimal("50.00"),
+                    payer=VehicleService.Payer.DEALER if i % 2 else VehicleService.Payer.OWNER,
+                    service_date=date(2025, 1, 1) + timedelta(days=i),
+                )
+                for vehicle in vehicles
+                for i in range(4)
+            ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def explain(self, sql: str, params=()) -> str:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return "\n".join(row[-1] for row in cursor.fetchall())
+
+    def view_plans(self, url: str) -> list[tuple[str, str]]:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = [
+            (query["sql"], self.explain(query["sql"]))
+            for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT") and "dealers_" in query["sql"]
+        ]
+        self.assertTrue(plans)
+        return plans
+
+    def assertIndexedPlan(self, sql: str, plan: str, allow_temp_sort: bool = False):
+        self.assertIsNone(FULL_SCAN.search(plan), f"Full scan:\n{plan}\n{sql}")
+        if not allow_temp_sort:
+            self.assertIsNone(TEMP_SORT.search(plan), f"Temp B-tree:\n{plan}\n{sql}")
+
+    def test_vehicle_list_plan(self):
+        for url in (
+            reverse("dealers:vehicle_list"),
+            reverse("dealers:vehicle_list") + "?brand=Fi",
+            reverse("dealers:vehicle_list") + "?sort=suggested_desc&max_price=1200",
+        ):
+            for sql, plan in self.view_plans(url):
+                self.assertIndexedPlan(sql, plan)
+
+    def test_vehicle_list_next_page_plan(self):
+        response = self.client.get(reverse("dealers:vehicle_list"))
+        next_query = response.context["page_obj"].next_query
+        self.assertIsNotNone(next_query)
+        for sql, plan in self.view_plans(reverse("dealers:vehicle_list") + "?" + next_query):
+            self.assertIndexedPlan(sql, plan)
+
+    def test_vehicle_service_list_plan(self):
+        for url in (
+            reverse("dealers:vehicle_service_list"),
+            reverse("dealers:vehicle_service_list") + "?payer=DEALER&date_from=2025-01-02",
+        ):
+            for sql, plan in self.view_plans(url):
+                self.assertIndexedPlan(sql, plan)
+
+    def test_total_services_cost_plan(self):
+        vehicle = Vehicle.objects.filter(dealer=self.dealer).first()
+        queryset = vehicle.services.filter(
+            payer=VehicleService.Payer.DEALER,
+            is_active=True,
+        ).order_by().values("amount")
+        sql, params = queryset.query.sql_with_params()
+        plan = self.explain(sql, params)
+        self.assertIndexedPlan(sql, plan)
+        self.assertIn("COVERING INDEX service_vehicle_payer_idx", plan)
+
+
+class DealerStatsTests(TestCase):
+    """
+    Los contadores mantenidos por deltas deben coincidir con un recálculo completo.
+    """
+
+    STATS_FIELDS = (
+        "vehicles_in_stock",
+        "consignment_count",
+        "owned_count",
+        "inventory_cost_usd",
+        "inventory_cost_uyu",
+        "services_month",
+        "services_month_count",
+        "users_count",
+    )
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Stats",
+            rut="RUT-STATS",
+            phone="099000000",
+            whatsapp="099000000",
+            email="stats@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.stats = DealerStats.for_dealer(self.dealer.pk)
+
+    def snapshot(self):
+        return DealerStats.objects.filter(dealer=self.dealer).values(*self.STATS_FIELDS).get()
+
+    def assertStatsConsistent(self):
+        maintained = self.snapshot()
+        refresh_dealer_stats({self.dealer.pk})
+        self.assertEqual(maintained, self.snapshot())
+
+    def make_vehicle(self, **kwargs):
+        values = {
+            "dealer": self.dealer,
+            "brand": "Fiat",
+            "model": "Uno",
+            "year": 2015,
+            "purchase_price": Decimal("1000.00"),
+        }
+        values.update(kwargs)
+        return Vehicle.objects.create(**values)
+
+    def test_single_row_writes_apply_deltas(self):
+        owned = self.make_vehicle()
+        consigned = self.make_vehicle(
+            ownership_type=Vehicle.Ownership.CONSIGNMENT,
+            currency=Vehicle.Currency.UYU,
+        )
+        service = VehicleService.objects.create(
+            vehicle=owned,
+            description="Service",
+            amount=Decimal("50.00"),
+            service_date=current_month(),
+        )
+        stats = self.snapshot()
+        self.assertEqual((stats["vehicles_in_stock"], stats["consignment_count"]), (2, 1))
+        self.assertEqual(stats["inventory_cost_usd"], Decimal("1050.00"))
+        self.assertEqual(stats["services_month_count"], 1)
+        self.assertStatsConsistent()
+
+        service.service_date = current_month() - timedelta(days=1)
+        service.save()
+        consigned.is_active = False
+        consigned.save()
+        self.assertEqual(self.snapshot()["services_month_count"], 0)
+        self.assertStatsConsistent()
+
+        service.delete()
+        owned.delete()
+        self.assertEqual(self.snapshot()["vehicles_in_stock"], 0)
+        self.assertStatsConsistent()
+
+    def test_bulk_writes_refresh_dealer(self):
+        vehicles = Vehicle.objects.bulk_create([
+            Vehicle(dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("100.00"))
+            for _ in range(3)
+        ])
+        VehicleService.objects.bulk_create([
+            VehicleService(vehicle=v, description="S", amount=Decimal("10.00"), service_date=current_month())
+            for v in vehicles
+        ])
+        self.assertEqual(self.snapshot()["inventory_cost_usd"], Decimal("330.00"))
+        self.assertStatsConsistent()
+
+        Vehicle.objects.filter(pk=vehicles[0].pk).update(ownership_type=Vehicle.Ownership.CONSIGNMENT)
+        VehicleService.objects.filter(vehicle=vehicles[1]).update(is_active=False)
+        Vehicle.objects.filter(pk=vehicles[2].pk).delete()
+        stats = self.snapshot()
+        self.assertEqual((stats["vehicles_in_stock"], stats["consignment_count"]), (2, 1))
+        self.assertEqual(stats["services_month_count"], 1)
+        self.assertStatsConsistent()
+
+    def test_moving_vehicle_moves_its_services(self):
+        other = Dealer.objects.create(
+            name="Destino", rut="RUT-DEST", phone="0", whatsapp="0", email="dest@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        saved, updated = self.make_vehicle(), self.make_vehicle()
+        for vehicle in (saved, updated):
+            VehicleService.objects.create(
+                vehicle=vehicle, description="S", amount=Decimal("10.00"), service_date=current_month(),
+            )
+
+        saved.dealer = other
+        saved.save()
+        Vehicle.objects.filter(dealer=self.dealer, pk=updated.pk).update(dealer=other)
+
+        self.assertEqual(
+            set(VehicleService.objects.values_list("dealer_id", flat=True)), {other.pk}
+        )
+        self.assertEqual(self.snapshot()["services_month_count"], 0)
+        self.assertEqual(DealerStats.objects.get(dealer=other).services_month_count, 2)
+        self.assertStatsConsistent()
+
+    def test_user_writes_apply_deltas(self):
+        other = Dealer.objects.create(
+            name="Destino", rut="RUT-DEST", phone="0", whatsapp="0", email="dest@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        staying = User.objects.create_user(username="u1", password="x", dealer=self.dealer)
+        moving = User.objects.create_user(username="u2", password="x", dealer=self.dealer)
+        User.objects.create_user(username="system", password="x")
+        self.assertEqual(self.snapshot()["users_count"], 2)
+
+        moving = User.objects.get(pk=moving.pk)
+        moving.dealer = other
+        moving.save()
+        staying.is_active = False
+        staying.save(update_fields=["is_active"])
+        self.assertEqual(self.snapshot()["users_count"], 1)
+        self.assertEqual(DealerStats.objects.get(dealer=other).users_count, 1)
+
+        moving.delete()
+        self.assertEqual(DealerStats.objects.get(dealer=other).users_count, 0)
+        self.assertStatsConsistent()
+
+    def test_dashboard_reads_single_row(self):
+        self.make_vehicle()
+        user = User.objects.create_user(username="stats", password="stats", dealer=self.dealer)
+        self.client.force_login(user)
+        self.client.get(reverse("dashboard"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.context["stats"].vehicles_in_stock, 1)
+        self.assertEqual(response.context["stats"].users_count, 1)
+        stats_queries = [q["sql"] for q in ctx.captured_queries if "dealers_" in q["sql"]]
+        self.assertEqual(len(stats_queries), 1, stats_queries)
+        self.assertIn("dealers_dealerstats", stats_queries[0])
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"]])
+
+
+@override_settings(ROOT_URLCONF="crm.urls_asgi")
+class AsyncListViewTests(TestCase):
+    """
+    Los listados async (perfil ASGI) paginan igual que los sync.
+    """
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Async",
+            rut="RUT-ASYNC",
+            phone="099000000",
+            whatsapp="099000000",
+            email="async@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.user = User.objects.create_user(username="async", password="async", dealer=self.dealer)
+        self.vehicles = [
+            Vehicle.objects.create(
+                dealer=self.dealer, brand="Fiat", model="Uno", year=2010 + i, purchase_price=Decimal("100.00"),
+            )
+            for i in range(5)
+        ]
+        for vehicle in self.vehicles:
+            VehicleService.objects.create(
+                vehicle=vehicle, description="Service", amount=Decimal("10.00"), service_date=current_month(),
+            )
+
+    async def test_vehicle_list_keyset_pages(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse("dealers:vehicle_list")
+        seen = []
+        query = "sort=year_asc"
+        with mock.patch.object(AsyncVehicleListView, "paginate_by", 2):
+            while query is not None:
+                response = await self.async_client.get(f"{url}?{query}")
+                self.assertEqual(response.status_code, 200)
+                seen += [vehicle.year for vehicle in response.context["vehicles"]]
+                query = response.context["page_obj"].next_query
+        self.assertEqual(seen, [2010, 2011, 2012, 2013, 2014])
+
+    async def test_service_list(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("dealers:vehicle_service_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["services"]), 5)
+        self.assertContains(response, "Fiat")
+
+    async def test_context_may_query_the_database(self):
+        # get_context_data es sync: una consulta en el event loop levantaría SynchronousOnlyOperation
+        original = VehicleListView.get_context_data
+
+        def get_context_data(view, **kwargs):
+            context = original(view, **kwargs)
+            context["dealer_count"] = Dealer.objects.count()
+            return context
+
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(VehicleListView, "get_context_data", get_context_data):
+            response = await self.async_client.get(reverse("dealers:vehicle_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["dealer_count"], 1)
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    El cursor recorre el listado completo sin repetir filas (también con
+    empates en el campo de orden) y solo vale para el tenant que lo generó.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.dealer, self.other = [
+            Dealer.objects.create(
+                name=name,
+                rut=f"RUT-{name.upper()}",
+                phone="099000000",
+                whatsapp="099000000",
+                email=f"{name}@example.com",
+                default_margin_percentage=Decimal("10.00"),
+            )
+            for name in ("keyset", "ajeno")
+        ]
+        self.user = User.objects.create_user(username="keyset", password="x", dealer=self.dealer)
+        self.other_user = User.objects.create_user(username="ajeno", password="x", dealer=self.other)
+        self.vehicles = [
+            Vehicle.objects.create(
+                dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal(price),
+            )
+            for price in ("100.00", "300.00", "200.00", "100.00", "200.00")
+        ]
+        Vehicle.objects.create(
+            dealer=self.other, brand="VW", model="Gol", year=2016, purchase_price=Decimal("50.00"),
+        )
+        self.url = reverse("dealers:vehicle_list")
+        patcher = mock.patch.object(VehicleListView, "paginate_by", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, query: str):
+        response = self.client.get(f"{self.url}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def next_cursor(self) -> str:
+        self.client.force_login(self.user)
+        page = self.get("sort=price_desc").context["page_obj"]
+        return QueryDict(page.next_query)["cursor"]
+
+    def test_pages_cover_inventory_once(self):
+        self.client.force_login(self.user)
+        seen, pages = [], 0
+        query = "sort=price_desc"
+        while query is not None:
+            response = self.get(query)
+            page = response.context["page_obj"]
+            self.assertEqual(page.has_previous, pages > 0)
+            seen += [vehicle.pk for vehicle in response.context["vehicles"]]
+            query = page.next_query
+            pages += 1
+
+        expected = sorted(self.vehicles, key=lambda v: (-v.purchase_price, -v.pk))
+        self.assertEqual(seen, [vehicle.pk for vehicle in expected])
+        self.assertEqual(pages, 3)
+
+    def test_foreign_or_tampered_cursor_restarts(self):
+        cursor = self.next_cursor()
+        first_page = [v.pk for v in self.get("sort=price_desc").context["vehicles"]]
+
+        # Otro tenant: la firma lleva el dealer, el cursor no se acepta
+        self.client.force_login(self.other_user)
+        response = self.get(urlencode({"sort": "price_desc", "cursor": cursor}))
+        self.assertFalse(response.context["page_obj"].has_previous)
+        self.assertEqual([v.dealer_id for v in response.context["vehicles"]], [self.other.pk])
+
+        self.client.force_login(self.user)
+        tampered = cursor[:-2] + ("AA" if not cursor.endswith("AA") else "BB")
+        for query in (
+            {"sort": "price_desc", "cursor": tampered},
+            # Cursor de otro orden
+            {"sort": "price_asc", "cursor": cursor},
+        ):
+            response = self.get(urlencode(query))
+            self.assertFalse(response.context["page_obj"].has_previous, query)
+        response = self.get(urlencode({"sort": "price_desc", "cursor": tampered}))
+        self.assertEqual([v.pk for v in response.context["vehicles"]], first_page)
+
+
+class FragmentCacheTests(TestCase):
+    """
+    Las filas del listado de vehículos se cachean por versión de datos del
+    dealer; cualquier escritura del tenant la incrementa al confirmar.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.dealer = Dealer.objects.create(
+            name="Fragmentos",
+            rut="RUT-FRAG",
+            phone="099000000",
+            whatsapp="099000000",
+            email="frag@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.user = User.objects.create_user(username="frag", password="frag", dealer=self.dealer)
+        self.vehicles = [
+            Vehicle.objects.create(
+                dealer=self.dealer, brand="Fiat", model="Uno", year=2010 + i, purchase_price=Decimal("100.00"),
+            )
+            for i in range(3)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse("dealers:vehicle_list")
+
+    def get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_unchanged_inventory_renders_from_cache(self):
+        first = self.get()
+        second = self.get()
+
+        self.assertIn('fragments;desc="0 hits, 3 misses"', first["Server-Timing"])
+        self.assertIn('fragments;desc="3 hits, 0 misses"', second["Server-Timing"])
+        self.assertEqual(first.context["vehicle_rows"], second.context["vehicle_rows"])
+        self.assertEqual(fragment_cache_stats()["hits"], 3)
+        self.assertEqual(fragment_cache_stats()["misses"], 3)
+
+    def test_writes_bump_version_on_commit(self):
+        before = data_version(self.dealer.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle = self.vehicles[0]
+            vehicle.brand = "Renault"
+            vehicle.save()
+            # Aún sin confirmar: la versión no cambia
+            self.assertEqual(data_version(self.dealer.pk), before)
+        self.assertEqual(data_version(self.dealer.pk), before + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.filter(dealer=self.dealer).update(model="Clio")
+        with self.captureOnCommitCallbacks(execute=True):
+            VehicleService.objects.create(
+                vehicle=vehicle, description="Service", amount=Decimal("10.00"), service_date=current_month(),
+            )
+        self.assertEqual(data_version(self.dealer.pk), before + 3)
+
+    def test_margin_change_rerenders_rows(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealer.default_margin_percentage = Decimal("50.00")
+            self.dealer.save()
+
+        response = self.get()
+        self.assertIn('fragments;desc="0 hits, 3 misses"', response["Server-Timing"])
+        self.assertContains(response, "150,00", count=3)
+        self.assertNotContains(response, "110,00")
+
+    def test_stats_command(self):
+        # LocMem: los contadores son por proceso, el comando no los puede ver
+        with self.assertRaisesMessage(CommandError, "caché compartida"):
+            call_command("fragment_cache_stats", stdout=StringIO())
+
+        with tempfile.TemporaryDirectory() as location, self.settings(
+            CACHES={
+                **settings.CACHES,
+                "fragments": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                },
+            },
+            FRAGMENT_CACHE_ALIAS="fragments",
+        ):
+            self.get()
+            self.get()
+            out = StringIO()
+            call_command("fragment_cache_stats", "--reset", stdout=out)
+            self.assertIn("Aciertos: 3  Fallos: 3", out.getvalue())
+            self.assertEqual(fragment_cache_stats()["hits"], 0)
+
+
+class SuggestedPriceTests(TestCase):
+    """
+    El precio sugerido se guarda en la fila: las escrituras de sus insumos
+    lo recalculan y un cambio de margen reprecia el inventario en un UPDATE.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.dealer = Dealer.objects.create(
+            name="Precios",
+            rut="RUT-PRECIOS",
+            phone="099000000",
+            whatsapp="099000000",
+            email="precios@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.vehicles = [
+            Vehicle.objects.create(
+                dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal(price),
+            )
+            for price in ("100.00", "200.00", "300.00")
+        ]
+
+    def prices(self) -> list[Decimal]:
+        return list(
+            Vehicle.objects.filter(dealer=self.dealer).order_by("purchase_price")
+            .values_list("suggested_price", flat=True)
+        )
+
+    def test_create_stores_price_and_margin(self):
+        self.assertEqual(self.prices(), [Decimal("110.00"), Decimal("220.00"), Decimal("330.00")])
+        self.assertEqual(self.vehicles[0].price_margin_percentage, Decimal("10.00"))
+
+        created = Vehicle.objects.bulk_create([
+            Vehicle(dealer=self.dealer, brand="VW", model="Gol", year=2016, purchase_price=Decimal("50.00")),
+        ])
+        self.assertEqual(created[0].suggested_price, Decimal("55.00"))
+
+    def costing(self, vehicle) -> tuple:
+        return vehicle.total_services_cost(), vehicle.total_cost(), vehicle.suggested_sale_price()
+
+    def test_with_costing_matches_per_object_methods(self):
+        half_cent = Vehicle.objects.create(
+            dealer=self.dealer, brand="Peugeot", model="208", year=2020,
+            purchase_price=Decimal("4512.50"), price_margin_percentage=Decimal("30.60"),
+        )
+        services = self.vehicles[0]
+        for amount, payer, active in (
+            ("10.00", VehicleService.Payer.DEALER, True),
+            ("5.25", VehicleService.Payer.DEALER, True),
+            ("99.00", VehicleService.Payer.OWNER, True),
+            ("7.00", VehicleService.Payer.DEALER, False),
+        ):
+            VehicleService.objects.create(
+                vehicle=services, description="S", amount=Decimal(amount), payer=payer,
+                is_active=active, service_date=current_month(),
+            )
+        self.vehicles[2].price_override = Decimal("999.99")
+        self.vehicles[2].save()
+        # Repreciado en SQL (UPDATE): mismo redondeo que compute_suggested_price
+        Vehicle.objects.filter(pk=self.vehicles[1].pk).update(
+            purchase_price=Decimal("4512.50"), price_margin_percentage=Decimal("30.60"),
+        )
+
+        with self.assertNumQueries(1):
+            annotated = {
+                vehicle.pk: self.costing(vehicle)
+                for vehicle in Vehicle.objects.filter(dealer=self.dealer).with_costing()
+            }
+        for vehicle in Vehicle.objects.filter(dealer=self.dealer):
+            self.assertEqual(annotated[vehicle.pk], self.costing(vehicle), vehicle)
+            self.assertEqual(vehicle.suggested_sale_price(), vehicle.compute_suggested_price(), vehicle)
+
+        self.assertEqual(annotated[half_cent.pk][2], Decimal("5893.33"))
+        self.assertEqual(annotated[services.pk][:2], (Decimal("15.25"), Decimal("115.25")))
+        self.assertEqual(annotated[self.vehicles[1].pk][2], Decimal("5893.33"))
+
+    def test_margin_change_reprices_in_one_update(self):
+        override = self.vehicles[2]
+        override.price_override = Decimal("999.00")
+        override.save()
+
+        dealer = Dealer.objects.get(pk=self.dealer.pk)
+        dealer.default_margin_percentage = Decimal("20.00")
+        with CaptureQueriesContext(connection) as ctx:
+            dealer.save()
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "dealers_vehicle"')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(self.prices(), [Decimal("120.00"), Decimal("240.00"), Decimal("999.00")])
+        override.refresh_from_db()
+        self.assertEqual(override.price_margin_percentage, Decimal("20.00"))
+
+    def test_cleared_override_uses_current_margin(self):
+        vehicle = Vehicle.objects.create(
+            dealer=self.dealer, brand="VW", model="Gol", year=2016, purchase_price=Decimal("1000.00"),
+        )
+        self.assertEqual(vehicle.suggested_price, Decimal("1100.00"))
+        vehicle.price_override = Decimal("5000.00")
+        vehicle.save()
+
+        dealer = Dealer.objects.get(pk=self.dealer.pk)
+        dealer.default_margin_percentage = Decimal("20.00")
+        dealer.save()
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.suggested_price, Decimal("5000.00"))
+
+        vehicle.price_override = None
+        vehicle.save()
+        vehicle.refresh_from_db()
+        self.assertEqual(
+            (vehicle.price_margin_percentage, vehicle.suggested_price), (Decimal("20.00"), Decimal("1200.00"))
+        )
+
+    def test_unchanged_margin_does_not_reprice(self):
+        dealer = Dealer.objects.get(pk=self.dealer.pk)
+        dealer.name = "Otro nombre"
+        with CaptureQueriesContext(connection) as ctx:
+            dealer.save()
+        self.assertFalse([q for q in ctx.captured_queries if "dealers_vehicle" in q["sql"]])
+
+    def test_input_writes_recompute_price(self):
+        vehicle = self.vehicles[0]
+        VehicleService.objects.create(
+            vehicle=vehicle, description="Service", amount=Decimal("50.00"), service_date=current_month(),
+        )
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.suggested_price, Decimal("165.00"))
+
+        Vehicle.objects.filter(pk=vehicle.pk).update(purchase_price=Decimal("150.00"))
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.suggested_price, Decimal("220.00"))
+
+        vehicle.purchase_price = Decimal("250.00")
+        vehicle.save(update_fields=["purchase_price"])
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.suggested_price, Decimal("330.00"))
+        self.assertEqual(vehicle.suggested_price, vehicle.compute_suggested_price())
+
+    def test_list_sorts_and_filters_by_suggested_price(self):
+        user = User.objects.create_user(username="precios", password="precios", dealer=self.dealer)
+        self.client.force_login(user)
+        url = reverse("dealers:vehicle_list")
+
+        response = self.client.get(url, {"sort": "suggested_desc"})
+        self.assertEqual([v.pk for v in response.context["vehicles"]], [v.pk for v in reversed(self.vehicles)])
+
+        response = self.client.get(url, {"max_price": "220"})
+        self.assertEqual({v.pk for v in response.context["vehicles"]}, {v.pk for v in self.vehicles[:2]})
+
+
+@skipUnless(pricing.np is not None, "Requiere numpy")
+class PricingSimulatorTests(TestCase):
+    """
+    El simulador evalúa varios márgenes sobre todo el inventario con la
+    misma regla que el precio guardado en cada vehículo.
+    """
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Simulador",
+            rut="RUT-SIM",
+            phone="099000000",
+            whatsapp="099000000",
+            email="sim@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        specs = [
+            ("Fiat", 2015, "USD", "100.00"),
+            ("Fiat", 2015, "USD", "200.00"),
+            ("Fiat", 2018, "USD", "333.33"),
+            ("VW", 2015, "UYU", "1000.00"),
+        ]
+        self.vehicles = [
+            Vehicle.objects.create(
+                dealer=self.dealer, brand=brand, model="X", year=year, currency=currency, purchase_price=Decimal(price),
+            )
+            for brand, year, currency, price in specs
+        ]
+        VehicleService.objects.create(
+            vehicle=self.vehicles[0], description="Service", amount=Decimal("50.00"), service_date=current_month(),
+        )
+
+    def test_matches_stored_prices(self):
+        with self.assertNumQueries(1):
+            inventory = pricing.load_inventory(self.dealer.pk)
+        simulation = pricing.simulate(inventory, [Decimal("10.00"), Decimal("25.00")])
+
+        rows = {(row["currency"], *row["group"]): row for row in simulation.rows()}
+        self.assertEqual(set(rows), {("USD", "Fiat", 2015), ("USD", "Fiat", 2018), ("UYU", "VW", 2015)})
+        fiat_2015 = rows[("USD", "Fiat", 2015)]
+        self.assertEqual(fiat_2015["vehicles"], 2)
+        self.assertEqual(fiat_2015["cost"], Decimal("350.00"))
+        self.assertEqual(fiat_2015["totals"], [Decimal("385.00"), Decimal("437.50")])
+
+        stored = sum(
+            vehicle.suggested_price
+            for vehicle in Vehicle.objects.filter(dealer=self.dealer, currency="USD")
+        )
+        usd = next(row for row in simulation.currency_totals() if row["currency"] == "USD")
+        self.assertEqual(usd["totals"][0], stored)
+
+    def test_override_ignores_margin(self):
+        vehicle = self.vehicles[3]
+        vehicle.price_override = Decimal("5000.00")
+        vehicle.save()
+
+        simulation = pricing.simulate(pricing.load_inventory(self.dealer.pk), [0, 50], group_by=())
+        uyu = next(row for row in simulation.rows() if row["currency"] == "UYU")
+        self.assertEqual(uyu["totals"], [Decimal("5000.00"), Decimal("5000.00")])
+
+    def test_empty_inventory(self):
+        Vehicle.objects.filter(dealer=self.dealer).update(is_active=False)
+        simulation = pricing.simulate(pricing.load_inventory(self.dealer.pk), [10])
+        self.assertEqual(simulation.rows(), [])
+        self.assertEqual(simulation.currency_totals(), [])
+
+    def test_large_inventory_in_batch(self):
+        rng = pricing.np.random.default_rng(0)
+        size = 100_000
+        inventory = pricing.Inventory(
+            cost=rng.integers(100_000, 6_000_000, size),
+            override=pricing.np.zeros(size, dtype=pricing.np.int64),
+            fixed=pricing.np.zeros(size, dtype=bool),
+            codes={
+                "currency": rng.integers(0, 2, size),
+                "brand": rng.integers(0, 40, size),
+                "year": rng.integers(0, 20, size),
+            },
+            labels={
+                "currency": pricing.np.array(["UYU", "USD"], dtype=object),
+                "brand": pricing.np.array([f"Marca {i}" for i in range(40)], dtype=object),
+                "year": pricing.np.array(list(range(2005, 2025)), dtype=object),
+            },
+        )
+        margins = [Decimal(m) for m in range(0, 36)]
+
+        started = time.perf_counter()
+        simulation = pricing.simulate(inventory, margins)
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+        self.assertEqual(simulation.totals.shape, (len(simulation.keys), len(margins)))
+        self.assertEqual(int(simulation.vehicles.sum()), size)
+        self.assertEqual(simulation.totals[:, 0].sum(), inventory.cost.sum())
+
+    def test_rounding_matches_stored_price(self):
+        Vehicle.objects.filter(dealer=self.dealer).update(is_active=False)
+        vehicle = Vehicle.objects.create(
+            dealer=self.dealer,
+            brand="Peugeot",
+            model="208",
+            year=2020,
+            purchase_price=Decimal("4512.50"),
+            price_margin_percentage=Decimal("30.60"),
+        )
+        self.assertEqual(vehicle.suggested_price, Decimal("5893.33"))
+
+        simulation = pricing.simulate(pricing.load_inventory(self.dealer.pk), ["30.6"], group_by=())
+        self.assertEqual(simulation.rows()[0]["totals"], [Decimal("5893.33")])
+        with self.assertRaises(ValueError):
+            pricing.simulate(pricing.load_inventory(self.dealer.pk), ["30.625"])
+
+    def test_view_and_command(self):
+        user = User.objects.create_user(username="sim", password="sim", dealer=self.dealer)
+        self.client.force_login(user)
+        response = self.client.get(reverse("dealers:pricing_simulator"), {"margins": "10, 25", "group_by": "brand"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["group"] for row in response.context["rows"]], [("Fiat",), ("VW",)])
+
+        response = self.client.get(reverse("dealers:pricing_simulator"), {"margins": "diez"})
+        self.assertFalse(response.context["form"].is_valid())
+        self.assertNotIn("simulation", response.context)
+
+        out = StringIO()
+        call_command("simulate_pricing", str(self.dealer.pk), "--margins", "10", "25", "--group-by", stdout=out)
+        self.assertIn("TOTAL USD\t3\t683.33\t751.66\t854.16", out.getvalue())
+
+
+class ExchangeRateTests(TestCase):
+    """
+    Cotizaciones cacheadas por proceso y totales convertidos dentro del SQL.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.create(date=date(2026, 1, 1), base="USD", quote="UYU", rate=Decimal("40"))
+            ExchangeRate.objects.create(date=date(2026, 6, 1), base="USD", quote="UYU", rate=Decimal("50"))
+        self.dealer = Dealer.objects.create(
+            name="Cambio",
+            rut="RUT-CAMBIO",
+            phone="099000000",
+            whatsapp="099000000",
+            email="cambio@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, currency="USD", purchase_price=Decimal("1000.00"),
+        )
+        uyu = Vehicle.objects.create(
+            dealer=self.dealer, brand="VW", model="Gol", year=2016, currency="UYU", purchase_price=Decimal("40000.00"),
+        )
+        VehicleService.objects.create(
+            vehicle=uyu, description="Service", amount=Decimal("10000.00"), service_date=current_month(),
+        )
+
+    def test_rate_on_date(self):
+        self.assertEqual(exchange_rate("USD", "UYU", date(2026, 3, 1)), Decimal("40"))
+        self.assertEqual(exchange_rate("USD", "UYU", date(2026, 6, 1)), Decimal("50"))
+        self.assertEqual(exchange_rate("UYU", "USD", date(2026, 3, 1)), Decimal("0.025"))
+        self.assertEqual(exchange_rate("USD", "USD", date(2020, 1, 1)), Decimal("1"))
+        with self.assertRaises(MissingExchangeRate):
+            exchange_rate("USD", "UYU", date(2025, 12, 31))
+
+    def test_series_cached_until_rates_change(self):
+        exchange_rate("USD", "UYU", date(2026, 3, 1))
+        with self.assertNumQueries(0):
+            exchange_rate("UYU", "USD", date(2026, 7, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.create(date=date(2026, 3, 1), base="USD", quote="UYU", rate=Decimal("42"))
+        with self.assertNumQueries(1):
+            self.assertEqual(exchange_rate("USD", "UYU", date(2026, 3, 1)), Decimal("42"))
+
+    def test_reporting_currency_annotations(self):
+        vehicles = Vehicle.objects.filter(dealer=self.dealer)
+        converted = vehicles.with_reporting_currency("USD", on=date(2026, 3, 1))
+        # 1000 USD; (40000 + 10000) UYU / 40
+        self.assertEqual(
+            {row.currency: to_cents(row.reporting_total_cost) for row in converted},
+            {"USD": Decimal("1000.00"), "UYU": Decimal("1250.00")},
+        )
+
+        row = vehicles.with_reporting_currency("UYU", on=date(2026, 6, 1)).get(currency="USD")
+        self.assertEqual(to_cents(row.reporting_total_cost), Decimal("50000.00"))
+        self.assertEqual(to_cents(row.reporting_suggested_price), Decimal("55000.00"))
+
+    def test_loader_command(self):
+        path = self.enterContext(tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)).name
+        self.addCleanup(os.remove, path)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("date,base,quote,rate\n")
+            handle.write("2026-06-01,USD,UYU,51.5\n")
+            handle.write("2026-07-01,usd,uyu,52\n")
+            handle.write("2026-07-02,USD,EUR,1\n")
+            handle.write("2026-07-03,USD,UYU,-1\n")
+
+        exchange_rate("USD", "UYU")
+        out, err = StringIO(), StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("load_exchange_rates", path, stdout=out, stderr=err)
+
+        self.assertIn("2 cotizaciones cargadas, 2 filas rechazadas", out.getvalue())
+        self.assertEqual(ExchangeRate.objects.count(), 3)
+        self.assertEqual(ExchangeRate.objects.get(date=date(2026, 6, 1)).rate, Decimal("51.5"))
+        self.assertEqual(exchange_rate("USD", "UYU", date(2026, 7, 15)), Decimal("52"))
+
+    def test_dashboard_shows_reporting_total(self):
+        user = User.objects.create_user(username="cambio", password="cambio", dealer=self.dealer)
+        self.client.force_login(user)
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.context["inventory_value"]["currency"], "USD")
+        # Cotización vigente hoy: la última (50)
+        self.assertEqual(response.context["inventory_value"]["amount"], Decimal("2000.00"))
+
+
+class SettlementTests(TestCase):
+    """
+    Liquidaciones de consignación: una consulta agrupada para todos los
+    vehículos, filas inmutables y re-ejecución incremental.
+    """
+
+    # purge_deleted recorre todos los shards
+    databases = {"default", "shard_1"} if SHARDED else {"default"}
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Consigna",
+            rut="RUT-CONSIGNA",
+            phone="099000000",
+            whatsapp="099000000",
+            email="consigna@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.period = current_month()
+        self.cars = [
+            Vehicle.objects.create(
+                dealer=self.dealer, brand="Fiat", model=f"Uno {i}", year=2015, purchase_price=Decimal("100.00"),
+                ownership_type=Vehicle.Ownership.CONSIGNMENT,
+            )
+            for i in range(3)
+        ]
+        Vehicle.objects.create(
+            dealer=self.dealer, brand="VW", model="Gol", year=2016, purchase_price=Decimal("100.00"),
+        )
+        self.add_service(self.cars[0], "30.00", VehicleService.Payer.OWNER)
+        self.add_service(self.cars[0], "20.00", VehicleService.Payer.DEALER)
+        self.add_service(self.cars[0], "5.00", VehicleService.Payer.DEALER, is_active=False)
+        # Fuera del período
+        self.add_service(self.cars[0], "99.00", VehicleService.Payer.OWNER, days=40)
+        self.add_service(self.cars[1], "15.00", VehicleService.Payer.OWNER)
+
+    def add_service(self, vehicle, amount, payer, is_active=True, days=0):
+        return VehicleService.objects.create(
+            vehicle=vehicle,
+            description="Service",
+            amount=Decimal(amount),
+            payer=payer,
+            service_date=self.period + timedelta(days=days),
+            is_active=is_active,
+        )
+
+    def test_statements_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = {row["pk"]: row for row in statement_rows(self.dealer.pk, self.period)}
+
+        self.assertEqual(set(rows), {car.pk for car in self.cars})
+        first = rows[self.cars[0].pk]
+        self.assertEqual(first["owner_paid"], Decimal("30.00"))
+        self.assertEqual(first["dealer_paid"], Decimal("20.00"))
+        self.assertEqual((first["owner_services_count"], first["dealer_services_count"]), (1, 1))
+        self.assertEqual(first["services_rows"], 3)
+        self.assertEqual(rows[self.cars[2].pk]["owner_paid"], Decimal("0.00"))
+
+    def test_rerun_is_incremental(self):
+        run = generate_settlements(self.dealer.pk, self.period)
+        self.assertEqual((run.created, run.unchanged), (3, 0))
+
+        run = generate_settlements(self.dealer.pk, self.period)
+        self.assertEqual((run.created, run.unchanged), (0, 3))
+
+        service = self.cars[1].services.get()
+        service.amount = Decimal("25.00")
+        service.save()
+        run = generate_settlements(self.dealer.pk, self.period)
+        self.assertEqual((run.created, run.unchanged), (1, 2))
+
+        current = Settlement.objects.filter(dealer=self.dealer, period=self.period).current()
+        self.assertEqual(current.count(), 3)
+        second = current.get(vehicle=self.cars[1])
+        self.assertEqual((second.sequence, second.owner_paid), (2, Decimal("25.00")))
+        self.assertEqual(Settlement.objects.get(vehicle=self.cars[1], sequence=1).owner_paid, Decimal("15.00"))
+
+    def test_vehicle_corrections_are_resettled(self):
+        generate_settlements(self.dealer.pk, self.period)
+
+        car = Vehicle.objects.get(pk=self.cars[1].pk)
+        car.currency = Vehicle.Currency.UYU
+        car.save()
+        run = generate_settlements(self.dealer.pk, self.period)
+        self.assertEqual((run.created, run.unchanged), (1, 2))
+        current = Settlement.objects.filter(period=self.period).current()
+        self.assertEqual(current.get(vehicle=car).currency, Vehicle.Currency.UYU)
+
+        # Corregido a propio: la versión nueva anula la liquidación
+        car.ownership_type = Vehicle.Ownership.DEALER
+        car.save()
+        run = generate_settlements(self.dealer.pk, self.period)
+        self.assertEqual((run.created, run.unchanged), (1, 2))
+        self.assertFalse(current.filter(vehicle=car).exists())
+        self.assertEqual(current.count(), 2)
+        run = generate_settlements(self.dealer.pk, self.period)
+        self.assertEqual((run.created, run.unchanged), (0, 3))
+
+    def test_purge_keeps_settled_vehicles(self):
+        generate_settlements(self.dealer.pk, self.period)
+        unsettled = Vehicle.objects.get(brand="VW")
+        for vehicle in (self.cars[0], unsettled):
+            vehicle.soft_delete()
+        Vehicle.all_objects.filter(dealer=self.dealer).update(updated_at=timezone.now() - timedelta(days=30))
+
+        call_command("purge_deleted", stdout=StringIO())
+
+        self.assertTrue(Vehicle.all_objects.filter(pk=self.cars[0].pk).exists())
+        self.assertEqual(Settlement.objects.filter(vehicle=self.cars[0]).count(), 1)
+        self.assertFalse(Vehicle.all_objects.filter(pk=unsettled.pk).exists())
+
+    def test_settlements_are_immutable(self):
+        generate_settlements(self.dealer.pk, self.period)
+        settlement = Settlement.objects.first()
+        settlement.owner_paid = Decimal("0.00")
+        with self.assertRaises(TypeError):
+            settlement.save()
+        with self.assertRaises(TypeError):
+            Settlement.objects.update(owner_paid=0)
+
+    def test_views_and_job(self):
+        user = User.objects.create_user(username="consigna", password="consigna", dealer=self.dealer)
+        self.client.force_login(user)
+        url = reverse("dealers:settlement_list")
+        query = {"period": f"{self.period:%Y-%m}"}
+
+        response = self.client.post(url, query)
+        self.assertEqual(response.status_code, 302)
+        Worker(burst=True).run()
+        self.assertEqual(Settlement.objects.filter(dealer=self.dealer).count(), 3)
+
+        response = self.client.get(url, query)
+        self.assertEqual(len(response.context["settlements"]), 3)
+        self.assertEqual(response.context["totals"][0]["owner_paid"], Decimal("45.00"))
+
+        response = self.client.get(reverse("dealers:settlement_export"), query)
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertEqual(len(content.strip().splitlines()), 4)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("generate_settlements", "--period", f"{self.period:%Y-%m}", stdout=out)
+        self.assertIn("3 liquidaciones generadas, 0 sin cambios", out.getvalue())
+
+
+class VehicleAutocompleteTests(TestCase):
+    """
+    El form de servicios elige el vehículo con búsqueda, sin <select> del
+    inventario completo.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.dealer, self.other = [
+            Dealer.objects.create(
+                name=name,
+                rut=f"RUT-{name}",
+                phone="099000000",
+                whatsapp="099000000",
+                email=f"{name.lower()}@example.com",
+                default_margin_percentage=Decimal("10.00"),
+            )
+            for name in ("Auto", "Otro")
+        ]
+        self.user = User.objects.create_user(username="auto", password="auto", dealer=self.dealer)
+        self.fiat = Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("100.00"),
+        )
+        self.fiats = [
+            Vehicle.objects.create(
+                dealer=self.dealer, brand="Fiat", model="Palio", year=2000 + i, purchase_price=Decimal("100.00"),
+            )
+            for i in range(12)
+        ]
+        Vehicle.objects.create(
+            dealer=self.dealer, brand="Renault", model="Clio", year=2015, purchase_price=Decimal("100.00"),
+        )
+        self.foreign = Vehicle.objects.create(
+            dealer=self.other, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("100.00"),
+        )
+        self.client.force_login(self.user)
+
+    def search(self, **params):
+        response = self.client.get(reverse("dealers:vehicle_autocomplete"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_prefix_search_is_scoped_and_limited(self):
+        self.assertEqual(
+            self.search(q="fi un"),
+            [{"id": self.fiat.pk, "text": "Fiat Uno (2015)"}],
+        )
+        self.assertEqual(len(self.search(q="fiat")), 10)
+        self.assertEqual(len(self.search(q="fiat", limit="100")), 13)
+        self.assertEqual([r["id"] for r in self.search(q="uno 2015")], [self.fiat.pk])
+        self.assertEqual(self.search(q="iat"), [])
+        self.assertEqual(self.search(q=""), [])
+
+    def test_extra_terms_are_reported(self):
+        url = reverse("dealers:vehicle_autocomplete")
+        data = self.client.get(url, {"q": "fiat uno 2015 rojo full"}).json()
+        self.assertEqual([r["id"] for r in data["results"]], [self.fiat.pk])
+        self.assertEqual(data["ignored_terms"], ["rojo", "full"])
+        self.assertEqual(
+            VehicleQuerySet.search_terms("fiat uno 2015 rojo"), (["fiat", "uno", "2015"], ["rojo"])
+        )
+
+    def test_form_renders_without_vehicle_options(self):
+        url = reverse("dealers:vehicle_service_create")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "<option value=\"%s\"" % self.fiat.pk)
+        self.assertContains(response, reverse("dealers:vehicle_autocomplete"))
+        self.assertContains(response, "dealers/vehicle_autocomplete.js")
+
+    def test_post_validates_only_selected_vehicle(self):
+        url = reverse("dealers:vehicle_service_create")
+        data = {
+            "description": "Service",
+            "amount": "10.00",
+            "payer": VehicleService.Payer.DEALER,
+            "service_date": current_month().isoformat(),
+        }
+
+        response = self.client.post(url, {**data, "vehicle": self.foreign.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(VehicleService.objects.filter(vehicle=self.foreign).exists())
+
+        # Re-render con error: el vehículo elegido conserva su nombre
+        response = self.client.post(url, {**data, "amount": "", "vehicle": self.fiat.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'value="Fiat Uno (2015)"')
+
+        response = self.client.post(url, {**data, "vehicle": self.fiat.pk})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(VehicleService.objects.filter(vehicle=self.fiat).exists())
+
+
+class AdminChangelistTests(TestCase):
+    """
+    Los changelists del admin hacen la misma cantidad de queries con 2 o
+    con 10 filas (sin N+1), sin cargar todos los dealers en los filtros.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="root", password="root", email="root@example.com")
+        self.client.force_login(self.admin)
+        # Principal cacheado sin dealer: los pk se reusan entre tests
+        self.addCleanup(cache.clear)
+
+    def add_rows(self, count: int):
+        for _ in range(count):
+            n = Dealer.all_objects.count()
+            dealer = Dealer.objects.create(
+                name=f"Dealer {n}",
+                rut=f"RUT-ADMIN-{n}",
+                phone="099000000",
+                whatsapp="099000000",
+                email=f"admin{n}@example.com",
+                default_margin_percentage=Decimal("10.00"),
+            )
+            vehicle = Vehicle.objects.create(
+                dealer=dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("100.00"),
+            )
+            VehicleService.objects.create(
+                vehicle=vehicle, description="Service", amount=Decimal("10.00"), service_date=current_month(),
+            )
+
+    def changelist_queries(self, model, **params) -> int:
+        url = reverse(f"admin:dealers_{model._meta.model_name}_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for model in (Dealer, Vehicle, VehicleService):
+            with self.subTest(model=model.__name__):
+                self.add_rows(2)
+                few = self.changelist_queries(model)
+                self.add_rows(8)
+                self.assertEqual(self.changelist_queries(model), few)
+
+    def test_changelist_includes_soft_deleted_rows(self):
+        self.add_rows(2)
+        Vehicle.objects.order_by("pk").first().soft_delete()
+        # Default manager all_objects: el admin ve también las bajas lógicas
+        response = self.client.get(reverse("admin:dealers_vehicle_changelist"))
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+
+    def test_dealer_filter_uses_autocomplete(self):
+        self.add_rows(3)
+        dealer = Dealer.objects.order_by("pk").last()
+        url = reverse("admin:dealers_vehicle_changelist")
+
+        response = self.client.get(url)
+        self.assertContains(response, "admin-autocomplete")
+        self.assertContains(response, "core/admin_autocomplete_filter.js")
+        # Sin un link por dealer en el filtro
+        self.assertNotContains(response, "?dealer__id__exact=")
+
+        response = self.client.get(url, {"dealer__id__exact": dealer.pk})
+        self.assertEqual(len(response.context["cl"].result_list), 1)
+        # Solo la opción seleccionada
+        self.assertContains(response, f'<option value="{dealer.pk}" selected>{dealer.name}</option>', html=True)
+
+    def test_unfiltered_changelist_uses_estimated_count(self):
+        self.add_rows(2)
+        with mock.patch("core.admin.estimated_row_count", return_value=1_000_000):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("admin:dealers_vehicle_changelist"))
+        self.assertEqual(response.context["cl"].result_count, 1_000_000)
+        self.assertFalse([q for q in queries if "COUNT(*)" in q["sql"]])
+
+        with mock.patch("core.admin.estimated_row_count", return_value=1_000_000):
+            response = self.client.get(reverse("admin:dealers_vehicle_changelist"), {"is_active__exact": 1})
+        self.assertEqual(response.context["cl"].result_count, 2)
+
+
+class ImportInventoryTests(TestCase):
+    """
+    import_inventory valida fila por fila, inserta en lotes y deja las
+    filas rechazadas (con su línea) en el archivo de rechazos.
+    """
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Importador",
+            rut="RUT-IMPORT",
+            phone="099000000",
+            whatsapp="099000000",
+            email="import@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2010, purchase_price=Decimal("1.00"),
+            external_ref="OLD",
+        )
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, name: str, lines: list[str]) -> str:
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(lines) + "\n")
+        return path
+
+    def test_import_with_rejects_and_batches(self):
+        vehicles = self.write("vehicles.csv", [
+            "external_ref,brand,model,year,ownership_type,purchase_price,currency",
+            "V1,Fiat,Palio,2015,DEALER,1000.00,USD",
+            "V1,Fiat,Palio,2015,DEALER,1000.00,USD",
+            ",VW,Gol,2016,DEALER,900.00,USD",
+            "V2,VW,Gol,2016,CONSIGNMENT,900.00,UYU",
+            "OLD,Fiat,Uno,2010,DEALER,1.00,USD",
+            "V3,Ford,Ka,abc,DEALER,500.00,USD",
+        ])
+        services = self.write("services.csv", [
+            "vehicle_ref,description,amount,payer,service_date",
+            "V1,Cambio de aceite,100.00,DEALER,2026-10-01",
+            "NOPE,Lavado,10.00,DEALER,2026-10-01",
+            "V2,Frenos,x,DEALER,2026-10-01",
+            "V2,Cubiertas,50.00,OWNER,2026-10-02",
+        ])
+        rejects = os.path.join(self.dir.name, "rejects.csv")
+
+        out, err = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command(
+                "import_inventory", "RUT-IMPORT", vehicles, services,
+                batch_size=2, rejects=rejects, stdout=out, stderr=err,
+            )
+        self.assertIn("2 vehículos y 2 servicios importados, 6 filas rechazadas.", out.getvalue())
+
+        # Lotes de 2 filas: V1 y V2 llegan en lotes distintos, un INSERT cada uno
+        inserts = [
+            q["sql"] for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "dealers_vehicle"')
+        ]
+        self.assertEqual(len(inserts), 2)
+
+        v1 = Vehicle.objects.get(dealer=self.dealer, external_ref="V1")
+        self.assertEqual((v1.services_total, v1.services_count), (Decimal("100.00"), 1))
+        self.assertEqual(v1.suggested_price, Decimal("1210.00"))
+        v2 = Vehicle.objects.get(dealer=self.dealer, external_ref="V2")
+        self.assertEqual((v2.ownership_type, v2.currency), ("CONSIGNMENT", "UYU"))
+        self.assertEqual(
+            set(VehicleService.objects.values_list("dealer_id", flat=True)), {self.dealer.pk}
+        )
+
+        with open(rejects, newline="", encoding="utf-8") as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(rows[0], ["file", "line", "error"])
+        self.assertEqual(
+            [(os.path.basename(path), int(line)) for path, line, _ in rows[1:]],
+            [
+                ("vehicles.csv", 3), ("vehicles.csv", 4), ("vehicles.csv", 6), ("vehicles.csv", 7),
+                ("services.csv", 3), ("services.csv", 4),
+            ],
+        )
+        errors = [error for _, _, error in rows[1:]]
+        self.assertEqual(errors[0], "external_ref: 'V1' ya existe")
+        self.assertEqual(errors[1], "external_ref: requerido")
+        self.assertTrue(errors[3].startswith("year:"), errors[3])
+        self.assertEqual(errors[4], "vehicle_ref: 'NOPE' no encontrado")
+        self.assertTrue(errors[5].startswith("amount:"), errors[5])
+        self.assertIn("vehicles.csv:3:", err.getvalue())
+
+    def test_unknown_dealer(self):
+        path = self.write("vehicles.csv", ["external_ref,brand,model,year,ownership_type,purchase_price,currency"])
+        with self.assertRaisesMessage(CommandError, "no encontrado"):
+            call_command("import_inventory", "RUT-NOPE", path, stdout=StringIO())
+
+
+HAS_OPENPYXL = importlib.util.find_spec("openpyxl") is not None
+
+
+class ExportTests(TestCase):
+    """
+    Exportaciones CSV (streaming) y XLSX del tenant con columnas de costeo
+    y los mismos filtros que el listado.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.dealer = Dealer.objects.create(
+            name="Exportador",
+            rut="RUT-EXPORT",
+            phone="099000000",
+            whatsapp="099000000",
+            email="export@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        other = Dealer.objects.create(
+            name="Ajeno", rut="RUT-AJENO", phone="0", whatsapp="0", email="ajeno@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.fiat = Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("1000.00"),
+            external_ref="F-1",
+        )
+        Vehicle.objects.create(
+            dealer=self.dealer, brand="VW", model="Gol", year=2016, purchase_price=Decimal("900.00"),
+            external_ref="V-1",
+        )
+        Vehicle.objects.create(
+            dealer=other, brand="Fiat", model="Palio", year=2017, purchase_price=Decimal("1.00"),
+            external_ref="AJENO",
+        )
+        for amount, payer in (("50.00", VehicleService.Payer.DEALER), ("30.00", VehicleService.Payer.OWNER)):
+            VehicleService.objects.create(
+                vehicle=self.fiat, description="Service", amount=Decimal(amount), payer=payer,
+                service_date=date(2026, 10, 1),
+            )
+        self.client.force_login(User.objects.create_user(username="export", password="x", dealer=self.dealer))
+
+    def get_csv(self, url: str, params: dict) -> list[list[str]]:
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode("utf-8")
+        response.close()
+        self.assertTrue(content.startswith("\ufeff"))
+        return list(csv.reader(StringIO(content[1:])))
+
+    def test_vehicle_csv_has_costing_and_filters(self):
+        rows = self.get_csv(reverse("dealers:vehicle_export"), {"brand": "fi"})
+        self.assertEqual(rows[0], [label for _, label in VEHICLE_EXPORT_COLUMNS])
+        self.assertEqual(rows[1:], [
+            # Sin cotizaciones cargadas las columnas convertidas quedan vacías
+            ["F-1", "Fiat", "Uno", "2015", "DEALER", "USD", "1000.00", "50.00", "1050.00", "1155.00", "", ""],
+        ])
+
+        rows = self.get_csv(reverse("dealers:vehicle_export"), {})
+        self.assertEqual({row[0] for row in rows[1:]}, {"F-1", "V-1"})
+
+    @override_settings(REPORTING_CURRENCY="UYU")
+    def test_vehicle_csv_in_reporting_currency(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.create(
+                date=date(2026, 1, 1), base="USD", quote="UYU", rate=Decimal("40"),
+            )
+        rows = self.get_csv(reverse("dealers:vehicle_export"), {"brand": "fi"})
+        self.assertEqual(rows[1][-2:], ["42000.00", "46200.00"])
+
+    def test_service_csv(self):
+        # Como el listado: solo servicios activos
+        VehicleService.objects.create(
+            vehicle=self.fiat, description="Anulado", amount=Decimal("10.00"), service_date=date(2026, 10, 1),
+        ).soft_delete()
+        rows = self.get_csv(reverse("dealers:vehicle_service_export"), {})
+        self.assertEqual(rows[0], [label for _, label in SERVICE_EXPORT_COLUMNS])
+        self.assertEqual(
+            sorted(rows[1:]),
+            [
+                ["F-1", "Fiat", "Uno", "2015", "Service", "2026-10-01", "DEALER", "50.00"],
+                ["F-1", "Fiat", "Uno", "2015", "Service", "2026-10-01", "OWNER", "30.00"],
+            ],
+        )
+
+    def test_amounts_round_half_up(self):
+        self.assertEqual(_format(Decimal("10.005")), Decimal("10.01"))
+        self.assertEqual(_format(0.125), Decimal("0.13"))
+
+    @skipUnless(HAS_OPENPYXL, "Requiere openpyxl")
+    def test_vehicle_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(reverse("dealers:vehicle_export"), {"format": "xlsx", "brand": "fi"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="inventario.xlsx"', response["Content-Disposition"])
+        content = b"".join(response.streaming_content)
+        response.close()
+
+        sheet = load_workbook(BytesIO(content), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], tuple(label for _, label in VEHICLE_EXPORT_COLUMNS))
+        self.assertEqual(rows[1][0], "F-1")
+        self.assertEqual(Decimal(str(rows[1][9])), Decimal("1155.00"))
+
+    @skipIf(HAS_OPENPYXL, "openpyxl instalado")
+    def test_xlsx_without_openpyxl(self):
+        response = self.client.get(reverse("dealers:vehicle_export"), {"format": "xlsx"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SoftDeleteTests(TestCase):
+    """
+    Las vistas de borrado hacen baja lógica; purge_deleted borra en lotes.
+    """
+
+    # purge_deleted recorre todos los shards
+    databases = {"default", "shard_1"} if SHARDED else {"default"}
+
+    def setUp(self):
+        self.dealer = Dealer.objects.create(
+            name="Bajas",
+            rut="RUT-BAJAS",
+            phone="099000000",
+            whatsapp="099000000",
+            email="bajas@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        self.user = User.objects.create_user(username="bajas", password="bajas", dealer=self.dealer)
+        self.vehicle = Vehicle.objects.create(
+            dealer=self.dealer,
+            brand="Fiat",
+            model="Uno",
+            year=2015,
+            purchase_price=Decimal("1000.00"),
+        )
+        self.service = VehicleService.objects.create(
+            vehicle=self.vehicle,
+            description="Service",
+            amount=Decimal("50.00"),
+            service_date=current_month(),
+        )
+
+    def backdate(self, model, **filters):
+        old = timezone.now() - timedelta(days=30)
+        model.all_objects.filter(**filters).update(updated_at=old)
+
+    def test_delete_view_soft_deletes_vehicle_and_services(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("dealers:vehicle_delete", args=[self.vehicle.pk]))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Vehicle.objects.filter(pk=self.vehicle.pk).exists())
+        self.assertFalse(Vehicle.all_objects.get(pk=self.vehicle.pk).is_active)
+        self.assertFalse(VehicleService.objects.filter(vehicle_id=self.vehicle.pk).exists())
+        self.assertEqual(VehicleService.all_objects.filter(vehicle_id=self.vehicle.pk).count(), 1)
+        stats = DealerStats.objects.get(dealer=self.dealer)
+        self.assertEqual((stats.vehicles_in_stock, stats.services_month_count), (0, 0))
+
+    def test_unique_checks_see_soft_deleted_rows(self):
+        self.dealer.soft_delete()
+        admin = User.objects.create_user(username="operador", password="operador")
+        self.client.force_login(admin)
+        response = self.client.post(reverse("dealers:create"), {
+            "name": "Otra",
+            "rut": "RUT-BAJAS",
+            "email": "otra@example.com",
+            "phone": "099000000",
+            "whatsapp": "099000000",
+            "default_margin_percentage": "10.00",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("rut", response.context["form"].errors)
+
+        vehicle = Vehicle(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("1.00"), external_ref="X-1",
+        )
+        vehicle.save()
+        vehicle.soft_delete()
+        duplicate = Vehicle(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("1.00"), external_ref="X-1",
+        )
+        with self.assertRaises(ValidationError):
+            duplicate.validate_constraints()
+
+        response = self.client.get(reverse("dealers:update", args=[self.dealer.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_dealer_soft_delete_saves_users(self):
+        with mock.patch("accounts.signals.invalidate_user") as invalidate_user:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.dealer.soft_delete()
+        invalidate_user.assert_called_once_with(self.user.pk)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_purge_deleted_respects_retention(self):
+        kept = Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Palio", year=2016, purchase_price=Decimal("1.00"),
+        )
+        kept.soft_delete()
+        self.vehicle.soft_delete()
+        self.backdate(Vehicle, pk=self.vehicle.pk)
+        self.backdate(VehicleService, vehicle_id=self.vehicle.pk)
+
+        call_command("purge_deleted", batch_size=1, stdout=StringIO())
+
+        self.assertFalse(Vehicle.all_objects.filter(pk=self.vehicle.pk).exists())
+        self.assertFalse(VehicleService.all_objects.filter(pk=self.service.pk).exists())
+        self.assertTrue(Vehicle.all_objects.filter(pk=kept.pk).exists())
+
+    def test_purge_deleted_dealer(self):
+        self.dealer.soft_delete()
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(Dealer.objects.filter(pk=self.dealer.pk).exists())
+
+        self.backdate(Dealer, pk=self.dealer.pk)
+        call_command("purge_deleted", stdout=StringIO())
+
+        self.assertFalse(Dealer.all_objects.filter(pk=self.dealer.pk).exists())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Vehicle.all_objects.filter(dealer_id=self.dealer.pk).exists())
+        self.assertFalse(DealerStats.objects.filter(dealer_id=self.dealer.pk).exists())
+
+
+
+@skipUnless(SHARDED, "Requiere crm.settings.sharded")
+class MoveDealerToShardTests(TestCase):
+    # El runner crea las bases de todos los tests, aun los salteados
+    databases = {"default", "shard_1"} if SHARDED else {"default"}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.dealer = Dealer.objects.create(
+            name="Mover",
+            rut="RUT-MOVE",
+            phone="099000000",
+            whatsapp="099000000",
+            email="move@example.com",
+            default_margin_percentage=Decimal("10.00"),
+        )
+        vehicle = Vehicle.objects.create(
+            dealer=self.dealer, brand="Fiat", model="Uno", year=2015, purchase_price=Decimal("100.00")
+        )
+        VehicleService.objects.create(
+            vehicle=vehicle, description="S", amount=Decimal("5.00"), service_date=current_month()
+        )
+
+    def test_move_copies_tenant_and_flips_mapping(self):
+        call_command("move_dealer_to_shard", self.dealer.pk, "shard_1", settle=0, stdout=StringIO())
+
+        self.dealer.refresh_from_db()
+        self.assertEqual((self.dealer.shard, self.dealer.shard_locked), ("shard_1", False))
+        self.assertFalse(Vehicle.objects.using("default").filter(dealer=self.dealer).exists())
+        self.assertEqual(VehicleService.objects.using("shard_1").filter(dealer=self.dealer).count(), 1)
+        self.assertEqual(
+            DealerStats.objects.using("shard_1").get(dealer=self.dealer).inventory_cost_usd,
+            Decimal("105.00"),
+        )
+
+    def test_move_back_purges_shard_and_removes_deleted_rows(self):
+        User.objects.create_user(username="mover", password="x", dealer=self.dealer)
+        call_command("move_dealer_to_shard", self.dealer.pk, "shard_1", settle=0, keep_source=True, stdout=StringIO())
+        vehicle = Vehicle.objects.using("shard_1").get(dealer=self.dealer)
+        # Baja física en el shard mientras el origen conserva la copia vieja
+        purge(Vehicle._base_manager.using("shard_1").filter(pk=vehicle.pk))
+
+        call_command("move_dealer_to_shard", self.dealer.pk, "default", settle=0, batch_size=1, stdout=StringIO())
+
+        self.dealer.refresh_from_db()
+        self.assertEqual(self.dealer.shard, "default")
+        self.assertFalse(Vehicle._base_manager.using("default").filter(pk=vehicle.pk).exists())
+        self.assertFalse(VehicleService._base_manager.using("default").filter(vehicle_id=vehicle.pk).exists())
+        for model in (Dealer, User, Vehicle, VehicleService, DealerStats):
+            lookup = {"pk": self.dealer.pk} if model is Dealer else {"dealer_id": self.dealer.pk}
+            self.assertFalse(model._base_manager.using("shard_1").filter(**lookup).exists(), model)
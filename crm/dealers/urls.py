@@ -5,13 +5,19 @@ from .views import (
     DealerUpdateView,
     DealerDeleteView,
     VehicleListView,
+    VehicleAutocompleteView,
+    PricingSimulatorView,
+    VehicleExportView,
     VehicleCreateView,
     VehicleUpdateView,
     VehicleDeleteView,
     VehicleServiceListView,
+    VehicleServiceExportView,
     VehicleServiceCreateView,
     VehicleServiceUpdateView,
     VehicleServiceDeleteView,
+    SettlementListView,
+    SettlementExportView,
 )
 
 app_name = "dealers"
@@ -23,13 +29,20 @@ urlpatterns = [
     path("<int:pk>/delete/", DealerDeleteView.as_view(), name="delete"),
 
     path("vehicles/", VehicleListView.as_view(), name="vehicle_list"),
+    path("vehicles/export/", VehicleExportView.as_view(), name="vehicle_export"),
+    path("vehicles/autocomplete/", VehicleAutocompleteView.as_view(), name="vehicle_autocomplete"),
+    path("vehicles/pricing/", PricingSimulatorView.as_view(), name="pricing_simulator"),
     path("vehicles/new/", VehicleCreateView.as_view(), name="vehicle_create"),
     path("vehicles/<int:pk>/edit/", VehicleUpdateView.as_view(), name="vehicle_update"),
     path("vehicles/<int:pk>/delete/", VehicleDeleteView.as_view(), name="vehicle_delete"),
 
     path("services/", VehicleServiceListView.as_view(), name="vehicle_service_list"),
+    path("services/export/", VehicleServiceExportView.as_view(), name="vehicle_service_export"),
     path("services/new/", VehicleServiceCreateView.as_view(), name="vehicle_service_create"),
     path("services/<int:pk>/edit/", VehicleServiceUpdateView.as_view(), name="vehicle_service_update"),
     path("services/<int:pk>/delete/", VehicleServiceDeleteView.as_view(), name="vehicle_service_delete"),
+
+    path("settlements/", SettlementListView.as_view(), name="settlement_list"),
+    path("settlements/export/", SettlementExportView.as_view(), name="settlement_export"),
     
 ]
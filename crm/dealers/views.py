@@ -1,25 +1,114 @@
-from typing import TYPE_CHECKING, cast
+from typing import cast
+from asgiref.sync import sync_to_async
 from django.forms import ModelChoiceField
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
-
-from .models import Dealer, Vehicle, VehicleService
-
-if TYPE_CHECKING:
-    from accounts.models import User  # SOLO para typing
+from django.views import View
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView
+
+from accounts.principal import get_principal
+from core.fragments import render_fragments
+from core.jobs import enqueue
+from core.routers import ReplicaReadMixin
+from core.views import AsyncViewMixin, SoftDeleteMixin
+from core.sharding import fan_out
+
+from .exports import EXPORTS, export_response
+from .forms import (
+    PricingSimulationForm,
+    SettlementPeriodForm,
+    VehicleFilterForm,
+    VehicleServiceFilterForm,
+    VehicleServiceForm,
+)
+from .models import Dealer, DealerStats, Settlement, Vehicle, VehicleQuerySet, VehicleService
+from .pagination import KeysetPaginationMixin
+from .pricing import PricingUnavailable, load_inventory, simulate
+from .settlements import period_totals
+
+
+class AsyncKeysetListMixin(AsyncViewMixin):
+    """
+    Versión async de un ListView con KeysetPaginationMixin: la página se lee
+    con aiterator(); el contexto se arma en un hilo (sync_to_async) porque
+    get_context_data de las subclases puede consultar la base (totales,
+    formularios con querysets, principal).
+    """
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        self.keyset_result = await self.apaginate_queryset(
+            self.object_list, self.get_paginate_by(self.object_list)
+        )
+        context = await sync_to_async(self.get_context_data)()
+        return self.render_to_response(context)
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.keyset_result
+
+
+class ExportView(LoginRequiredMixin, ReplicaReadMixin, View):
+    """
+    GET: exportación en el request (streaming).
+    POST: la misma exportación como job en segundo plano (core.jobs);
+    redirige a la página de estado, que ofrece el archivo al terminar.
+    Los filtros llegan en el query string en ambos casos.
+    """
+    export = ""
+
+    def get(self, request, *args, **kwargs):
+        principal = get_principal(request)
+        build, columns, filename = EXPORTS[self.export]
+        return export_response(request, build(principal.dealer_id, request.GET), columns, filename)
+
+    def post(self, request, *args, **kwargs):
+        principal = get_principal(request)
+        job = enqueue(
+            "dealers.export",
+            dealer_id=principal.dealer_id,
+            created_by_id=principal.user_id,
+            export=self.export,
+            params=request.GET.dict(),
+            format=request.GET.get("format", "csv"),
+        )
+        return redirect("job_detail", pk=job.pk)
 
 
 # =========================
 # DEALERS
 # =========================
 
-class DealerListView(LoginRequiredMixin, ListView):
+class DealerListView(LoginRequiredMixin, ReplicaReadMixin, ListView):
+    """
+    Vista de operador: los dealers salen del directorio y sus contadores
+    de cada shard (una consulta por shard).
+    """
     model = Dealer
     template_name = "dealers/dealer_list.html"
     context_object_name = "dealers"
 
+    def get_queryset(self):
+        return Dealer.objects.order_by("name", "pk")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        dealers = list(context["dealers"])
+        stats = fan_out(dealers, self.fetch_stats)
+        for dealer in dealers:
+            dealer.shard_stats = stats.get(dealer.pk)
+        context["dealers"] = dealers
+        return context
+
+    @staticmethod
+    def fetch_stats(alias: str, dealer_ids: list) -> dict:
+        return {
+            stats.dealer_id: stats
+            for stats in DealerStats.objects.using(alias).filter(dealer_id__in=dealer_ids)
+        }
+
 
 class DealerCreateView(LoginRequiredMixin, CreateView):
     model = Dealer
@@ -48,25 +137,131 @@ class DealerUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "dealers/dealer_form.html"
     success_url = reverse_lazy("dealers:list")
 
+    def get_queryset(self):
+        return Dealer.objects.all()
+
 
-class DealerDeleteView(LoginRequiredMixin, DeleteView):
+class DealerDeleteView(LoginRequiredMixin, SoftDeleteMixin, DeleteView):
     model = Dealer
     template_name = "dealers/dealer_confirm_delete.html"
     success_url = reverse_lazy("dealers:list")
 
+    def get_queryset(self):
+        return Dealer.objects.all()
+
 
 # =========================
 # VEHICLES
 # =========================
 
-class VehicleListView(LoginRequiredMixin, ListView):
+class VehicleListView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Vehicle
     template_name = "dealers/vehicle_list.html"
     context_object_name = "vehicles"
+    sort_options = {
+        "recent": "-created_at",
+        "oldest": "created_at",
+        "year_desc": "-year",
+        "year_asc": "year",
+        "price_desc": "-purchase_price",
+        "price_asc": "purchase_price",
+        "suggested_desc": "-suggested_price",
+        "suggested_asc": "suggested_price",
+    }
+    default_sort = "recent"
 
     def get_queryset(self):
-        user = cast("User", self.request.user)
-        return Vehicle.objects.filter(dealer=user.dealer)
+        principal = get_principal(self.request)
+        self.filter_form = VehicleFilterForm(self.request.GET)
+        return self.filter_form.filter(
+            Vehicle.objects.filter(dealer_id=principal.dealer_id)
+        ).with_costing()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filter_form"] = self.filter_form
+        context["current_sort"] = self.get_sort_key()
+        context["vehicle_rows"] = render_fragments(
+            "vehicle_row",
+            "dealers/includes/vehicle_row.html",
+            context["vehicles"],
+            dealer_id=get_principal(self.request).dealer_id,
+            context_name="v",
+        )
+        return context
+
+
+class AsyncVehicleListView(AsyncKeysetListMixin, VehicleListView):
+    pass
+
+
+class VehicleExportView(ExportView):
+    """
+    Inventario completo con costeo (CSV streaming o XLSX).
+    """
+    export = "vehicles"
+
+
+class VehicleAutocompleteView(LoginRequiredMixin, ReplicaReadMixin, View):
+    """
+    JSON para el selector de vehículo (VehicleAutocompleteWidget):
+    ?q=fiat uno -> {"results": [{"id": 1, "text": "Fiat Uno (2015)"}, ...], "ignored_terms": []}
+    Solo vehículos activos del dealer, búsqueda por prefijo, con límite.
+    Las palabras que exceden VehicleQuerySet.SEARCH_TERMS se devuelven en
+    ignored_terms.
+    """
+    default_limit = 10
+    max_limit = 25
+
+    def get(self, request, *args, **kwargs):
+        principal = get_principal(request)
+        query = request.GET.get("q", "").strip()
+        if not query:
+            return JsonResponse({"results": [], "ignored_terms": []})
+
+        try:
+            limit = int(request.GET.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        vehicles = (
+            Vehicle.objects.filter(dealer_id=principal.dealer_id)
+            .search(query)
+            .only("id", "brand", "model", "year")
+            .order_by("brand", "model", "-year", "id")[:limit]
+        )
+        return JsonResponse({
+            "results": [{"id": vehicle.pk, "text": str(vehicle)} for vehicle in vehicles],
+            "ignored_terms": VehicleQuerySet.search_terms(query)[1],
+        })
+
+
+class PricingSimulatorView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
+    """
+    Valor del inventario del dealer con varios márgenes a la vez
+    (dealers.pricing): una consulta y el cálculo vectorizado.
+    """
+    template_name = "dealers/pricing_simulator.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        principal = get_principal(self.request)
+        form = PricingSimulationForm(self.request.GET or None)
+        context["form"] = form
+        if form.is_valid():
+            try:
+                simulation = simulate(
+                    load_inventory(principal.dealer_id),
+                    form.cleaned_data["margins"],
+                    form.cleaned_data["group_by"],
+                )
+            except PricingUnavailable as exc:
+                raise Http404(str(exc))
+            context["simulation"] = simulation
+            context["rows"] = simulation.rows()
+            context["currency_totals"] = simulation.currency_totals()
+        return context
 
 
 class VehicleCreateView(LoginRequiredMixin, CreateView):
@@ -78,13 +273,14 @@ class VehicleCreateView(LoginRequiredMixin, CreateView):
         "ownership_type",
         "purchase_price",
         "currency",
+        "price_override",
     ]
     template_name = "dealers/vehicle_form.html"
     success_url = reverse_lazy("dealers:vehicle_list")
 
     def form_valid(self, form):
-        user = cast("User", self.request.user)
-        form.instance.dealer = user.dealer
+        principal = get_principal(self.request)
+        form.instance.dealer_id = principal.dealer_id
         return super().form_valid(form)
 
 
@@ -97,88 +293,164 @@ class VehicleUpdateView(LoginRequiredMixin, UpdateView):
         "ownership_type",
         "purchase_price",
         "currency",
+        "price_override",
     ]
     template_name = "dealers/vehicle_form.html"
     success_url = reverse_lazy("dealers:vehicle_list")
 
     def get_queryset(self):
-        user = cast("User", self.request.user)
-        return Vehicle.objects.filter(dealer=user.dealer)
+        principal = get_principal(self.request)
+        return Vehicle.objects.filter(dealer_id=principal.dealer_id)
 
 
-class VehicleDeleteView(LoginRequiredMixin, DeleteView):
+class VehicleDeleteView(LoginRequiredMixin, SoftDeleteMixin, DeleteView):
     model = Vehicle
     template_name = "dealers/vehicle_confirm_delete.html"
     success_url = reverse_lazy("dealers:vehicle_list")
 
     def get_queryset(self):
-        user = cast("User", self.request.user)
-        return Vehicle.objects.filter(dealer=user.dealer)
+        principal = get_principal(self.request)
+        return Vehicle.objects.filter(dealer_id=principal.dealer_id)
 
-class VehicleServiceListView(LoginRequiredMixin, ListView):
+class VehicleServiceListView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = VehicleService
     template_name = "dealers/vehicle_service_list.html"
     context_object_name = "services"
+    sort_options = {
+        "recent": "-service_date",
+        "oldest": "service_date",
+        "amount_desc": "-amount",
+        "amount_asc": "amount",
+    }
+    default_sort = "recent"
 
     def get_queryset(self):
-        user = cast("User", self.request.user)
-        return VehicleService.objects.filter(
-            vehicle__dealer=user.dealer
+        principal = get_principal(self.request)
+        self.filter_form = VehicleServiceFilterForm(self.request.GET)
+        return self.filter_form.filter(
+            VehicleService.objects.for_dealer(principal.dealer_id)
         ).select_related("vehicle")
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filter_form"] = self.filter_form
+        context["current_sort"] = self.get_sort_key()
+        return context
+
+
+class AsyncVehicleServiceListView(AsyncKeysetListMixin, VehicleServiceListView):
+    pass
+
+
+class VehicleServiceExportView(ExportView):
+    """
+    Historial de servicios (CSV streaming o XLSX).
+    """
+    export = "services"
+
 
 class VehicleServiceCreateView(LoginRequiredMixin, CreateView):
     model = VehicleService
-    fields = [
-        "vehicle",
-        "description",
-        "amount",
-        "payer",
-        "service_date",
-    ]
+    form_class = VehicleServiceForm
     template_name = "dealers/vehicle_service_form.html"
     success_url = reverse_lazy("dealers:vehicle_service_list")
 
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
-        user = cast("User", self.request.user)
+        principal = get_principal(self.request)
 
         vehicle_field = cast(
             ModelChoiceField,
             form.fields["vehicle"]
         )
         vehicle_field.queryset = Vehicle.objects.filter(
-            dealer=user.dealer
+            dealer_id=principal.dealer_id
         )
 
         return form
 
 class VehicleServiceUpdateView(LoginRequiredMixin, UpdateView):
     model = VehicleService
-    fields = [
-        "vehicle",
-        "description",
-        "amount",
-        "payer",
-        "service_date",
-    ]
+    form_class = VehicleServiceForm
     template_name = "dealers/vehicle_service_form.html"
     success_url = reverse_lazy("dealers:vehicle_service_list")
 
     def get_queryset(self):
-        user = cast("User", self.request.user)
-        return VehicleService.objects.filter(
-            vehicle__dealer=user.dealer
+        principal = get_principal(self.request)
+        return VehicleService.objects.for_dealer(principal.dealer_id)
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        principal = get_principal(self.request)
+
+        vehicle_field = cast(
+            ModelChoiceField,
+            form.fields["vehicle"]
         )
+        vehicle_field.queryset = Vehicle.objects.filter(
+            dealer_id=principal.dealer_id
+        )
+
+        return form
 
 
-class VehicleServiceDeleteView(LoginRequiredMixin, DeleteView):
+class VehicleServiceDeleteView(LoginRequiredMixin, SoftDeleteMixin, DeleteView):
     model = VehicleService
     template_name = "dealers/vehicle_service_confirm_delete.html"
     success_url = reverse_lazy("dealers:vehicle_service_list")
 
     def get_queryset(self):
-        user = cast("User", self.request.user)
-        return VehicleService.objects.filter(
-            vehicle__dealer=user.dealer
-        )
\ No newline at end of file
+        principal = get_principal(self.request)
+        return VehicleService.objects.for_dealer(principal.dealer_id)
+
+
+# =========================
+# SETTLEMENTS (consignación)
+# =========================
+
+class SettlementListView(LoginRequiredMixin, ReplicaReadMixin, ListView):
+    """
+    GET: liquidaciones vigentes del período (última versión por vehículo).
+    POST: genera / actualiza las del período como job (dealers.settlements);
+    solo se vuelven a liquidar los vehículos con servicios modificados.
+    """
+    model = Settlement
+    template_name = "dealers/settlement_list.html"
+    context_object_name = "settlements"
+
+    def get_queryset(self):
+        principal = get_principal(self.request)
+        self.period_form = SettlementPeriodForm(self.request.GET)
+        self.period = self.period_form.get_period()
+        return (
+            Settlement.objects.filter(dealer_id=principal.dealer_id, period=self.period)
+            .current()
+            .select_related("vehicle")
+            .order_by("vehicle__brand", "vehicle__model", "vehicle_id")
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["period_form"] = self.period_form
+        context["period"] = self.period
+        context["totals"] = period_totals(self.object_list)
+        return context
+
+    def post(self, request, *args, **kwargs):
+        principal = get_principal(request)
+        period = SettlementPeriodForm(request.POST).get_period()
+        job = enqueue(
+            "dealers.generate_settlements",
+            dealer_id=principal.dealer_id,
+            created_by_id=principal.user_id,
+            period=period.isoformat(),
+        )
+        return redirect("job_detail", pk=job.pk)
+
+
+class SettlementExportView(ExportView):
+    """
+    Liquidaciones vigentes del período (?period=AAAA-MM) en CSV / XLSX.
+    """
+    export = "settlements"
+